@@ -2,37 +2,43 @@
 Run this file to start the FastAPI application.
 '''
 import os, sys
-import certifi
-import pymongo
+import asyncio
 import pandas as pd
 
+from typing import Dict, List, Optional, Union
+
 from dotenv import load_dotenv
 from src.exception.exception import NetworkSecurityException
 from src.logging.logger import logging
-from src.pipeline.training_pipeline import TrainingPipeline
-from src.utils.main_utils.utils import load_object
+from src.pipeline.training_jobs import TrainingJobManager, create_executor, run_online_training
+from src.pipeline.prediction_batcher import PredictionBatcher
+from src.pipeline.batch_prediction import predict_csv_in_chunks
+from src.utils.main_utils.utils import read_yaml_file
+from src.utils.main_utils.serialization import (
+  HTML_MEDIA_TYPE, CSV_MEDIA_TYPE, negotiate_media_type, read_input_frame, encode_predictions
+)
 from src.constant.training_pipeline import (
-  DATA_INGESTION_COLLECTION_NAME, DATA_INGESTION_DATABASE_NAME
+  DATA_INGESTION_COLLECTION_NAME, DATA_INGESTION_DATABASE_NAME,
+  SCHEMA_FILE_PATH, TARGET_COLUMN,
+  MODEL_SERVING_PREDICTION_COLUMN, MODEL_SERVING_CSV_CHUNK_SIZE,
+  MODEL_SERVING_INFERENCE_WORKERS
 )
-from src.utils.ml_utils.model.estimator import NetworkModel
+from src.utils.ml_utils.model.model_holder import ModelHolder
+from src.cloud.mongo_client import get_mongo_collection as get_shared_mongo_collection, close_mongo_client
 
-from fastapi import FastAPI, File, UploadFile, Request
+from fastapi import FastAPI, File, UploadFile, Request, Body, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from uvicorn import run as app_run
-from fastapi.responses import Response
+from fastapi.responses import Response, StreamingResponse, JSONResponse
 from starlette.responses import RedirectResponse
 from fastapi.templating import Jinja2Templates
 
-# Get the mongoDB connection URI from environment variables
-ca = certifi.where()
+# Load the environment
 load_dotenv()
-mongo_db_url = os.getenv("MONGO_DB_URI")
-print(f"MongoDB URL: {mongo_db_url}")
 
-# Initialize mongo client
-client = pymongo.MongoClient(mongo_db_url, tlsCAFile=ca)
-db = client[DATA_INGESTION_DATABASE_NAME]
-collection = db[DATA_INGESTION_COLLECTION_NAME]
+# Mongo is not needed to serve predictions, the shared client connects on first use only
+def get_mongo_collection():
+  return get_shared_mongo_collection(DATA_INGESTION_DATABASE_NAME, DATA_INGESTION_COLLECTION_NAME)
 
 # Initialize FastAPI app
 app = FastAPI()
@@ -46,6 +52,34 @@ app.add_middleware(
 
 templates = Jinja2Templates(directory="./templates")
 
+# Process-wide serving model, loaded once and hot reloaded after training
+model_holder = ModelHolder()
+
+# CPU-bound work runs off the event loop, inference on threads and training as background jobs
+inference_executor = create_executor("thread", MODEL_SERVING_INFERENCE_WORKERS)
+training_jobs = TrainingJobManager()
+prediction_batcher = PredictionBatcher(model_holder=model_holder, executor=inference_executor)
+
+# Feature columns expected by the JSON scoring endpoint
+schema_config = read_yaml_file(SCHEMA_FILE_PATH)
+feature_columns = [
+  name for column in schema_config["columns"] for name in column
+  if name != TARGET_COLUMN
+]
+
+@app.on_event("startup")
+async def load_serving_model():
+  model_holder.start()
+  await prediction_batcher.start()
+
+@app.on_event("shutdown")
+async def stop_serving_model():
+  await prediction_batcher.stop()
+  model_holder.stop()
+  training_jobs.shutdown()
+  inference_executor.shutdown(wait=False)
+  close_mongo_client()
+
 # Create get endpoint for the root path
 @app.get("/", tags=["authentication"])
 async def root():
@@ -54,33 +88,94 @@ async def root():
 @app.get("/train")
 async def train_model():
   try:
-    train_pipeline = TrainingPipeline()
-    train_pipeline.run_pipeline()
-    return Response("Training pipeline executed successfully!", status_code=200)
+    # Submit the pipeline as a background job, the new model is hot reloaded when it finishes
+    job = training_jobs.submit()
+    return JSONResponse(job.to_dict(), status_code=202)
+  except Exception as e:
+    raise NetworkSecurityException(e, sys)
+
+# Declared before /train/{job_id} so "online" is not taken for a job id
+@app.get("/train/online")
+async def train_online():
+  try:
+    # Incremental update from the records added since the last run, hot reloaded like a full retrain
+    job = training_jobs.submit(fn=run_online_training)
+    return JSONResponse(job.to_dict(), status_code=202)
   except Exception as e:
     raise NetworkSecurityException(e, sys)
 
+@app.get("/train/{job_id}")
+async def train_status(job_id: str):
+  job = training_jobs.get(job_id)
+  if job is None:
+    raise HTTPException(status_code=404, detail=f"Training job {job_id} not found")
+  return job.to_dict()
+
+@app.delete("/train/{job_id}")
+async def cancel_training(job_id: str):
+  job = training_jobs.cancel(job_id)
+  if job is None:
+    raise HTTPException(status_code=404, detail=f"Training job {job_id} not found")
+  return job.to_dict()
+
+@app.get("/model/status", tags=["prediction"])
+async def model_status():
+  return model_holder.status()
+
+def predict_uploaded_file(network_model, file: UploadFile, media_type: str) -> bytes:
+  '''
+  Scores an uploaded feature table and encodes only the prediction vector.
+  Runs on the inference executor to keep the event loop free.
+  '''
+  df = read_input_frame(file.file, content_type=file.content_type, filename=file.filename)
+  y_pred = network_model.predict(df)
+  return encode_predictions(y_pred, media_type)
+
+def predict_uploaded_csv(network_model, file: UploadFile) -> str:
+  '''
+  Scores an uploaded feature table, saves the output and renders it as an HTML table.
+  Runs on the inference executor to keep the event loop free.
+  '''
+  df = read_input_frame(file.file, content_type=file.content_type, filename=file.filename)
+  y_pred = network_model.predict(df)
+  df[MODEL_SERVING_PREDICTION_COLUMN] = y_pred
+  logging.debug(f"Scored {len(df)} uploaded rows")
+  
+  df.to_csv("prediction_output/output.csv")
+  return df.to_html(classes="table table-striped")
+
 @app.post("/predict", tags=["prediction"])
-async def predict(request: Request, file: UploadFile = File(...)):
+async def predict(request: Request, file: UploadFile = File(...),
+  stream: bool = False, chunk_size: int = MODEL_SERVING_CSV_CHUNK_SIZE):
+  # Content negotiation, binary, JSON and CSV formats return only the predicted column
+  # A stream is always the scored CSV, so anything accepted means CSV there
+  media_type = negotiate_media_type(request.headers.get("accept"), default=CSV_MEDIA_TYPE if stream else HTML_MEDIA_TYPE)
+  if media_type is None:
+    raise HTTPException(status_code=406, detail="Unsupported Accept media type")
+  if stream and media_type != CSV_MEDIA_TYPE:
+    raise HTTPException(status_code=406, detail=f"Streaming only returns {CSV_MEDIA_TYPE}, not {media_type}")
+  
   try:
-    df = pd.read_csv(file.file)
-    preprocessor = load_object("final_model/preprocessor.pkl")
-    model = load_object("final_model/model.pkl")
-    
-    network_model = NetworkModel(
-      preprocessor=preprocessor,
-      model=model
-    )
-    print(df.iloc[0])
-    y_pred = network_model.predict(df)
-    print(f"Prediction: {y_pred}")
+    network_model = model_holder.get_model()
     
-    df["predicted_column"] = y_pred
-    print(df["predicted_column"])
+    # Stream the scored CSV back chunk by chunk, without the HTML table
+    if stream:
+      return StreamingResponse(
+        predict_csv_in_chunks(network_model, file.file, chunk_size=chunk_size),
+        media_type=CSV_MEDIA_TYPE,
+        headers={"Content-Disposition": "attachment; filename=output.csv"}
+      )
     
-    df.to_csv("prediction_output/output.csv")
+    loop = asyncio.get_running_loop()
+    if media_type != HTML_MEDIA_TYPE:
+      body = await loop.run_in_executor(
+        inference_executor, predict_uploaded_file, network_model, file, media_type
+      )
+      return Response(body, media_type=media_type)
     
-    table_html = df.to_html(classes="table table-striped")
+    table_html = await loop.run_in_executor(
+      inference_executor, predict_uploaded_csv, network_model, file
+    )
     return templates.TemplateResponse(
       "index.html", 
       {
@@ -91,6 +186,19 @@ async def predict(request: Request, file: UploadFile = File(...)):
   except Exception as e:
     raise NetworkSecurityException(e, sys)
 
+@app.post("/predict/json", tags=["prediction"])
+async def predict_json(
+  records: Union[Dict[str, Optional[float]], List[Dict[str, Optional[float]]]] = Body(...)):
+  try:
+    # Accept a single record or a list of records, missing features are imputed
+    if isinstance(records, dict):
+      records = [records]
+    df = pd.DataFrame.from_records(records, columns=feature_columns)
+    y_pred = await prediction_batcher.predict(df)
+    return {MODEL_SERVING_PREDICTION_COLUMN: y_pred.tolist()}
+  except Exception as e:
+    raise NetworkSecurityException(e, sys)
+
 # Run the FastAPI application
 if __name__ == "__main__":
   app.run(
@@ -1,16 +1,7 @@
-from pymongo.mongo_client import MongoClient
-from dotenv import load_dotenv
+from src.cloud.mongo_client import get_mongo_client
 
-import os
-
-# Load the environment
-load_dotenv()
-
-# Create mongo db url
-MONGO_DB_URL = os.getenv("MONGO_DB_URI")
-
-# Create a new client and connect to the server
-client = MongoClient(MONGO_DB_URL)
+# Get the shared client, configured like the rest of the project
+client = get_mongo_client()
 
 # Send a ping to confirm a successful connection
 try:
@@ -0,0 +1,116 @@
+'''
+Shared MongoDB client provider.
+Every module gets its collections from one pooled client per process, created
+on first use, so DNS lookups, TLS handshakes and authentication happen once
+instead of on every pipeline stage. A pymongo client must not be used across
+fork, so a forked worker creates its own on first use.
+'''
+import os, sys
+import threading
+
+from dotenv import load_dotenv
+from src.exception.exception import NetworkSecurityException
+from src.logging.logger import logging
+from src.constant.training_pipeline import (
+  MONGO_CLIENT_APP_NAME,
+  MONGO_CLIENT_MAX_POOL_SIZE,
+  MONGO_CLIENT_MIN_POOL_SIZE,
+  MONGO_CLIENT_CONNECT_TIMEOUT_MS,
+  MONGO_CLIENT_SERVER_SELECTION_TIMEOUT_MS,
+  MONGO_CLIENT_SOCKET_TIMEOUT_MS,
+  MONGO_CLIENT_COMPRESSORS,
+  MONGO_CLIENT_READ_PREFERENCE
+)
+
+load_dotenv()
+MONGO_DB_URL = os.getenv("MONGO_DB_URI")
+
+_client = None
+_client_pid: int = None
+_client_lock = threading.Lock()
+
+# get_mongo_client_options function created to keep the settings of every connection the same
+def get_mongo_client_options(mongo_db_url: str = None) -> dict:
+  '''
+  Builds the MongoClient keyword arguments from the Mongo client constants.
+  TLS connections verify the server against the certifi CA bundle.
+  :param mongo_db_url: Connection string, MONGO_DB_URI by default
+  :return: Dictionary of MongoClient keyword arguments
+  '''
+  try:
+    mongo_db_url = mongo_db_url or MONGO_DB_URL or ""
+    options = {
+      "appname": MONGO_CLIENT_APP_NAME,
+      "maxPoolSize": MONGO_CLIENT_MAX_POOL_SIZE,
+      "minPoolSize": MONGO_CLIENT_MIN_POOL_SIZE,
+      "connectTimeoutMS": MONGO_CLIENT_CONNECT_TIMEOUT_MS,
+      "serverSelectionTimeoutMS": MONGO_CLIENT_SERVER_SELECTION_TIMEOUT_MS,
+      "socketTimeoutMS": MONGO_CLIENT_SOCKET_TIMEOUT_MS or None,
+      "readPreference": MONGO_CLIENT_READ_PREFERENCE,
+    }
+    if MONGO_CLIENT_COMPRESSORS:
+      options["compressors"] = MONGO_CLIENT_COMPRESSORS
+
+    # SRV connection strings imply TLS, a tlsCAFile would turn it on for plain local servers
+    lowered_url = mongo_db_url.lower()
+    if lowered_url.startswith("mongodb+srv://") or "tls=true" in lowered_url or "ssl=true" in lowered_url:
+      import certifi
+      options["tlsCAFile"] = certifi.where()
+    return options
+  except Exception as e:
+    raise NetworkSecurityException(e, sys)
+
+# get_mongo_client function created to share one connection pool per process
+def get_mongo_client():
+  '''
+  Returns the client of this process, connecting on first use.
+  A client inherited through fork is dropped, its sockets belong to the parent.
+  :return: pymongo MongoClient
+  '''
+  global _client, _client_pid
+  try:
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+      with _client_lock:
+        if _client is None or _client_pid != pid:
+          import pymongo
+          _client = pymongo.MongoClient(MONGO_DB_URL, **get_mongo_client_options())
+          _client_pid = pid
+          logging.info(f"Created the Mongo client of process {pid}, max pool size {MONGO_CLIENT_MAX_POOL_SIZE}")
+    return _client
+  except Exception as e:
+    raise NetworkSecurityException(e, sys)
+
+# get_mongo_collection function created to read a collection through the shared client
+def get_mongo_collection(database_name: str, collection_name: str):
+  '''
+  :param database_name: Name of the database
+  :param collection_name: Name of the collection
+  :return: pymongo Collection
+  '''
+  try:
+    return get_mongo_client()[database_name][collection_name]
+  except Exception as e:
+    raise NetworkSecurityException(e, sys)
+
+# close_mongo_client function created to release the pool on shutdown
+def close_mongo_client():
+  '''
+  Closes the client of this process, the next call to get_mongo_client reconnects.
+  '''
+  global _client, _client_pid
+  try:
+    with _client_lock:
+      if _client is not None and _client_pid == os.getpid():
+        _client.close()
+      _client, _client_pid = None, None
+  except Exception as e:
+    raise NetworkSecurityException(e, sys)
+
+def _reset_after_fork():
+  global _client, _client_pid, _client_lock
+  # The lock may have been held by another thread of the parent at fork time
+  _client, _client_pid, _client_lock = None, None, threading.Lock()
+
+if hasattr(os, "register_at_fork"):
+  os.register_at_fork(after_in_child=_reset_after_fork)
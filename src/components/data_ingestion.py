@@ -1,24 +1,25 @@
 import os
 import sys
+import time
 import pandas as pd
 import numpy as np
-import pymongo
 
 from src.exception.exception import NetworkSecurityException
 from src.logging.logger import logging
 
 from src.entity.config_entity import DataIngestionConfig
 from src.entity.artifact_entity import DataIngestionArtifact
+from src.constant.training_pipeline import SCHEMA_FILE_PATH
+from src.utils.main_utils.utils import read_yaml_file
+from src.utils.main_utils.columnar_buffer import ColumnarBuffer
+from src.utils.main_utils.feature_store import PartitionedFeatureStore
+from src.pipeline.dag_executor import DagExecutor
+from src.pipeline.training_jobs import create_executor
+from src.cloud.mongo_client import get_mongo_collection
 
 from typing import List
 from sklearn.model_selection import train_test_split
 
-# Import Mongo DB env
-from dotenv import load_dotenv
-load_dotenv()
-
-MONGO_DB_URL = os.getenv("MONGO_DB_URI")
-
 # Create data ingestion class
 class DataIngestion:
   '''
@@ -26,33 +27,282 @@ class DataIngestion:
   such as read data from db, transforming and split
   into train and test
   '''
-  def __init__(self, data_ingestion_config:DataIngestionConfig):
+  def __init__(self, data_ingestion_config:DataIngestionConfig, collection=None):
+    '''
+    :param data_ingestion_config: Data ingestion configuration
+    :param collection: Optional Mongo collection, connects with MONGO_DB_URI by default
+    '''
     try:
       self.data_ingestion_config = data_ingestion_config
+      self.collection = collection
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+  
+  def get_collection(self):
+    '''
+    Returns the source collection, connecting on first use.
+    '''
+    try:
+      if self.collection is None:
+        db_name = self.data_ingestion_config.database_name
+        collection_name = self.data_ingestion_config.collection_name
+        self.collection = get_mongo_collection(db_name, collection_name)
+      return self.collection
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+  
+  def get_content_signal(self) -> str:
+    '''
+    Summarizes the content of the source collection, to notice documents updated in place.
+    Uses the server's dbHash of the collection, or the latest updated_at_field
+    value where dbHash is not allowed. With neither, in-place updates go
+    unnoticed and STAGE_CACHE_ENABLED=false forces a fresh export.
+    :return: Hash or timestamp string, None if no content signal is available
+    '''
+    try:
+      collection = self.get_collection()
+      try:
+        result = collection.database.command("dbHash", collections=[collection.name])
+        return result["collections"].get(collection.name)
+      except Exception as error:
+        logging.info(f"dbHash is not available on {collection.name}, falling back to {self.data_ingestion_config.updated_at_field}: {error}")
+
+      updated_at_field = self.data_ingestion_config.updated_at_field
+      last_updated = collection.find_one(
+        {updated_at_field: {"$exists": True}}, projection={updated_at_field: 1}, sort=[(updated_at_field, -1)]
+      )
+      if last_updated is None:
+        logging.info(f"No content signal for {collection.name}, documents updated in place are not detected")
+        return None
+      return str(last_updated[updated_at_field])
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+
+  def get_source_fingerprint(self) -> tuple:
+    '''
+    Summarizes the source collection without exporting it.
+    ObjectIds grow with insertion time, so the document count and the
+    largest _id change whenever documents are added or removed, and the
+    content signal changes when documents are updated in place.
+    :return: Tuple of the document count, the largest _id and the content signal
+    '''
+    try:
+      collection = self.get_collection()
+      n_documents = collection.count_documents({})
+      last_document = collection.find_one({}, projection={"_id": 1}, sort=[("_id", -1)])
+      return n_documents, str(last_document["_id"]) if last_document else None, self.get_content_signal()
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+  
+  @staticmethod
+  def get_schema_columns() -> List[str]:
+    '''
+    Returns the column names of the schema, in schema order.
+    '''
+    try:
+      return [name for column in read_yaml_file(SCHEMA_FILE_PATH)["columns"] for name in column]
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+  
+  def get_range_boundaries(self, query: dict, n_partitions: int) -> list:
+    '''
+    Places _id boundaries that split the matching documents into ranges of similar size.
+    :param query: Filter of the documents to split
+    :param n_partitions: Number of ranges wanted
+    :return: Sorted ObjectIds, one less than the number of ranges, fewer for small collections
+    '''
+    try:
+      n_samples = n_partitions * self.data_ingestion_config.export_samples_per_partition
+      sample = self.get_collection().aggregate([
+        {"$match": query},
+        {"$sample": {"size": n_samples}},
+        {"$project": {"_id": 1}},
+      ])
+      sample_ids = sorted(document["_id"] for document in sample)
+      boundaries = [sample_ids[len(sample_ids) * i // n_partitions] for i in range(1, n_partitions)] if sample_ids else []
+      return sorted(set(boundaries))
     except Exception as e:
       raise NetworkSecurityException(e, sys)
   
-  def export_collection_as_df(self):
+  def read_range(self, buffer: ColumnarBuffer, query: dict, start: int, limit: int = 0) -> tuple:
+    '''
+    Decodes the documents matching the query into the buffer, in _id order.
+    :param buffer: ColumnarBuffer shared by every range
+    :param query: Filter of the range
+    :param start: Buffer row of the range's first document
+    :param limit: Rows reserved for the range, 0 lets the buffer grow instead
+    :return: Tuple of the number of rows read and the _id of the last document, None if empty
+    '''
     try:
-      # Initiate db and collection name
-      db_name = self.data_ingestion_config.database_name
-      collection_name = self.data_ingestion_config.collection_name
+      columns = buffer.columns
+      batch_size = self.data_ingestion_config.export_batch_size
+      cursor = self.get_collection().find(query, projection={column: 1 for column in columns}, batch_size=batch_size)
+      cursor = cursor.sort("_id", 1).limit(limit)
       
-      # Create mongo db collection
-      self.mongo_client = pymongo.MongoClient(MONGO_DB_URL)
-      collection = self.mongo_client[db_name][collection_name]
+      n_rows, rows, last_object_id = 0, [], None
+      for document in cursor:
+        rows.append(tuple(map(document.get, columns)))
+        if len(rows) == batch_size:
+          last_object_id = str(document["_id"])
+          n_rows += buffer.write(start + n_rows, rows)
+          rows = []
+      if rows:
+        last_object_id = str(document["_id"])
+      n_rows += buffer.write(start + n_rows, rows)
+      return n_rows, last_object_id
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+  
+  def export_documents_after(self, watermark: str = None) -> tuple:
+    '''
+    Streams the documents with an _id above the watermark into int8 column
+    arrays, a column holding "na" or any other non int8 value is kept as
+    float32 with NaN instead. Only the schema columns are fetched and
+    documents are decoded one cursor batch at a time, so no DataFrame of
+    Python objects is ever built.
+    With more than one export partition the documents are split into _id
+    ranges, each read by its own thread into its own rows of the buffer.
+    :param watermark: ObjectId hex string, None exports the whole collection
+    :return: Tuple of the DataFrame of the schema columns and the _id of its last document
+    '''
+    try:
+      from bson import ObjectId
       
-      # Convert to dataframe
-      df = pd.DataFrame(list(collection.find()))
-      if "_id" in df.columns.to_list(): # Drop _id column
-        df = df.drop(columns=["_id"], axis=1)
+      columns = self.get_schema_columns()
+      collection = self.get_collection()
+      query = {"_id": {"$gt": ObjectId(watermark)}} if watermark else {}
+      n_partitions = self.data_ingestion_config.export_partitions
       
-      # Replace the na value into NaN
-      df.replace({"na": np.nan}, inplace=True)
+      if n_partitions <= 1:
+        # Preallocate from the current count, the buffer grows if documents arrive meanwhile
+        buffer = ColumnarBuffer(columns, collection.count_documents(query))
+        n_rows, last_object_id = self.read_range(buffer, query, 0)
+        logging.info(f"Exported {n_rows} documents after {watermark}")
+        return buffer.to_frame(n_rows), last_object_id or watermark
+      
+      # Documents inserted during the export are left for the next run
+      last_document = collection.find_one(query, projection={"_id": 1}, sort=[("_id", -1)])
+      if last_document is None:
+        return ColumnarBuffer(columns, 0).to_frame(0), watermark
+      bounds = [None, *self.get_range_boundaries(query, n_partitions), last_document["_id"]]
+      range_queries = []
+      for i in range(len(bounds) - 1):
+        id_range = dict(query.get("_id", {}))
+        if bounds[i] is not None:
+          id_range["$gte"] = bounds[i]
+        id_range["$lte" if i == len(bounds) - 2 else "$lt"] = bounds[i + 1]
+        range_queries.append({"_id": id_range})
+      
+      # Per-range counts place every range at its own rows of one shared buffer
+      counts = [collection.count_documents(range_query) for range_query in range_queries]
+      offsets = np.concatenate([[0], np.cumsum(counts)[:-1]]).astype(int)
+      buffer = ColumnarBuffer(columns, sum(counts))
+      
+      def read_timed_range(i):
+        start_time = time.perf_counter()
+        n_rows, last_object_id = self.read_range(buffer, range_queries[i], offsets[i], counts[i])
+        seconds = time.perf_counter() - start_time
+        logging.info(
+          f"Export partition {i}: {n_rows} of {counts[i]} documents in {seconds:.2f}s "
+          f"({n_rows / max(seconds, 1e-9):,.0f} documents/s)"
+        )
+        return n_rows, last_object_id
+      
+      start_time = time.perf_counter()
+      executor = create_executor("thread", len(range_queries))
+      try:
+        results = list(executor.map(read_timed_range, range(len(range_queries))))
+      finally:
+        executor.shutdown(wait=True)
+      n_rows = sum(n for n, _ in results)
+      
+      # Documents deleted since counting leave gaps at the end of their range
+      if n_rows < buffer.capacity:
+        buffer.take(np.concatenate([np.arange(offset, offset + n) for offset, (n, _) in zip(offsets, results)]))
+      last_object_id = next((object_id for _, object_id in reversed(results) if object_id), watermark)
+      logging.info(
+        f"Exported {n_rows} documents after {watermark} from {len(range_queries)} partitions "
+        f"in {time.perf_counter() - start_time:.2f}s"
+      )
+      return buffer.to_frame(n_rows), last_object_id
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+  
+  def export_collection_as_df(self) -> pd.DataFrame:
+    '''
+    Exports the whole collection.
+    :return: DataFrame of the schema columns
+    '''
+    try:
+      df, _ = self.export_documents_after(None)
       return df
     except Exception as e:
       raise NetworkSecurityException(e, sys)
   
+  def get_feature_store(self) -> PartitionedFeatureStore:
+    '''
+    Returns the feature store shared by all runs.
+    '''
+    try:
+      return PartitionedFeatureStore(
+        self.data_ingestion_config.feature_store_partitions_dir,
+        self.data_ingestion_config.feature_store_manifest_file_name
+      )
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+  
+  def feature_store_matches_source(self, manifest: dict, first_object_id: str) -> bool:
+    '''
+    Checks that the feature store still describes the start of the collection.
+    A reloaded collection has a new first _id, and deleted documents or ones
+    inserted below the watermark change the count of documents up to it.
+    :param manifest: Manifest of a non-empty feature store
+    :param first_object_id: ObjectId hex string of the first document of the collection
+    :return: True if the store can be extended with the documents after its watermark
+    '''
+    try:
+      from bson import ObjectId
+      
+      n_stored = sum(partition["n_rows"] for partition in manifest["partitions"])
+      n_source = self.get_collection().count_documents({"_id": {"$lte": ObjectId(manifest["watermark"])}})
+      if manifest.get("first_object_id") != first_object_id or n_source != n_stored:
+        logging.info(
+          f"Feature store no longer matches the collection: first _id {manifest.get('first_object_id')} "
+          f"vs {first_object_id}, {n_stored} stored vs {n_source} documents up to the watermark"
+        )
+        return False
+      return True
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+  
+  def ingest_new_documents(self) -> pd.DataFrame:
+    '''
+    Appends the documents added since the last ingestion to the feature store
+    and returns the whole store. Mongo only serves the new documents, the
+    earlier ones are read back from the local partitions.
+    The store is rebuilt from the whole collection when it no longer matches
+    it, after a reload, a deletion or an insert below the watermark. Updates
+    in place of stored documents are not picked up.
+    :return: DataFrame of every document ingested so far
+    '''
+    try:
+      feature_store = self.get_feature_store()
+      manifest = feature_store.read_manifest()
+      first_document = self.get_collection().find_one({}, projection={"_id": 1}, sort=[("_id", 1)])
+      first_object_id = str(first_document["_id"]) if first_document else None
+      if manifest["watermark"] is not None and not self.feature_store_matches_source(manifest, first_object_id):
+        feature_store.reset()
+      
+      watermark = feature_store.watermark
+      df, last_object_id = self.export_documents_after(watermark)
+      if len(df):
+        feature_store.append(df, last_object_id, first_object_id)
+      else:
+        logging.info(f"No new documents after watermark {watermark}")
+      return feature_store.read()
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+  
   def export_feature_score(self, df: pd.DataFrame):
     try:
       feature_store_file_path = self.data_ingestion_config.feature_store_file_path
@@ -98,14 +348,18 @@ class DataIngestion:
   
   def initiate_data_ingestion(self):
     try:
-      # Initiate the df
-      df = self.export_collection_as_df()
-      
-      # Export data to feature store
-      df = self.export_feature_score(df)
-      
-      # Data preprocessing
-      self.split_data_to_train_test(df)
+      dag = DagExecutor("data_ingestion")
+      if self.data_ingestion_config.incremental:
+        # The partitioned feature store replaces the per-run CSV export
+        dag.add_task("ingest_new_documents", self.ingest_new_documents)
+        dag.add_task("split_train_test", self.split_data_to_train_test, ("ingest_new_documents",))
+      else:
+        # The feature store write and the train/test split both only need the export
+        dag.add_task("export_collection", self.export_collection_as_df)
+        dag.add_task("export_feature_store", self.export_feature_score, ("export_collection",))
+        dag.add_task("split_train_test", self.split_data_to_train_test, ("export_collection",))
+      dag.run()
+      self.dag_report = dag.timings_report()
       
       # Create data ingestion artifact
       data_ingestion_artifact = DataIngestionArtifact(
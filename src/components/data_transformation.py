@@ -7,7 +7,6 @@ import sys, os
 import numpy as np
 import pandas as pd
 
-from sklearn.impute import KNNImputer
 from sklearn.pipeline import Pipeline
 from src.constant.training_pipeline import (
   TARGET_COLUMN, DATA_TRANSFORMATION_IMPUTER_PARAMS
@@ -18,7 +17,9 @@ from src.entity.artifact_entity import (
 from src.entity.config_entity import DataTransformationConfig
 from src.exception.exception import NetworkSecurityException
 from src.logging.logger import logging
-from src.utils.main_utils.utils import save_numpy_array, save_object
+from src.utils.main_utils.utils import save_numpy_array, save_object, compact_array
+from src.utils.ml_utils.preprocessing.imputer import MissingAwareKNNImputer
+from src.pipeline.dag_executor import DagExecutor
 
 class DataTransformation:
   def __init__(self, data_validation_artifact: DataValidationArtifact,
@@ -42,59 +43,90 @@ class DataTransformation:
     except Exception as e:
       raise NetworkSecurityException(e, sys)
   
+  @classmethod
   def get_data_transformer_object(cls) -> Pipeline:
     '''
     Creates a data transformation pipeline with KNN imputer.
+    Complete rows pass through untouched, rows with missing values are imputed
+    against neighbor indexes built at fit time and saved with the pipeline.
     :return: A scikit-learn Pipeline object for data transformation
     '''
     logging.info("Creating data transformation pipeline with KNN imputer")
     try:
-      imputer:KNNImputer = KNNImputer(**DATA_TRANSFORMATION_IMPUTER_PARAMS)
+      imputer:MissingAwareKNNImputer = MissingAwareKNNImputer(**DATA_TRANSFORMATION_IMPUTER_PARAMS)
       processor:Pipeline = Pipeline([("imputer", imputer)])
       return processor
     except Exception as e:
       raise NetworkSecurityException(e, sys)
   
+  @staticmethod
+  def split_features_and_target(df: pd.DataFrame):
+    '''
+    Splits a DataFrame into the input features and the target mapped to {0, 1}.
+    :param df: DataFrame holding the target column
+    :return: Tuple of the input features DataFrame and the target Series
+    '''
+    try:
+      input_features_df = df.drop(columns=[TARGET_COLUMN])
+      target_feature_df = df[TARGET_COLUMN].replace(-1, 0)
+      return input_features_df, target_feature_df
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+  
+  @staticmethod
+  def transform_features_and_target(preprocessor_obj: Pipeline, features_and_target) -> tuple:
+    '''
+    Transforms the input features and casts both arrays to their compact dtype.
+    Features stay int8 unless imputation produced fractional values, then float32.
+    :param preprocessor_obj: Fitted preprocessing pipeline
+    :param features_and_target: Tuple of the input features DataFrame and the target Series
+    :return: Tuple of the transformed features array and the target array
+    '''
+    try:
+      input_features_df, target_feature_df = features_and_target
+      transformed_input_feature = compact_array(preprocessor_obj.transform(input_features_df))
+      return transformed_input_feature, compact_array(target_feature_df.to_numpy())
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+  
   def initiate_data_transformation(self) -> DataTransformationArtifact:
     logging.info("Initiating data transformation")
     try:
-      # Load the validated train and test data
-      logging.info("Loading validated train and test data")
-      train_df = self.read_data(self.data_validation_artifact.valid_train_file_path)
-      test_df = self.read_data(self.data_validation_artifact. valid_test_file_path)
-      logging.info("Data loaded successfully")
-      
-      # Training dataframe
-      input_features_train_df = train_df.drop(columns=[TARGET_COLUMN], axis=1)
-      target_feature_train_df = train_df[TARGET_COLUMN]
-      target_feature_train_df = target_feature_train_df.replace(-1, 0)
-      
-      # Testing dataframe
-      input_features_test_df = test_df.drop(columns=[TARGET_COLUMN], axis=1)
-      target_feature_test_df = test_df[TARGET_COLUMN]
-      target_feature_test_df = target_feature_test_df.replace(-1, 0)
-      
-      # Create the data transformation pipeline
-      preprocessor = self.get_data_transformer_object()
-      preprocessor_obj = preprocessor.fit(input_features_train_df)
-      transformed_input_train_feature = preprocessor_obj.transform(input_features_train_df)
-      tranformed_input_test_feature = preprocessor_obj.transform(input_features_test_df)
+      config = self.data_transformation_config
       
-      # Create the array
-      train_arr = np.c_[transformed_input_train_feature, target_feature_train_df]
-      test_arr = np.c_[tranformed_input_test_feature, target_feature_test_df]
+      # Train and test are read, transformed and saved side by side, only the fit is shared
+      dag = DagExecutor("data_transformation")
+      dag.add_task("read_train", lambda: self.read_data(self.data_validation_artifact.valid_train_file_path))
+      dag.add_task("read_test", lambda: self.read_data(self.data_validation_artifact.valid_test_file_path))
+      dag.add_task("split_train", self.split_features_and_target, ("read_train",))
+      dag.add_task("split_test", self.split_features_and_target, ("read_test",))
+      dag.add_task("fit_preprocessor", lambda train: self.get_data_transformer_object().fit(train[0]), ("split_train",))
+      dag.add_task("transform_train", self.transform_features_and_target, ("fit_preprocessor", "split_train"))
+      dag.add_task("transform_test", self.transform_features_and_target, ("fit_preprocessor", "split_test"))
       
-      # Save the transformed data
-      save_numpy_array(self.data_transformation_config.transformed_train_file_path, array=train_arr)
-      save_numpy_array(self.data_transformation_config.transformed_test_file_path, array=test_arr)
-      save_object(self.data_transformation_config.transformed_object_file_path, obj=preprocessor_obj)
-      save_object("final_model/preprocessor.pkl", preprocessor_obj)
+      # Save the transformed features and targets to separate files, so they can be memory-mapped
+      dag.add_task("save_train", lambda train: (
+        save_numpy_array(config.transformed_train_file_path, array=train[0]),
+        save_numpy_array(config.transformed_train_target_file_path, array=train[1])
+      ), ("transform_train",))
+      dag.add_task("save_test", lambda test: (
+        save_numpy_array(config.transformed_test_file_path, array=test[0]),
+        save_numpy_array(config.transformed_test_target_file_path, array=test[1])
+      ), ("transform_test",))
+      # Serving gets the preprocessor from the model trainer, together with the model it was trained with
+      dag.add_task("save_preprocessor", lambda preprocessor_obj: (
+        save_object(config.transformed_object_file_path, obj=preprocessor_obj)
+      ), ("fit_preprocessor",))
+      dag.run()
+      self.dag_report = dag.timings_report()
       
       # Prepare the data transformation artifact
       data_transformation_artifact = DataTransformationArtifact(
         transformed_object_file_path=self.data_transformation_config.transformed_object_file_path,
         transformed_train_file_path=self.data_transformation_config.transformed_train_file_path,
-        transformed_test_file_path=self.data_transformation_config.transformed_test_file_path
+        transformed_test_file_path=self.data_transformation_config.transformed_test_file_path,
+        transformed_train_target_file_path=self.data_transformation_config.transformed_train_target_file_path,
+        transformed_test_target_file_path=self.data_transformation_config.transformed_test_target_file_path
       )
       return data_transformation_artifact
     except Exception as e:
@@ -8,6 +8,7 @@ from src.exception.exception import NetworkSecurityException
 from src.logging.logger import logging
 from src.constant.training_pipeline import SCHEMA_FILE_PATH
 from src.utils.main_utils.utils import read_yaml_file, write_yaml_file
+from src.pipeline.dag_executor import DagExecutor
 
 from scipy.stats import ks_2samp
 
@@ -106,12 +107,27 @@ class DataValidation:
           "p_value": float(is_sample_dist.pvalue),
           "drift_status": is_found,
         }})
-        drift_report_file_path = self.data_validation_config.drift_repost_dir
-        
-        # Create directory if it does not exist
-        dir_path = os.path.dirname(drift_report_file_path)
-        os.makedirs(dir_path, exist_ok=True)
-        write_yaml_file(file_path=drift_report_file_path, content=report)
+      drift_report_file_path = self.data_validation_config.drift_repost_dir
+      
+      # Create directory if it does not exist
+      dir_path = os.path.dirname(drift_report_file_path)
+      os.makedirs(dir_path, exist_ok=True)
+      write_yaml_file(file_path=drift_report_file_path, content=report)
+      return status
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+  
+  def validate_schema(self, df: pd.DataFrame) -> bool:
+    '''
+    Validates the number and the names of the columns of a DataFrame.
+    :param df: DataFrame to validate
+    :return: True if the DataFrame matches the schema
+    '''
+    try:
+      status = self.validate_nums_of_cols(df) and self.validate_column_names(df)
+      if not status:
+        logging.info(f"Dataframe does not contain all the columns as per schema")
+      return status
     except Exception as e:
       raise NetworkSecurityException(e, sys)
   
@@ -126,45 +142,27 @@ class DataValidation:
       train_file_path = self.data_ingestion_artifact.trained_file_path
       test_file_path = self.data_ingestion_artifact.test_file_path
       
-      # Read the data from train and test files
-      train_df = DataValidation.read_data(train_file_path)
-      test_df = DataValidation.read_data(test_file_path)
-      
-      # Validate the number of columns in train and test dataframes
-      status = self.validate_nums_of_cols(train_df)
-      if not status:
-        error_msg = f"Train dataframe does not contain all the columns"
-      
-      status = self.validate_nums_of_cols(test_df)
-      if not status:
-        error_msg = f"Test dataframe does not contain all the columns"
-      
-      # Validate the column names in train and test dataframes
-      status = self.validate_column_names(train_df)
-      if not status:
-        error_msg = f"Train dataframe does not contain all the columns as per schema"
-      
-      status = self.validate_column_names(test_df)
-      if not status:
-        error_msg = f"Test dataframe does not contain all the columns as per schema"
-      
-      # Check data drift using Kolmogorov-Smirnov test
-      status = self.detect_data_drift(base_df=train_df, current_df=test_df)
       dir_path = os.path.dirname(self.data_validation_config.valid_train_file_path)
       os.makedirs(dir_path, exist_ok=True)
       
-      # Convert train and test DataFrames to CSV files
-      train_df.to_csv(
-        self.data_validation_config.valid_train_file_path,
-        index=False,
-        header=True
-        )
+      # Schema checks, the drift report and the CSV writes only depend on the data they read
+      dag = DagExecutor("data_validation")
+      dag.add_task("read_train", lambda: DataValidation.read_data(train_file_path))
+      dag.add_task("read_test", lambda: DataValidation.read_data(test_file_path))
+      dag.add_task("validate_train_schema", self.validate_schema, ("read_train",))
+      dag.add_task("validate_test_schema", self.validate_schema, ("read_test",))
+      dag.add_task("detect_data_drift", self.detect_data_drift, ("read_train", "read_test"))
+      dag.add_task("write_valid_train", lambda train_df: train_df.to_csv(
+        self.data_validation_config.valid_train_file_path, index=False, header=True
+      ), ("read_train",))
+      dag.add_task("write_valid_test", lambda test_df: test_df.to_csv(
+        self.data_validation_config.valid_test_file_path, index=False, header=True
+      ), ("read_test",))
+      results = dag.run()
+      self.dag_report = dag.timings_report()
       
-      test_df.to_csv(
-        self.data_validation_config.valid_test_file_path,
-        index=False,
-        header=True
-      )
+      # Check data drift using Kolmogorov-Smirnov test
+      status = results["detect_data_drift"]
       
       # Create data validation artifact
       data_validation_artifact = DataValidationArtifact(
@@ -3,29 +3,34 @@ Model Trainer Component
 This component is responsible for training the model using the preprocessed data.
 '''
 import os, sys
-import mlflow
 
 from src.exception.exception import NetworkSecurityException
 from src.logging.logger import logging
 
+from src.constant.training_pipeline import MODEL_SERVING_MODEL_FILE_PATH, MODEL_SERVING_PREPROCESSOR_FILE_PATH
 from src.entity.config_entity import ModelTrainerConfig
 from src.entity.artifact_entity import DataTransformationArtifact, ModelTrainerArtifact
 
 from src.utils.main_utils.utils import (
   save_object,
+  save_objects_together,
   load_object,
-  load_numpy_array_data,
+  load_features_and_target,
   evaluate_models
 )
 from src.utils.ml_utils.metric.classification_metric import get_classification_score
 from src.utils.ml_utils.model.estimator import NetworkModel
+from src.utils.ml_utils.model.mlflow_sink import MLflowTrackingSink
+from src.utils.ml_utils.preprocessing.ternary_encoder import TernaryEncoder
 
 from sklearn.linear_model import LogisticRegression
 from sklearn.ensemble import (
   RandomForestClassifier,
   GradientBoostingClassifier,
-  AdaBoostClassifier
+  AdaBoostClassifier,
+  HistGradientBoostingClassifier
 )
+from sklearn.pipeline import Pipeline
 from sklearn.neighbors import KNeighborsClassifier
 from sklearn.tree import DecisionTreeClassifier
 from sklearn.metrics import r2_score
@@ -44,29 +49,101 @@ class ModelTrainer:
     except Exception as e:
       raise NetworkSecurityException(e, sys)
   
-  def track_mlflow(self, best_model, classification_metric):
+  def track_mlflow(self, tracking: MLflowTrackingSink, best_model_name: str, best_model,
+    classification_train_metric, classification_test_metric, model_report: dict, search_results: list):
     '''
-    Tracks the model and its metrics using MLFlow.
-    :param model: The trained machine learning model
-    :param classification_metric: The classification metrics of the model
+    Queues the run's metrics, the search candidates and the model on the MLflow sink.
+    :param tracking: Open MLflowTrackingSink of this training run
+    :param best_model_name: Name of the selected model
+    :param best_model: The trained machine learning model
+    :param classification_train_metric: The classification metrics on the training set
+    :param classification_test_metric: The classification metrics on the test set
+    :param model_report: Dictionary of model name to test score of its best candidate
+    :param search_results: Scored candidates reported by evaluate_models
     :raises NetworkSecurityException: If there is an error during tracking
     '''
     try:
-      with mlflow.start_run():
-        # Initialize the MLFlow run
-        f1_score = classification_metric.f1_score
-        precision_score = classification_metric.precision_score
-        recall_score = classification_metric.recall_score
-        
-        # Log the model and its parameters
-        mlflow.log_metric("f1_score", f1_score)
-        mlflow.log_metric("precision_score", precision_score)
-        mlflow.log_metric("recall_score", recall_score)
-        
-        mlflow.sklearn.log_model(best_model, "model")
+      tracking.log_params({
+        "best_model": best_model_name,
+        "search_strategy": self.model_trainer_config.search_strategy,
+        "cv_folds": self.model_trainer_config.cv_folds,
+        **{f"best.{name}": value for name, value in best_model.get_params(deep=False).items()},
+      })
+      for prefix, classification_metric in (("train", classification_train_metric), ("test", classification_test_metric)):
+        tracking.log_metrics({
+          f"{prefix}_f1_score": classification_metric.f1_score,
+          f"{prefix}_precision_score": classification_metric.precision_score,
+          f"{prefix}_recall_score": classification_metric.recall_score,
+        })
+      tracking.log_metrics({f"test_score.{model_name}": score for model_name, score in model_report.items()})
+      
+      for result in search_results:
+        tracking.log_candidate(
+          run_name=f"{result['model_name']} rung {result['rung']}",
+          params=result["params"],
+          metrics={
+            name: result[name] for name in ("mean_cv_score", "fit_seconds", "train_fraction", "rank")
+            if result[name] is not None
+          },
+          tags={"model_name": result["model_name"], "rung": str(result["rung"])}
+        )
+      tracking.log_model(best_model, "model")
     except Exception as e:
       raise NetworkSecurityException(e, sys)
   
+  @staticmethod
+  def get_candidate_models(n_features: int):
+    '''
+    Returns the candidate models and their hyperparameter grids.
+    :param n_features: Number of input features, every one of them is ternary
+    :return: Tuple of the models dictionary and the parameter grids dictionary
+    '''
+    # Histogram boosting on int8 category codes, each feature has only three bins
+    ternary_boosting = Pipeline([
+      ("encoder", TernaryEncoder()),
+      ("model", HistGradientBoostingClassifier(categorical_features=list(range(n_features)))),
+    ])
+    # Initialize the models and their parameters
+    models = {
+      "Random Forest": RandomForestClassifier(verbose=1),
+      "Decision Tree": DecisionTreeClassifier(),
+      "Gradient Boosting": GradientBoostingClassifier(verbose=1),
+      "Logistic Regression": LogisticRegression(verbose=1),
+      "AdaBoost": AdaBoostClassifier(),
+      "Ternary Hist Gradient Boosting": ternary_boosting,
+    }
+    params= {
+      "Decision Tree": {
+        'criterion':['gini', 'entropy', 'log_loss'],
+        # 'splitter':['best','random'],
+        # 'max_features':['sqrt','log2'],
+      },
+      "Random Forest":{
+        # 'criterion':['gini', 'entropy', 'log_loss'],
+        # 'max_features':['sqrt','log2',None],
+        'n_estimators': [8,16,32,128,256]
+      },
+      "Gradient Boosting":{
+        # 'loss':['log_loss', 'exponential'],
+        'learning_rate':[.1,.01,.05,.001],
+        'subsample':[0.6,0.7,0.75,0.85,0.9],
+        # 'criterion':['squared_error', 'friedman_mse'],
+        # 'max_features':['auto','sqrt','log2'],
+        'n_estimators': [8,16,32,64,128,256]
+      }, 
+      "Logistic Regression":{},
+      "AdaBoost":{
+        'learning_rate':[.1,.01,.001],
+        'n_estimators': [8,16,32,64,128,256]
+      },
+      "Ternary Hist Gradient Boosting":{
+        'model__learning_rate':[.05,.1,.2],
+        'model__max_iter': [100,200],
+        'model__max_leaf_nodes': [15,31]
+      }
+    }
+    return models, params
+  
   def train_model(self, x_train, y_train, x_test, y_test):
     '''
     Trains the machine learning model using the training data.
@@ -77,44 +154,23 @@ class ModelTrainer:
     :return: Trained model
     '''
     try:
-      # Initialize the models and their parameters
-      models = {
-        "Random Forest": RandomForestClassifier(verbose=1),
-        "Decision Tree": DecisionTreeClassifier(),
-        "Gradient Boosting": GradientBoostingClassifier(verbose=1),
-        "Logistic Regression": LogisticRegression(verbose=1),
-        "AdaBoost": AdaBoostClassifier(),
-      }
-      params= {
-        "Decision Tree": {
-          'criterion':['gini', 'entropy', 'log_loss'],
-          # 'splitter':['best','random'],
-          # 'max_features':['sqrt','log2'],
-        },
-        "Random Forest":{
-          # 'criterion':['gini', 'entropy', 'log_loss'],
-          # 'max_features':['sqrt','log2',None],
-          'n_estimators': [8,16,32,128,256]
-        },
-        "Gradient Boosting":{
-          # 'loss':['log_loss', 'exponential'],
-          'learning_rate':[.1,.01,.05,.001],
-          'subsample':[0.6,0.7,0.75,0.85,0.9],
-          # 'criterion':['squared_error', 'friedman_mse'],
-          # 'max_features':['auto','sqrt','log2'],
-          'n_estimators': [8,16,32,64,128,256]
-        }, 
-        "Logistic Regression":{},
-        "AdaBoost":{
-          'learning_rate':[.1,.01,.001],
-          'n_estimators': [8,16,32,64,128,256]
-        }
-      }
+      models, params = ModelTrainer.get_candidate_models(n_features=x_train.shape[1])
+      
       # Initialize the best model and its score
+      search_results = []
       model_report: dict = evaluate_models(
         X_train=x_train, y_train=y_train, 
         X_test=x_test, y_test=y_test,
-        models=models, param=params
+        models=models, param=params,
+        cv=self.model_trainer_config.cv_folds,
+        n_jobs=self.model_trainer_config.n_jobs,
+        search_strategy=self.model_trainer_config.search_strategy,
+        halving_factor=self.model_trainer_config.halving_factor,
+        min_samples=self.model_trainer_config.halving_min_samples,
+        time_budget_seconds=self.model_trainer_config.search_time_budget_seconds,
+        cache_dir=self.model_trainer_config.cv_cache_dir,
+        cache_max_bytes=self.model_trainer_config.cv_cache_max_bytes,
+        search_results=search_results
       )
       
       # Get the best model based on the report
@@ -126,14 +182,22 @@ class ModelTrainer:
       y_train_pred = best_model.predict(x_train)
       classification_train_metric = get_classification_score(y_true=y_train, y_pred=y_train_pred)
       
-      # Function to track MLFlow metrics
-      self.track_mlflow(best_model, classification_train_metric)
-      
       # Predict on the test set using the best model
       y_test_pred = best_model.predict(x_test)
       classification_test_metric = get_classification_score(y_true=y_test, y_pred=y_test_pred)
       
-      self.track_mlflow(best_model=best_model, classification_metric=classification_test_metric)
+      # Queue the tracking records, a background thread writes them and uploads the model once
+      tracking = MLflowTrackingSink(
+        experiment_name=self.model_trainer_config.mlflow_experiment_name,
+        tracking_uri=self.model_trainer_config.mlflow_tracking_uri,
+        run_name=best_model_name
+      )
+      self.track_mlflow(
+        tracking, best_model_name, best_model,
+        classification_train_metric, classification_test_metric,
+        model_report, search_results
+      )
+      tracking.close(wait=self.model_trainer_config.mlflow_wait_for_upload)
       
       # Load the preprocessor from the data transformation artifact
       preprocessor = load_object(file_path=self.data_transformation_artifact.transformed_object_file_path)
@@ -149,8 +213,11 @@ class ModelTrainer:
         obj=network_model
       )
       
-      # Save the best model to a specific directory
-      save_object("final_model/model.pkl", best_model)
+      # Publish the preprocessor and the best model together, the model file is the serving version
+      save_objects_together([
+        (MODEL_SERVING_PREPROCESSOR_FILE_PATH, preprocessor),
+        (MODEL_SERVING_MODEL_FILE_PATH, best_model)
+      ])
       
       # ModelTrainerArtifact to store the trained model and metrics
       model_trainer_artifact = ModelTrainerArtifact(
@@ -170,17 +237,14 @@ class ModelTrainer:
     :return: ModelTrainerArtifact containing the trained model and metrics
     '''
     try:
-      train_file_path = self.data_transformation_artifact.transformed_train_file_path
-      test_file_path = self.data_transformation_artifact.transformed_test_file_path
-      
-      # Load the preprocessed training and testing data
-      train_arr = load_numpy_array_data(file_path=train_file_path)
-      test_arr = load_numpy_array_data(file_path=test_file_path)
+      artifact = self.data_transformation_artifact
       
-      # Split the data into features and labels
-      x_train, y_train, x_test, y_test = (
-        train_arr[:, :-1], train_arr[:, -1],
-        test_arr[:, :-1], test_arr[:, -1]
+      # Memory-map the preprocessed features and labels, slices read pages on demand
+      x_train, y_train = load_features_and_target(
+        artifact.transformed_train_file_path, artifact.transformed_train_target_file_path
+      )
+      x_test, y_test = load_features_and_target(
+        artifact.transformed_test_file_path, artifact.transformed_test_target_file_path
       )
       
       # Create a model instance
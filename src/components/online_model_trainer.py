@@ -0,0 +1,233 @@
+'''
+Online Model Trainer Component
+This component updates a partial_fit model with the records added to the
+collection since the last run, without a full retrain.
+'''
+import os, sys
+import numpy as np
+import pandas as pd
+
+from src.exception.exception import NetworkSecurityException, TrainingCancelledError
+from src.logging.logger import logging
+
+from src.constant.training_pipeline import TARGET_COLUMN
+from src.entity.config_entity import OnlineModelTrainerConfig
+from src.entity.artifact_entity import OnlineModelTrainerArtifact, ClassificationMetricArtifact
+
+from src.utils.main_utils.utils import (
+  save_object,
+  load_object,
+  read_yaml_file,
+  write_yaml_file
+)
+from src.utils.ml_utils.metric.classification_metric import get_classification_score
+from src.utils.ml_utils.model.estimator import NetworkModel
+from src.cloud.mongo_client import get_mongo_collection
+from src.components.data_ingestion import DataIngestion
+
+class OnlineModelTrainer:
+  '''
+  Streams the documents with an _id above the stored watermark, transforms
+  them with the persisted preprocessor and feeds them to an SGD classifier
+  through partial_fit. The first run has no watermark and learns from the
+  whole collection.
+  '''
+  def __init__(self, online_model_trainer_config: OnlineModelTrainerConfig, collection=None):
+    '''
+    Online Model Trainer component constructor
+    :param online_model_trainer_config: Online model trainer configuration
+    :param collection: Optional Mongo collection, connects with MONGO_DB_URI by default
+    '''
+    try:
+      self.online_model_trainer_config = online_model_trainer_config
+      self.collection = collection
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+
+  def get_collection(self):
+    '''
+    Returns the source collection, connecting on first use.
+    '''
+    try:
+      if self.collection is None:
+        config = self.online_model_trainer_config
+        self.collection = get_mongo_collection(config.database_name, config.collection_name)
+      return self.collection
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+
+  def read_watermark(self) -> str:
+    '''
+    Reads the _id of the last record learned from.
+    :return: ObjectId as a hex string, or None before the first run
+    '''
+    try:
+      watermark_file_path = self.online_model_trainer_config.watermark_file_path
+      if not os.path.exists(watermark_file_path):
+        return None
+      return (read_yaml_file(watermark_file_path) or {}).get("last_object_id")
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+
+  def iter_new_records(self, watermark: str):
+    '''
+    Reads the documents added after the watermark in _id order.
+    :param watermark: ObjectId hex string of the last record learned from, or None
+    :return: Generator of (DataFrame without _id, _id of its last document)
+    '''
+    try:
+      from bson import ObjectId
+
+      batch_size = self.online_model_trainer_config.batch_size
+      query = {"_id": {"$gt": ObjectId(watermark)}} if watermark else {}
+      # Only the schema columns, loaders may store extra fields such as row hashes
+      columns = DataIngestion.get_schema_columns()
+      cursor = self.get_collection().find(
+        query, projection={"_id": 1, **{column: 1 for column in columns}}, batch_size=batch_size
+      ).sort("_id", 1)
+      records = []
+      for document in cursor:
+        records.append(document)
+        if len(records) == batch_size:
+          yield self._to_frame(records, columns)
+          records = []
+      if records:
+        yield self._to_frame(records, columns)
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+
+  @staticmethod
+  def _to_frame(records: list, columns: list):
+    df = pd.DataFrame(records)
+    last_object_id = str(df["_id"].iloc[-1])
+    df = df.reindex(columns=columns).replace({"na": np.nan})
+    return df, last_object_id
+
+  def load_or_create_model(self):
+    '''
+    Loads the online model state, or creates an unfitted SGD classifier.
+    '''
+    try:
+      online_model_file_path = self.online_model_trainer_config.online_model_file_path
+      if os.path.exists(online_model_file_path):
+        return load_object(online_model_file_path)
+      from sklearn.linear_model import SGDClassifier
+      logging.info("No online model state found, starting a new SGD classifier")
+      return SGDClassifier(**self.online_model_trainer_config.model_params)
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+
+  def load_served_model(self):
+    '''
+    Loads the model currently served, the baseline the online model must match to be published.
+    :return: The served model, or None if nothing is served yet
+    '''
+    try:
+      serving_model_file_path = self.online_model_trainer_config.serving_model_file_path
+      if not os.path.exists(serving_model_file_path):
+        return None
+      return load_object(serving_model_file_path)
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+
+  @staticmethod
+  def reset_online_state(online_model_trainer_config: OnlineModelTrainerConfig):
+    '''
+    Deletes the online model state and the watermark.
+    Called when a full retrain publishes a new model and preprocessor, the
+    next online run then starts over from the whole collection.
+    :param online_model_trainer_config: Online model trainer configuration
+    '''
+    try:
+      for file_path in (online_model_trainer_config.online_model_file_path, online_model_trainer_config.watermark_file_path):
+        if os.path.exists(file_path):
+          os.remove(file_path)
+          logging.info(f"Removed the online training state {file_path}")
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+
+  def initiate_online_training(self, cancel_event=None) -> OnlineModelTrainerArtifact:
+    '''
+    Learns from the new records and publishes the updated model when allowed.
+    With publish set, the model is only published if its prequential F1
+    score on the new records is at least the served model's on the same
+    records. The watermark only moves after the model state is saved, so a
+    failed run learns from the same records again on the next run.
+    :param cancel_event: Optional threading.Event checked between batches
+    :return: OnlineModelTrainerArtifact of the update
+    '''
+    try:
+      config = self.online_model_trainer_config
+      if not os.path.exists(config.preprocessor_file_path):
+        raise FileNotFoundError(f"{config.preprocessor_file_path} not found, run a full training pipeline first")
+      preprocessor = load_object(config.preprocessor_file_path)
+      model = self.load_or_create_model()
+      served_model = self.load_served_model() if config.publish else None
+
+      watermark = self.read_watermark()
+      logging.info(f"Starting online training after watermark {watermark}")
+      n_new_records, last_object_id = 0, watermark
+      y_true, y_pred, y_served = [], [], []
+      for df, batch_last_object_id in self.iter_new_records(watermark):
+        if cancel_event is not None and cancel_event.is_set():
+          raise TrainingCancelledError("Online training cancelled")
+
+        x = preprocessor.transform(df.drop(columns=[TARGET_COLUMN]))
+        y = df[TARGET_COLUMN].replace(-1, 0).to_numpy()
+        # Score each batch before learning from it, an honest estimate on unseen records
+        if hasattr(model, "coef_"):
+          y_true.append(y)
+          y_pred.append(model.predict(x))
+          if served_model is not None:
+            y_served.append(served_model.predict(x))
+        model.partial_fit(x, y, classes=np.array([0, 1]))
+
+        n_new_records += len(df)
+        last_object_id = batch_last_object_id
+        logging.info(f"Online model updated with {n_new_records} new records up to {last_object_id}")
+
+      if n_new_records == 0:
+        logging.info("No new records since the last online training run")
+        return OnlineModelTrainerArtifact(
+          trained_model_file_path=None,
+          n_new_records=0,
+          last_object_id=watermark,
+          prequential_metric_artifact=None,
+          published=False
+        )
+
+      prequential_metric_artifact: ClassificationMetricArtifact = None
+      served_metric_artifact: ClassificationMetricArtifact = None
+      if y_true:
+        prequential_metric_artifact = get_classification_score(y_true=np.concatenate(y_true), y_pred=np.concatenate(y_pred))
+        logging.info(f"Prequential metrics of the online model: {prequential_metric_artifact}")
+      if y_served:
+        served_metric_artifact = get_classification_score(y_true=np.concatenate(y_true), y_pred=np.concatenate(y_served))
+        logging.info(f"Metrics of the served model on the same records: {served_metric_artifact}")
+
+      # Without a prequential score there is nothing to compare, the served model stays
+      published = config.publish and prequential_metric_artifact is not None and (
+        served_metric_artifact is None or prequential_metric_artifact.f1_score >= served_metric_artifact.f1_score
+      )
+      if config.publish and not published:
+        logging.info("The online model does not score at least as well as the served model, not publishing it")
+
+      save_object(config.online_model_file_path, model)
+      save_object(config.trained_model_file_path, NetworkModel(preprocessor=preprocessor, model=model))
+      if published:
+        # Picked up by the serving hot reload
+        save_object(config.serving_model_file_path, model)
+      write_yaml_file(config.watermark_file_path, {"last_object_id": last_object_id}, replace=True)
+
+      online_model_trainer_artifact = OnlineModelTrainerArtifact(
+        trained_model_file_path=config.trained_model_file_path,
+        n_new_records=n_new_records,
+        last_object_id=last_object_id,
+        prequential_metric_artifact=prequential_metric_artifact,
+        published=published,
+        served_metric_artifact=served_metric_artifact
+      )
+      logging.info(f"Online training completed: {online_model_trainer_artifact}")
+      return online_model_trainer_artifact
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
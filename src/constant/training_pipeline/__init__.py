@@ -8,6 +8,7 @@ for training pipeline
 TARGET_COLUMN = "Result"
 PIPELINE_NAME: str = "NetworkSecurity"
 ARTIFACT_DIR: str = "Artifacts"
+PIPELINE_TIMINGS_FILE_NAME: str = "pipeline_timings.yaml"
 FILE_NAME: str = "phisingData.csv"
 
 TRAIN_FILE_NAME: str = "train.csv"
@@ -26,6 +27,13 @@ DATA_INGESTION_DIR_NAME: str = "data_ingestion"
 DATA_INGESTION_FEATURE_STORE_DIR: str = "feature_store"
 DATA_INGESTION_INGESTED_DIR: str = "ingested"
 DATA_INGESTION_TRAIN_TEST_SPLIT_RATIO: float = 0.2
+DATA_INGESTION_EXPORT_BATCH_SIZE: int = int(os.getenv("DATA_INGESTION_EXPORT_BATCH_SIZE", 10000)) # Documents per cursor batch
+DATA_INGESTION_EXPORT_PARTITIONS: int = int(os.getenv("DATA_INGESTION_EXPORT_PARTITIONS", 1)) # _id ranges read concurrently
+DATA_INGESTION_EXPORT_SAMPLES_PER_PARTITION: int = 64 # $sample size per partition when placing range boundaries
+DATA_INGESTION_INCREMENTAL: bool = os.getenv("DATA_INGESTION_INCREMENTAL", "true").lower() == "true"
+DATA_INGESTION_FEATURE_STORE_PARTITIONS_DIR: str = os.path.join(ARTIFACT_DIR, "feature_store") # Shared by all runs
+DATA_INGESTION_FEATURE_STORE_MANIFEST_FILE_NAME: str = "manifest.yaml"
+DATA_INGESTION_UPDATED_AT_FIELD: str = os.getenv("DATA_INGESTION_UPDATED_AT_FIELD", "updated_at") # Detects in-place updates without dbHash
 
 '''
 Data validation related constant
@@ -53,6 +61,8 @@ DATA_TRANSFORMATION_IMPUTER_PARAMS: dict = { # KNN Imputer parameters to impute
 
 DATA_TRANSFORMATION_TRAIN_FILE_PATH: str = "train.npy"
 DATA_TRANSFORMATION_TEST_FILE_PATH: str = "test.npy"
+DATA_TRANSFORMATION_TRAIN_TARGET_FILE_NAME: str = "train_target.npy"
+DATA_TRANSFORMATION_TEST_TARGET_FILE_NAME: str = "test_target.npy"
 
 '''
 Model trainer related constant
@@ -62,4 +72,88 @@ MODEL_TRAINER_DIR_NAME: str = "model_trainer"
 MODEL_TRAINER_TRAINED_MODEL_DIR: str = "trained_model"
 MODEL_TRAINER_TRAINED_MODEL_NAME: str = "model.pkl"
 MODEL_TRAINER_EXPECTED_SCORE: float = 0.6
-MODEL_TRAINER_OVERFITTING_UNDERFITING_THRESHOLD: float = 0.05
\ No newline at end of file
+MODEL_TRAINER_OVERFITTING_UNDERFITING_THRESHOLD: float = 0.05
+MODEL_TRAINER_CV_FOLDS: int = 3
+MODEL_TRAINER_N_JOBS: int = int(os.getenv("MODEL_TRAINER_N_JOBS", -1)) # -1 uses every core
+MODEL_TRAINER_SEARCH_STRATEGY: str = os.getenv("MODEL_TRAINER_SEARCH_STRATEGY", "grid") # "grid" or "halving"
+MODEL_TRAINER_HALVING_FACTOR: int = 3
+MODEL_TRAINER_HALVING_MIN_SAMPLES: int = int(os.getenv("MODEL_TRAINER_HALVING_MIN_SAMPLES", 500))
+MODEL_TRAINER_SEARCH_TIME_BUDGET_SECONDS: float = float(os.getenv("MODEL_TRAINER_SEARCH_TIME_BUDGET_SECONDS", 0)) or None
+MODEL_TRAINER_CV_CACHE_DIR: str = os.path.join(ARTIFACT_DIR, "cv_cache")
+MODEL_TRAINER_CV_CACHE_MAX_BYTES: int = int(os.getenv("MODEL_TRAINER_CV_CACHE_MAX_BYTES", 2 * 1024 ** 3))
+MODEL_TRAINER_MLFLOW_TRACKING_URI: str = os.getenv("MLFLOW_TRACKING_URI") # None uses MLflow's default local store
+MODEL_TRAINER_MLFLOW_EXPERIMENT_NAME: str = os.getenv("MLFLOW_EXPERIMENT_NAME", "Default")
+MODEL_TRAINER_MLFLOW_WAIT_FOR_UPLOAD: bool = os.getenv("MLFLOW_WAIT_FOR_UPLOAD", "false").lower() == "true"
+
+'''
+Model serving related constant
+start with MODEL_SERVING_VARNAME
+'''
+MODEL_SERVING_DIR: str = "final_model"
+MODEL_SERVING_PREPROCESSOR_FILE_PATH: str = os.path.join(MODEL_SERVING_DIR, "preprocessor.pkl")
+MODEL_SERVING_MODEL_FILE_PATH: str = os.path.join(MODEL_SERVING_DIR, MODEL_FILE_NAME)
+MODEL_SERVING_RELOAD_INTERVAL_SECONDS: float = float(os.getenv("MODEL_RELOAD_INTERVAL_SECONDS", 10))
+MODEL_SERVING_MAX_BATCH_SIZE: int = int(os.getenv("PREDICT_MAX_BATCH_SIZE", 64))
+MODEL_SERVING_MAX_WAIT_MS: float = float(os.getenv("PREDICT_MAX_WAIT_MS", 5))
+
+MODEL_SERVING_COMPILE_TREES: bool = os.getenv("COMPILE_TREE_MODELS", "false").lower() == "true"
+MODEL_SERVING_PREDICTION_CACHE_SIZE: int = int(os.getenv("PREDICTION_CACHE_SIZE", 100000))
+MODEL_SERVING_PREDICTION_COLUMN: str = "predicted_column"
+MODEL_SERVING_CSV_CHUNK_SIZE: int = int(os.getenv("PREDICT_CSV_CHUNK_SIZE", 10000))
+MODEL_SERVING_INFERENCE_WORKERS: int = int(os.getenv("INFERENCE_WORKERS", 4))
+
+'''
+Training job related constant
+start with TRAINING_JOB_VARNAME
+'''
+TRAINING_JOB_EXECUTOR_KIND: str = os.getenv("TRAINING_EXECUTOR", "thread") # "thread" or "process"
+TRAINING_JOB_MAX_WORKERS: int = int(os.getenv("TRAINING_MAX_WORKERS", 1))
+
+'''
+Batch prediction related constant
+start with BATCH_PREDICTION_VARNAME
+'''
+BATCH_PREDICTION_CHUNK_SIZE: int = 50000
+BATCH_PREDICTION_MAX_WORKERS: int = int(os.getenv("BATCH_PREDICTION_WORKERS", os.cpu_count() or 1))
+BATCH_PREDICTION_MAX_PENDING_CHUNKS_PER_WORKER: int = 2
+BATCH_PREDICTION_MONGO_PREFIX: str = "mongo:"
+
+'''
+Stage cache related constant
+start with STAGE_CACHE_VARNAME
+'''
+STAGE_CACHE_DIR: str = os.path.join(ARTIFACT_DIR, "stage_cache")
+STAGE_CACHE_ENABLED: bool = os.getenv("STAGE_CACHE_ENABLED", "true").lower() == "true"
+
+'''
+Online model trainer related constant
+start with ONLINE_TRAINER_VARNAME
+'''
+ONLINE_TRAINER_DIR_NAME: str = "online_trainer"
+ONLINE_TRAINER_MODEL_FILE_PATH: str = os.path.join(MODEL_SERVING_DIR, "online_model.pkl")
+ONLINE_TRAINER_WATERMARK_FILE_PATH: str = os.path.join(MODEL_SERVING_DIR, "online_watermark.yaml")
+ONLINE_TRAINER_BATCH_SIZE: int = int(os.getenv("ONLINE_TRAINER_BATCH_SIZE", 5000))
+ONLINE_TRAINER_MODEL_PARAMS: dict = {"loss": "log_loss", "alpha": 1e-4, "random_state": 42}
+ONLINE_TRAINER_PUBLISH: bool = os.getenv("ONLINE_TRAINER_PUBLISH", "false").lower() == "true" # Still gated on the served model's score
+
+'''
+Bulk load related constant
+start with BULK_LOAD_VARNAME
+'''
+BULK_LOAD_CHUNK_SIZE: int = int(os.getenv("BULK_LOAD_CHUNK_SIZE", 10000)) # CSV rows per bulk write
+BULK_LOAD_MAX_WORKERS: int = int(os.getenv("BULK_LOAD_WORKERS", 4))
+BULK_LOAD_MAX_PENDING_CHUNKS_PER_WORKER: int = 2
+BULK_LOAD_ROW_HASH_FIELD: str = "row_hash"
+
+'''
+Mongo client related constant
+start with MONGO_CLIENT_VARNAME
+'''
+MONGO_CLIENT_APP_NAME: str = PIPELINE_NAME
+MONGO_CLIENT_MAX_POOL_SIZE: int = int(os.getenv("MONGO_CLIENT_MAX_POOL_SIZE", 50))
+MONGO_CLIENT_MIN_POOL_SIZE: int = int(os.getenv("MONGO_CLIENT_MIN_POOL_SIZE", 0))
+MONGO_CLIENT_CONNECT_TIMEOUT_MS: int = int(os.getenv("MONGO_CLIENT_CONNECT_TIMEOUT_MS", 10000))
+MONGO_CLIENT_SERVER_SELECTION_TIMEOUT_MS: int = int(os.getenv("MONGO_CLIENT_SERVER_SELECTION_TIMEOUT_MS", 10000))
+MONGO_CLIENT_SOCKET_TIMEOUT_MS: int = int(os.getenv("MONGO_CLIENT_SOCKET_TIMEOUT_MS", 120000)) # 0 waits forever
+MONGO_CLIENT_COMPRESSORS: str = os.getenv("MONGO_CLIENT_COMPRESSORS", "zlib") # zstd and snappy need their optional packages
+MONGO_CLIENT_READ_PREFERENCE: str = os.getenv("MONGO_CLIENT_READ_PREFERENCE", "primaryPreferred")
\ No newline at end of file
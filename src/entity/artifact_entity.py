@@ -22,6 +22,9 @@ class DataTransformationArtifact:
   transformed_object_file_path: str
   transformed_train_file_path: str
   transformed_test_file_path: str
+  # Targets are stored apart from the features, None for artifacts holding the target as the last column
+  transformed_train_target_file_path: str = None
+  transformed_test_target_file_path: str = None
 
 # Classification metric artifact class to store model evaluation metrics
 @dataclass
@@ -35,4 +38,33 @@ class ClassificationMetricArtifact:
 class ModelTrainerArtifact:
   trained_model_file_path: str
   train_metric_artifact: ClassificationMetricArtifact
-  test_metric_artifact: ClassificationMetricArtifact
\ No newline at end of file
+  test_metric_artifact: ClassificationMetricArtifact
+
+# Online model trainer artifact class to store the updated model and the records it learned from
+@dataclass
+class OnlineModelTrainerArtifact:
+  trained_model_file_path: str
+  n_new_records: int
+  last_object_id: str
+  prequential_metric_artifact: ClassificationMetricArtifact
+  published: bool
+  served_metric_artifact: ClassificationMetricArtifact = None
+
+# Batch prediction artifact class to store the output location and throughput of a scoring run
+@dataclass
+class BatchPredictionArtifact:
+  output_path: str
+  n_rows: int
+  n_chunks: int
+  elapsed_seconds: float
+  rows_per_second: float
+
+# Bulk load artifact class to store the outcome and throughput of a CSV load
+@dataclass
+class BulkLoadArtifact:
+  n_rows: int
+  n_inserted: int
+  n_duplicates: int
+  n_chunks: int
+  elapsed_seconds: float
+  docs_per_second: float
@@ -3,18 +3,17 @@ from src.constant import training_pipeline
 
 import os
 
-print(training_pipeline.PIPELINE_NAME)
-print(training_pipeline.ARTIFACT_DIR)
-
 class TrainingPipelineConfig:
   '''
   Training pipeline configuration class
   '''
-  def __init__(self, timestamp = datetime.now()):
-    timestamp = timestamp.strftime("%m_%d_%Y_%H_%M_%S")
+  def __init__(self, timestamp: datetime = None):
+    # Resolve the default per instance, long-running servers start several runs
+    timestamp = (timestamp or datetime.now()).strftime("%m_%d_%Y_%H_%M_%S")
     self.pipeline_name = training_pipeline.PIPELINE_NAME
     self.artifact_name = training_pipeline.ARTIFACT_DIR
     self.artifact_dir = os.path.join(self.artifact_name, timestamp)
+    self.timings_file_path = os.path.join(self.artifact_dir, training_pipeline.PIPELINE_TIMINGS_FILE_NAME)
     self.timestamp: str = timestamp
 
 class DataIngestionConfig:
@@ -44,6 +43,14 @@ class DataIngestionConfig:
     self.train_test_split_ratio:float = training_pipeline.DATA_INGESTION_TRAIN_TEST_SPLIT_RATIO
     self.collection_name:str = training_pipeline.DATA_INGESTION_COLLECTION_NAME
     self.database_name:str = training_pipeline.DATA_INGESTION_DATABASE_NAME
+    self.export_batch_size:int = training_pipeline.DATA_INGESTION_EXPORT_BATCH_SIZE
+    self.export_partitions:int = training_pipeline.DATA_INGESTION_EXPORT_PARTITIONS
+    self.export_samples_per_partition:int = training_pipeline.DATA_INGESTION_EXPORT_SAMPLES_PER_PARTITION
+    # Incremental runs only read the documents added since the last run
+    self.incremental:bool = training_pipeline.DATA_INGESTION_INCREMENTAL
+    self.feature_store_partitions_dir:str = training_pipeline.DATA_INGESTION_FEATURE_STORE_PARTITIONS_DIR
+    self.feature_store_manifest_file_name:str = training_pipeline.DATA_INGESTION_FEATURE_STORE_MANIFEST_FILE_NAME
+    self.updated_at_field:str = training_pipeline.DATA_INGESTION_UPDATED_AT_FIELD
 
 class DataValidationConfig:
   '''
@@ -100,6 +107,16 @@ class DataTransformationConfig:
       training_pipeline.DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR,
       training_pipeline.TEST_FILE_NAME.replace("csv", "npy"))
     
+    self.transformed_train_target_file_path: str = os.path.join(
+      self.data_transformation_dir,
+      training_pipeline.DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR,
+      training_pipeline.DATA_TRANSFORMATION_TRAIN_TARGET_FILE_NAME)
+    
+    self.transformed_test_target_file_path: str = os.path.join(
+      self.data_transformation_dir,
+      training_pipeline.DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR,
+      training_pipeline.DATA_TRANSFORMATION_TEST_TARGET_FILE_NAME)
+    
     self.transformed_object_file_path: str = os.path.join(
       self.data_transformation_dir,
       training_pipeline.DATA_TRANSFORMATION_TRANSFORMED_OBJECT_DIR,
@@ -117,4 +134,78 @@ class ModelTrainerConfig:
       training_pipeline.MODEL_FILE_NAME
     )
     self.expected_accuracy: float = training_pipeline.MODEL_TRAINER_EXPECTED_SCORE
-    self.overfitting_underfitting_threshold: float = training_pipeline.MODEL_TRAINER_OVERFITTING_UNDERFITING_THRESHOLD
\ No newline at end of file
+    self.overfitting_underfitting_threshold: float = training_pipeline.MODEL_TRAINER_OVERFITTING_UNDERFITING_THRESHOLD
+    self.cv_folds: int = training_pipeline.MODEL_TRAINER_CV_FOLDS
+    self.n_jobs: int = training_pipeline.MODEL_TRAINER_N_JOBS
+    self.search_strategy: str = training_pipeline.MODEL_TRAINER_SEARCH_STRATEGY
+    self.halving_factor: int = training_pipeline.MODEL_TRAINER_HALVING_FACTOR
+    self.halving_min_samples: int = training_pipeline.MODEL_TRAINER_HALVING_MIN_SAMPLES
+    self.search_time_budget_seconds: float = training_pipeline.MODEL_TRAINER_SEARCH_TIME_BUDGET_SECONDS
+    # Shared by all runs, unlike the timestamped artifact directories
+    self.cv_cache_dir: str = training_pipeline.MODEL_TRAINER_CV_CACHE_DIR
+    self.cv_cache_max_bytes: int = training_pipeline.MODEL_TRAINER_CV_CACHE_MAX_BYTES
+    self.mlflow_tracking_uri: str = training_pipeline.MODEL_TRAINER_MLFLOW_TRACKING_URI
+    self.mlflow_experiment_name: str = training_pipeline.MODEL_TRAINER_MLFLOW_EXPERIMENT_NAME
+    # False lets the trainer return while the tracking records are still being written
+    self.mlflow_wait_for_upload: bool = training_pipeline.MODEL_TRAINER_MLFLOW_WAIT_FOR_UPLOAD
+
+class OnlineModelTrainerConfig:
+  '''
+  Online model trainer configuration class
+  '''
+  def __init__(self, training_pipeline_config: TrainingPipelineConfig):
+    self.online_trainer_dir: str = os.path.join(
+      training_pipeline_config.artifact_dir,
+      training_pipeline.ONLINE_TRAINER_DIR_NAME
+    )
+    self.trained_model_file_path: str = os.path.join(
+      self.online_trainer_dir,
+      training_pipeline.MODEL_FILE_NAME
+    )
+    # Model state and watermark persist across runs, next to the serving model
+    self.online_model_file_path: str = training_pipeline.ONLINE_TRAINER_MODEL_FILE_PATH
+    self.watermark_file_path: str = training_pipeline.ONLINE_TRAINER_WATERMARK_FILE_PATH
+    self.preprocessor_file_path: str = training_pipeline.MODEL_SERVING_PREPROCESSOR_FILE_PATH
+    self.serving_model_file_path: str = training_pipeline.MODEL_SERVING_MODEL_FILE_PATH
+    self.database_name: str = training_pipeline.DATA_INGESTION_DATABASE_NAME
+    self.collection_name: str = training_pipeline.DATA_INGESTION_COLLECTION_NAME
+    self.batch_size: int = training_pipeline.ONLINE_TRAINER_BATCH_SIZE
+    self.model_params: dict = training_pipeline.ONLINE_TRAINER_MODEL_PARAMS
+    self.publish: bool = training_pipeline.ONLINE_TRAINER_PUBLISH
+
+class BatchPredictionConfig:
+  '''
+  Batch prediction configuration class
+  '''
+  def __init__(self, input_path: str, output_path: str,
+    chunk_size: int = training_pipeline.BATCH_PREDICTION_CHUNK_SIZE,
+    max_workers: int = training_pipeline.BATCH_PREDICTION_MAX_WORKERS,
+    output_format: str = "csv"):
+    self.input_path: str = input_path
+    self.output_path: str = output_path
+    self.chunk_size: int = chunk_size
+    self.max_workers: int = max_workers
+    self.output_format: str = output_format
+    self.max_pending_chunks: int = max_workers * training_pipeline.BATCH_PREDICTION_MAX_PENDING_CHUNKS_PER_WORKER
+    self.preprocessor_file_path: str = training_pipeline.MODEL_SERVING_PREPROCESSOR_FILE_PATH
+    self.model_file_path: str = training_pipeline.MODEL_SERVING_MODEL_FILE_PATH
+
+class BulkLoadConfig:
+  '''
+  Bulk load configuration class
+  '''
+  def __init__(self, input_path: str,
+    database_name: str = training_pipeline.DATA_INGESTION_DATABASE_NAME,
+    collection_name: str = training_pipeline.DATA_INGESTION_COLLECTION_NAME,
+    chunk_size: int = training_pipeline.BULK_LOAD_CHUNK_SIZE,
+    max_workers: int = training_pipeline.BULK_LOAD_MAX_WORKERS,
+    upsert: bool = False):
+    self.input_path: str = input_path
+    self.database_name: str = database_name
+    self.collection_name: str = collection_name
+    self.chunk_size: int = chunk_size
+    self.max_workers: int = max_workers
+    # Upserts keyed by a hash of the row make reloading the same file a no-op
+    self.upsert: bool = upsert
+    self.max_pending_chunks: int = max_workers * training_pipeline.BULK_LOAD_MAX_PENDING_CHUNKS_PER_WORKER
+    self.row_hash_field: str = training_pipeline.BULK_LOAD_ROW_HASH_FIELD
@@ -21,6 +21,12 @@ class NetworkSecurityException(Exception):
       self.file_name, self.line_no, str(self.error_message)
     ) 
 
+class TrainingCancelledError(Exception):
+  '''
+  Raised between pipeline stages when a training job has been cancelled.
+  '''
+  pass
+
 if __name__ == "__main__":
   try:
     logger.logging.info("Enter the try block")
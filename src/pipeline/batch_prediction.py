@@ -1,3 +1,199 @@
 '''
 Batch prediction module for processing large datasets in chunks.
+Reads CSV, Parquet or a Mongo collection chunk by chunk, scores the chunks
+on a process pool and writes partitioned output with bounded memory.
+
+Usage:
+  python -m src.pipeline.batch_prediction --input urls.csv --output prediction_output/urls
+  python -m src.pipeline.batch_prediction --input mongo:db/collection --output mongo:db/collection_predictions
 '''
+import os, sys
+import argparse
+import time
+import multiprocessing
+import numpy as np
+import pandas as pd
+
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from src.exception.exception import NetworkSecurityException
+from src.logging.logger import logging
+from src.constant.training_pipeline import (
+  TARGET_COLUMN,
+  MODEL_SERVING_PREDICTION_COLUMN,
+  MODEL_SERVING_CSV_CHUNK_SIZE,
+  BATCH_PREDICTION_MONGO_PREFIX
+)
+from src.entity.config_entity import BatchPredictionConfig
+from src.entity.artifact_entity import BatchPredictionArtifact
+from src.utils.main_utils.utils import load_object
+from src.utils.ml_utils.model.estimator import NetworkModel
+from src.cloud.mongo_client import get_mongo_collection
+
+# predict_csv_in_chunks function created to score a CSV stream with bounded memory
+def predict_csv_in_chunks(network_model: NetworkModel, file_obj, chunk_size: int = MODEL_SERVING_CSV_CHUNK_SIZE):
+  '''
+  Reads a CSV file chunk by chunk and yields each scored chunk as CSV text.
+  Only one chunk is held in memory at a time.
+  :param network_model: The model used for prediction
+  :param file_obj: File path or file-like object of the CSV input
+  :param chunk_size: Number of rows read and predicted per chunk
+  :return: Generator of CSV text, the first chunk carries the header
+  '''
+  try:
+    n_rows = 0
+    for i, chunk in enumerate(pd.read_csv(file_obj, chunksize=chunk_size)):
+      chunk[MODEL_SERVING_PREDICTION_COLUMN] = network_model.predict(chunk)
+      n_rows += len(chunk)
+      yield chunk.to_csv(index=False, header=(i == 0))
+    logging.info(f"Streamed predictions for {n_rows} rows")
+  except Exception as e:
+    raise NetworkSecurityException(e, sys)
+
+def parse_mongo_path(path: str):
+  '''
+  Parses a "mongo:<database>/<collection>" location.
+  :param path: Input or output location
+  :return: Tuple of database and collection name, or None for file paths
+  '''
+  if not path.startswith(BATCH_PREDICTION_MONGO_PREFIX):
+    return None
+  database_name, collection_name = path[len(BATCH_PREDICTION_MONGO_PREFIX):].split("/", 1)
+  return database_name, collection_name
+
+# Per-process state of the scoring workers, set once by the pool initializer
+_worker_model: NetworkModel = None
+
+def _init_worker(preprocessor_file_path: str, model_file_path: str):
+  '''
+  Loads the final model artifacts once per worker process.
+  '''
+  global _worker_model
+  _worker_model = NetworkModel(
+    preprocessor=load_object(preprocessor_file_path),
+    model=load_object(model_file_path)
+  )
+
+def _write_chunk(chunk: pd.DataFrame, index: int, output_path: str, output_format: str):
+  '''
+  Writes a scored chunk as one output partition.
+  '''
+  mongo_location = parse_mongo_path(output_path)
+  if mongo_location is not None:
+    records = chunk.replace({np.nan: None}).to_dict("records")
+    get_mongo_collection(*mongo_location).insert_many(records, ordered=False)
+  elif output_format == "parquet":
+    chunk.to_parquet(os.path.join(output_path, f"part-{index:05d}.parquet"), index=False)
+  else:
+    chunk.to_csv(os.path.join(output_path, f"part-{index:05d}.csv"), index=False, header=True)
+
+def _score_chunk(chunk: pd.DataFrame, index: int, output_path: str, output_format: str) -> int:
+  '''
+  Scores a chunk in a worker process and writes its partition.
+  :return: Number of rows scored
+  '''
+  features = chunk.drop(columns=[column for column in ("_id", TARGET_COLUMN) if column in chunk.columns])
+  chunk[MODEL_SERVING_PREDICTION_COLUMN] = _worker_model.predict(features)
+  _write_chunk(chunk, index, output_path, output_format)
+  return len(chunk)
+
+class BatchPrediction:
+  '''
+  This class scores large datasets with the final model,
+  fanning chunks out to a pool of worker processes
+  '''
+  def __init__(self, batch_prediction_config: BatchPredictionConfig):
+    try:
+      self.batch_prediction_config = batch_prediction_config
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+
+  def read_chunks(self):
+    '''
+    Reads the input in chunks of chunk_size rows.
+    :return: Generator of DataFrames
+    '''
+    try:
+      input_path = self.batch_prediction_config.input_path
+      chunk_size = self.batch_prediction_config.chunk_size
+      mongo_location = parse_mongo_path(input_path)
+
+      if mongo_location is not None:
+        cursor = get_mongo_collection(*mongo_location).find({}, batch_size=chunk_size)
+        records = []
+        for document in cursor:
+          records.append(document)
+          if len(records) == chunk_size:
+            yield pd.DataFrame(records).replace({"na": np.nan})
+            records = []
+        if records:
+          yield pd.DataFrame(records).replace({"na": np.nan})
+      elif input_path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(input_path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size):
+          yield batch.to_pandas()
+      else:
+        yield from pd.read_csv(input_path, chunksize=chunk_size)
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+
+  def initiate_batch_prediction(self) -> BatchPredictionArtifact:
+    '''
+    Scores every chunk of the input and writes the partitioned output.
+    At most max_pending_chunks chunks are in flight, which bounds memory.
+    :return: BatchPredictionArtifact with the output location and throughput
+    '''
+    try:
+      config = self.batch_prediction_config
+      if parse_mongo_path(config.output_path) is None:
+        os.makedirs(config.output_path, exist_ok=True)
+
+      start_time = time.perf_counter()
+      n_rows, n_chunks = 0, 0
+      pending = set()
+      # Spawned workers do not inherit the parent's Mongo client or threads
+      with ProcessPoolExecutor(
+        max_workers=config.max_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(config.preprocessor_file_path, config.model_file_path)
+      ) as executor:
+        for index, chunk in enumerate(self.read_chunks()):
+          if len(pending) >= config.max_pending_chunks:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            n_rows += sum(future.result() for future in done)
+          pending.add(executor.submit(_score_chunk, chunk, index, config.output_path, config.output_format))
+          n_chunks += 1
+        n_rows += sum(future.result() for future in pending)
+
+      elapsed_seconds = time.perf_counter() - start_time
+      batch_prediction_artifact = BatchPredictionArtifact(
+        output_path=config.output_path,
+        n_rows=n_rows,
+        n_chunks=n_chunks,
+        elapsed_seconds=elapsed_seconds,
+        rows_per_second=n_rows / elapsed_seconds if elapsed_seconds > 0 else 0.0
+      )
+      logging.info(f"Batch prediction completed: {batch_prediction_artifact}")
+      return batch_prediction_artifact
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Score a dataset in chunks with the final model")
+  parser.add_argument("--input", required=True, help="CSV or Parquet file, or mongo:<database>/<collection>")
+  parser.add_argument("--output", required=True, help="Output directory, or mongo:<database>/<collection>")
+  parser.add_argument("--format", default="csv", choices=["csv", "parquet"], help="Output partition format")
+  parser.add_argument("--chunk-size", type=int, default=None, help="Rows per chunk")
+  parser.add_argument("--workers", type=int, default=None, help="Number of worker processes")
+  args = parser.parse_args()
+
+  config_kwargs = {"output_format": args.format}
+  if args.chunk_size:
+    config_kwargs["chunk_size"] = args.chunk_size
+  if args.workers:
+    config_kwargs["max_workers"] = args.workers
+  batch_prediction_config = BatchPredictionConfig(input_path=args.input, output_path=args.output, **config_kwargs)
+  artifact = BatchPrediction(batch_prediction_config).initiate_batch_prediction()
+  print(f"Scored {artifact.n_rows} rows in {artifact.n_chunks} chunks, "
+    f"{artifact.elapsed_seconds:.1f}s ({artifact.rows_per_second:,.0f} rows/sec) -> {artifact.output_path}")
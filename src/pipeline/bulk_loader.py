@@ -0,0 +1,191 @@
+'''
+Bulk loader for pushing network data CSV files into MongoDB.
+Streams the CSV in chunks, builds the documents straight from the column
+values and sends every chunk as an unordered bulk write on a thread pool.
+
+Usage:
+  python -m src.pipeline.bulk_loader --input network-data/phisingData.csv
+  python -m src.pipeline.bulk_loader --input network-data/phisingData.csv --upsert
+'''
+import os, sys
+import argparse
+import hashlib
+import time
+import pandas as pd
+
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from src.exception.exception import NetworkSecurityException
+from src.logging.logger import logging
+from src.entity.config_entity import BulkLoadConfig
+from src.entity.artifact_entity import BulkLoadArtifact
+from src.cloud.mongo_client import get_mongo_collection
+
+# chunk_to_documents function created to build documents without a JSON round trip
+def chunk_to_documents(chunk: pd.DataFrame, row_hash_field: str = None, row_occurrences: dict = None) -> list:
+  '''
+  Converts a CSV chunk to documents of native Python values.
+  Missing values become None and whole floats become ints, so a row gets the
+  same document and hash whichever chunk it was read in.
+  :param chunk: DataFrame chunk of the CSV
+  :param row_hash_field: Optional field holding a hash of the row's content
+  :param row_occurrences: Counts of the rows hashed so far, shared by the chunks of one file
+  :return: List of documents
+  '''
+  try:
+    columns = list(chunk.columns)
+    values = []
+    for column in columns:
+      column_values = chunk[column].tolist()
+      if chunk[column].dtype.kind == "f":
+        column_values = [None if value != value else int(value) if value.is_integer() else value for value in column_values]
+      values.append(column_values)
+    rows = list(zip(*values))
+
+    documents = [dict(zip(columns, row)) for row in rows]
+    if row_hash_field is not None:
+      # Repeated rows of a file are numbered, so they are kept apart but still match on a reload
+      row_occurrences = {} if row_occurrences is None else row_occurrences
+      for document, row in zip(documents, rows):
+        content_hash = hashlib.blake2b(repr(row).encode(), digest_size=16).digest()
+        occurrence = row_occurrences[content_hash] = row_occurrences.get(content_hash, -1) + 1
+        document[row_hash_field] = hashlib.blake2b(content_hash + occurrence.to_bytes(8, "little"), digest_size=16).hexdigest()
+    return documents
+  except Exception as e:
+    raise NetworkSecurityException(e, sys)
+
+class BulkLoader:
+  '''
+  This class loads a CSV file into a Mongo collection, keeping at most
+  max_pending_chunks bulk writes in flight
+  '''
+  def __init__(self, bulk_load_config: BulkLoadConfig, collection=None):
+    '''
+    :param bulk_load_config: Bulk load configuration
+    :param collection: Optional Mongo collection, the shared client's collection by default
+    '''
+    try:
+      self.bulk_load_config = bulk_load_config
+      self.collection = collection
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+
+  def get_collection(self):
+    '''
+    Returns the target collection, connecting on first use.
+    '''
+    try:
+      if self.collection is None:
+        config = self.bulk_load_config
+        self.collection = get_mongo_collection(config.database_name, config.collection_name)
+      return self.collection
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+
+  def write_documents(self, documents: list) -> tuple:
+    '''
+    Sends one unordered bulk write.
+    With upserts, a document whose row hash is already stored is left untouched.
+    :param documents: Documents of one chunk
+    :return: Tuple of the number of documents inserted and skipped as duplicates
+    '''
+    try:
+      from pymongo import UpdateOne
+      from pymongo.errors import BulkWriteError
+
+      config = self.bulk_load_config
+      collection = self.get_collection()
+      if config.upsert:
+        requests = [
+          UpdateOne({config.row_hash_field: document[config.row_hash_field]}, {"$setOnInsert": document}, upsert=True)
+          for document in documents
+        ]
+        try:
+          n_upserted = collection.bulk_write(requests, ordered=False).upserted_count
+        except BulkWriteError as error:
+          # Concurrent upserts of the same key, the other one inserted the row
+          if any(write_error["code"] != 11000 for write_error in error.details["writeErrors"]):
+            raise
+          n_upserted = error.details["nUpserted"]
+        return n_upserted, len(documents) - n_upserted
+      collection.insert_many(documents, ordered=False)
+      return len(documents), 0
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+
+  def initiate_bulk_load(self) -> BulkLoadArtifact:
+    '''
+    Streams the CSV into the collection and logs the throughput after every chunk.
+    :return: BulkLoadArtifact with the document counts and throughput
+    '''
+    try:
+      config = self.bulk_load_config
+      row_hash_field = config.row_hash_field if config.upsert else None
+      if config.upsert:
+        # Makes concurrent upserts of the same row insert it only once
+        self.get_collection().create_index(config.row_hash_field, unique=True)
+
+      row_occurrences = {}
+      start_time = time.perf_counter()
+      n_rows, n_inserted, n_duplicates, n_chunks = 0, 0, 0, 0
+      pending = set()
+
+      def collect(done):
+        nonlocal n_inserted, n_duplicates
+        for future in done:
+          inserted, duplicates = future.result()
+          n_inserted += inserted
+          n_duplicates += duplicates
+        elapsed_seconds = time.perf_counter() - start_time
+        logging.info(
+          f"Loaded {n_inserted + n_duplicates} of {n_rows} read documents, {n_duplicates} duplicates, "
+          f"{(n_inserted + n_duplicates) / max(elapsed_seconds, 1e-9):,.0f} docs/sec"
+        )
+
+      # pymongo releases the GIL on network I/O and one client is safe to share between threads
+      with ThreadPoolExecutor(max_workers=config.max_workers) as executor:
+        for chunk in pd.read_csv(config.input_path, chunksize=config.chunk_size):
+          if len(pending) >= config.max_pending_chunks:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            collect(done)
+          pending.add(executor.submit(self.write_documents, chunk_to_documents(chunk, row_hash_field, row_occurrences)))
+          n_rows += len(chunk)
+          n_chunks += 1
+        collect(pending)
+
+      elapsed_seconds = time.perf_counter() - start_time
+      bulk_load_artifact = BulkLoadArtifact(
+        n_rows=n_rows,
+        n_inserted=n_inserted,
+        n_duplicates=n_duplicates,
+        n_chunks=n_chunks,
+        elapsed_seconds=elapsed_seconds,
+        docs_per_second=n_rows / elapsed_seconds if elapsed_seconds > 0 else 0.0
+      )
+      logging.info(f"Bulk load completed: {bulk_load_artifact}")
+      return bulk_load_artifact
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Load a network data CSV file into MongoDB")
+  parser.add_argument("--input", required=True, help="CSV file to load")
+  parser.add_argument("--database", default=None, help="Target database, the ingestion database by default")
+  parser.add_argument("--collection", default=None, help="Target collection, the ingestion collection by default")
+  parser.add_argument("--chunk-size", type=int, default=None, help="CSV rows per bulk write")
+  parser.add_argument("--workers", type=int, default=None, help="Number of concurrent bulk writes")
+  parser.add_argument("--upsert", action="store_true", help="Skip rows whose content hash is already stored")
+  args = parser.parse_args()
+
+  config_kwargs = {"upsert": args.upsert}
+  if args.database:
+    config_kwargs["database_name"] = args.database
+  if args.collection:
+    config_kwargs["collection_name"] = args.collection
+  if args.chunk_size:
+    config_kwargs["chunk_size"] = args.chunk_size
+  if args.workers:
+    config_kwargs["max_workers"] = args.workers
+  bulk_load_config = BulkLoadConfig(input_path=args.input, **config_kwargs)
+  artifact = BulkLoader(bulk_load_config).initiate_bulk_load()
+  print(f"Loaded {artifact.n_rows} rows in {artifact.n_chunks} chunks, {artifact.n_inserted} inserted, "
+    f"{artifact.n_duplicates} duplicates, {artifact.elapsed_seconds:.1f}s ({artifact.docs_per_second:,.0f} docs/sec)")
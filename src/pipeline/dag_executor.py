@@ -0,0 +1,136 @@
+'''
+Dependency graph executor.
+Runs named tasks on a thread or process pool as soon as the tasks they
+depend on have finished, records per-task timings and reports the
+critical path of the run.
+'''
+import sys
+import time
+
+from concurrent.futures import wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+from src.exception.exception import NetworkSecurityException, TrainingCancelledError
+from src.logging.logger import logging
+from src.pipeline.training_jobs import create_executor
+
+@dataclass
+class DagTask:
+  name: str
+  fn: object = field(repr=False)
+  dependencies: tuple = ()
+
+class DagExecutor:
+  '''
+  Each task is called with the results of its dependencies as positional
+  arguments, in the order the dependencies were given. With the process
+  executor the task functions and their results must be picklable.
+  '''
+  def __init__(self, name: str, executor_kind: str = "thread", max_workers: int = None):
+    try:
+      self.name = name
+      self.executor_kind = executor_kind
+      self.max_workers = max_workers
+      self.tasks = {}
+      self.timings = {}
+      self.reports = {}
+      self.wall_clock_seconds = None
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+
+  def add_task(self, name: str, fn, dependencies: tuple = ()) -> str:
+    '''
+    Adds a task to the graph.
+    :param name: Unique task name
+    :param fn: Callable taking the dependency results
+    :param dependencies: Names of the tasks that must finish first
+    :return: The task name, to be used as a dependency of later tasks
+    '''
+    try:
+      if name in self.tasks:
+        raise ValueError(f"Task {name} is already part of {self.name}")
+      unknown = [dependency for dependency in dependencies if dependency not in self.tasks]
+      if unknown:
+        raise ValueError(f"Task {name} depends on unknown tasks {unknown}")
+      self.tasks[name] = DagTask(name=name, fn=fn, dependencies=tuple(dependencies))
+      return name
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+
+  def add_report(self, name: str, report: dict):
+    '''
+    Attaches the timing report of a nested graph run by a task.
+    '''
+    self.reports[name] = report
+
+  def run(self, cancel_event=None) -> dict:
+    '''
+    Runs every task once its dependencies have finished.
+    Tasks are only added in dependency order, so the graph has no cycles.
+    :param cancel_event: Optional threading.Event, no new task starts once it is set
+    :return: Dictionary of task name to result
+    '''
+    try:
+      start_time = time.perf_counter()
+      results = {}
+      running = {}
+      remaining = dict(self.tasks)
+      executor = create_executor(self.executor_kind, self.max_workers or max(len(self.tasks), 1))
+      try:
+        while remaining or running:
+          if cancel_event is not None and cancel_event.is_set():
+            raise TrainingCancelledError(f"{self.name} cancelled")
+          for task in [task for task in remaining.values() if all(dependency in results for dependency in task.dependencies)]:
+            arguments = [results[dependency] for dependency in task.dependencies]
+            future = executor.submit(task.fn, *arguments)
+            running[future] = (task, time.perf_counter())
+            del remaining[task.name]
+          if not running:
+            raise ValueError(f"Tasks {list(remaining)} of {self.name} can never run")
+
+          done, _ = wait(running, return_when=FIRST_COMPLETED)
+          for future in done:
+            task, task_start_time = running.pop(future)
+            # Raises the task's exception, the remaining tasks are cancelled on exit
+            results[task.name] = future.result()
+            end_time = time.perf_counter()
+            self.timings[task.name] = {
+              "start_seconds": round(task_start_time - start_time, 4),
+              "end_seconds": round(end_time - start_time, 4),
+              "seconds": round(end_time - task_start_time, 4),
+              "dependencies": list(task.dependencies),
+            }
+            logging.info(f"{self.name}: task {task.name} finished in {end_time - task_start_time:.2f}s")
+      finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+      self.wall_clock_seconds = time.perf_counter() - start_time
+      return results
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+
+  def critical_path(self) -> list:
+    '''
+    Follows the latest-finishing dependency back from the last task to finish.
+    :return: Task names on the critical path, in execution order
+    '''
+    if not self.timings:
+      return []
+    path = [max(self.timings, key=lambda name: self.timings[name]["end_seconds"])]
+    while self.timings[path[-1]]["dependencies"]:
+      path.append(max(self.timings[path[-1]]["dependencies"], key=lambda name: self.timings[name]["end_seconds"]))
+    return path[::-1]
+
+  def timings_report(self) -> dict:
+    '''
+    Returns the per-task timings, the critical path and the nested reports.
+    '''
+    critical_path = self.critical_path()
+    report = {
+      "wall_clock_seconds": round(self.wall_clock_seconds or 0.0, 4),
+      "task_seconds": round(sum(timing["seconds"] for timing in self.timings.values()), 4),
+      "critical_path": critical_path,
+      "critical_path_seconds": round(sum(self.timings[name]["seconds"] for name in critical_path), 4),
+      "tasks": self.timings,
+    }
+    if self.reports:
+      report["subgraphs"] = self.reports
+    return report
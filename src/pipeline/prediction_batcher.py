@@ -0,0 +1,121 @@
+'''
+Micro-batching of online prediction requests.
+Concurrent requests are queued and scored together in a single
+NetworkModel.predict call, bounded by batch size and wait time.
+'''
+import sys
+import asyncio
+import numpy as np
+import pandas as pd
+
+from src.exception.exception import NetworkSecurityException
+from src.logging.logger import logging
+from src.constant.training_pipeline import (
+  MODEL_SERVING_MAX_BATCH_SIZE,
+  MODEL_SERVING_MAX_WAIT_MS
+)
+from src.utils.ml_utils.model.model_holder import ModelHolder
+
+class PredictionBatcher:
+  '''
+  Groups prediction requests into micro-batches.
+  A batch is scored as soon as it holds max_batch_size rows or the first
+  request in it has waited max_wait_ms, whichever comes first.
+  '''
+  def __init__(self, model_holder: ModelHolder,
+    max_batch_size: int = MODEL_SERVING_MAX_BATCH_SIZE,
+    max_wait_ms: float = MODEL_SERVING_MAX_WAIT_MS,
+    executor=None):
+    try:
+      self.model_holder = model_holder
+      self.max_batch_size = max_batch_size
+      self.max_wait_ms = max_wait_ms
+      self.executor = executor
+
+      self._queue: asyncio.Queue = None
+      self._worker: asyncio.Task = None
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+
+  async def start(self):
+    '''
+    Starts the batching worker on the running event loop.
+    '''
+    self._queue = asyncio.Queue()
+    self._worker = asyncio.create_task(self._run())
+
+  async def stop(self):
+    '''
+    Stops the batching worker.
+    '''
+    if self._worker is not None:
+      self._worker.cancel()
+      try:
+        await self._worker
+      except asyncio.CancelledError:
+        pass
+      self._worker = None
+
+  async def predict(self, records: pd.DataFrame) -> np.ndarray:
+    '''
+    Queues the records for the next micro-batch and waits for the result.
+    :param records: DataFrame holding one or more feature records
+    :return: Predictions for the given records
+    '''
+    future = asyncio.get_running_loop().create_future()
+    await self._queue.put((records, future))
+    return await future
+
+  async def _collect_batch(self) -> list:
+    '''
+    Waits for the first request, then keeps collecting until the batch
+    is full or the wait budget is spent.
+    :return: List of (records, future) tuples
+    '''
+    loop = asyncio.get_running_loop()
+    batch = [await self._queue.get()]
+    n_rows = len(batch[0][0])
+    deadline = loop.time() + self.max_wait_ms / 1000
+
+    while n_rows < self.max_batch_size:
+      timeout = deadline - loop.time()
+      if timeout <= 0:
+        break
+      try:
+        item = await asyncio.wait_for(self._queue.get(), timeout)
+      except asyncio.TimeoutError:
+        break
+      batch.append(item)
+      n_rows += len(item[0])
+    return batch
+
+  async def _score_batch(self, batch: list):
+    '''
+    Scores a batch with a single predict call and resolves each request.
+    :param batch: List of (records, future) tuples
+    '''
+    try:
+      frame = pd.concat([records for records, _ in batch], ignore_index=True)
+      network_model = self.model_holder.get_model()
+      loop = asyncio.get_running_loop()
+      y_pred = await loop.run_in_executor(self.executor, network_model.predict, frame)
+    except Exception as e:
+      logging.error(f"Micro-batch prediction failed: {e}")
+      for _, future in batch:
+        if not future.done():
+          future.set_exception(e)
+      return
+
+    offset = 0
+    for records, future in batch:
+      if not future.done():
+        future.set_result(y_pred[offset:offset + len(records)])
+      offset += len(records)
+
+  async def _run(self):
+    '''
+    Worker loop collecting and scoring micro-batches.
+    '''
+    while True:
+      batch = await self._collect_batch()
+      await self._score_batch(batch)
@@ -0,0 +1,171 @@
+'''
+Background training jobs.
+Runs the training pipeline on a thread or process pool so the API keeps
+serving while a model is retrained.
+'''
+import sys
+import threading
+import time
+import uuid
+
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from dataclasses import dataclass, field, asdict
+from src.exception.exception import NetworkSecurityException
+from src.logging.logger import logging
+from src.constant.training_pipeline import (
+  TRAINING_JOB_EXECUTOR_KIND,
+  TRAINING_JOB_MAX_WORKERS
+)
+
+# create_executor function created to build the configured worker pool
+def create_executor(kind: str, max_workers: int) -> Executor:
+  '''
+  Creates a thread or process pool executor.
+  :param kind: "thread" or "process"
+  :param max_workers: Maximum number of workers in the pool
+  :return: The executor
+  '''
+  try:
+    if kind == "thread":
+      return ThreadPoolExecutor(max_workers=max_workers)
+    if kind == "process":
+      return ProcessPoolExecutor(max_workers=max_workers)
+    raise ValueError(f"Unknown executor kind {kind}, expected 'thread' or 'process'")
+  except Exception as e:
+    raise NetworkSecurityException(e, sys)
+
+# run_training_pipeline function created as a picklable job entry point
+def run_training_pipeline(cancel_event=None):
+  '''
+  Runs a full training pipeline.
+  :param cancel_event: Optional threading.Event checked between stages
+  :return: ModelTrainerArtifact of the run
+  '''
+  # Imported here so serving never loads the training-only modules
+  from src.pipeline.training_pipeline import TrainingPipeline
+  training_pipeline = TrainingPipeline()
+  return training_pipeline.run_pipeline(cancel_event=cancel_event)
+
+# run_online_training function created as a picklable job entry point of the incremental update
+def run_online_training(cancel_event=None):
+  '''
+  Updates the online model with the records added since the last run.
+  :param cancel_event: Optional threading.Event checked between batches
+  :return: OnlineModelTrainerArtifact of the run
+  '''
+  from src.components.online_model_trainer import OnlineModelTrainer
+  from src.entity.config_entity import TrainingPipelineConfig, OnlineModelTrainerConfig
+  online_model_trainer_config = OnlineModelTrainerConfig(training_pipeline_config=TrainingPipelineConfig())
+  online_model_trainer = OnlineModelTrainer(online_model_trainer_config=online_model_trainer_config)
+  return online_model_trainer.initiate_online_training(cancel_event=cancel_event)
+
+@dataclass
+class TrainingJob:
+  job_id: str
+  submitted_at: float
+  future: object = field(repr=False)
+  cancel_event: object = field(repr=False, default=None)
+  cancel_requested: bool = False
+  finished_at: float = None
+
+  @property
+  def status(self) -> str:
+    if self.future.cancelled():
+      return "cancelled"
+    if not self.future.done():
+      if self.cancel_requested:
+        return "cancelling"
+      return "running" if self.future.running() else "pending"
+    if self.future.exception() is not None:
+      return "cancelled" if self.cancel_requested else "failed"
+    return "succeeded"
+
+  def to_dict(self) -> dict:
+    '''
+    Returns a JSON serialisable view of the job.
+    '''
+    status = self.status
+    report = {
+      "job_id": self.job_id,
+      "status": status,
+      "submitted_at": self.submitted_at,
+      "finished_at": self.finished_at,
+    }
+    if status == "failed":
+      report["error"] = str(self.future.exception())
+    if status == "succeeded":
+      report["result"] = asdict(self.future.result())
+    return report
+
+class TrainingJobManager:
+  '''
+  Submits training pipeline runs to a worker pool and tracks them by job id.
+  Pending jobs are cancelled right away. Running jobs on the thread pool
+  stop at the next stage boundary; running jobs on the process pool
+  cannot be interrupted and finish normally.
+  '''
+  def __init__(self, executor_kind: str = TRAINING_JOB_EXECUTOR_KIND,
+    max_workers: int = TRAINING_JOB_MAX_WORKERS):
+    try:
+      self.executor_kind = executor_kind
+      self.executor = create_executor(executor_kind, max_workers)
+      self._jobs = {}
+      self._lock = threading.Lock()
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+
+  def submit(self, fn=run_training_pipeline) -> TrainingJob:
+    '''
+    Submits a training run.
+    :param fn: Job entry point accepting a cancel_event keyword
+    :return: The submitted TrainingJob
+    '''
+    try:
+      # Events cannot be shared with a process pool worker
+      cancel_event = threading.Event() if self.executor_kind == "thread" else None
+      future = self.executor.submit(fn, cancel_event=cancel_event)
+      job = TrainingJob(
+        job_id=uuid.uuid4().hex,
+        submitted_at=time.time(),
+        future=future,
+        cancel_event=cancel_event
+      )
+      future.add_done_callback(lambda _: setattr(job, "finished_at", time.time()))
+      with self._lock:
+        self._jobs[job.job_id] = job
+      logging.info(f"Submitted training job {job.job_id}")
+      return job
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+
+  def get(self, job_id: str) -> TrainingJob:
+    '''
+    Returns the job with the given id, or None if it does not exist.
+    '''
+    with self._lock:
+      return self._jobs.get(job_id)
+
+  def cancel(self, job_id: str) -> TrainingJob:
+    '''
+    Requests cancellation of a job.
+    :param job_id: Id of the job to cancel
+    :return: The job, or None if it does not exist
+    '''
+    job = self.get(job_id)
+    if job is None or job.future.done():
+      return job
+    if not job.future.cancel():
+      job.cancel_requested = True
+      if job.cancel_event is not None:
+        job.cancel_event.set()
+    logging.info(f"Cancellation requested for training job {job_id}")
+    return job
+
+  def shutdown(self):
+    '''
+    Cancels pending jobs and shuts the pool down without waiting.
+    '''
+    for job in list(self._jobs.values()):
+      if job.cancel_event is not None:
+        job.cancel_event.set()
+    self.executor.shutdown(wait=False, cancel_futures=True)
@@ -5,16 +5,26 @@ import os, sys
 
 from src.exception.exception import NetworkSecurityException
 from src.logging.logger import logging
+from src.constant.training_pipeline import (
+  SCHEMA_FILE_PATH,
+  DATA_TRANSFORMATION_IMPUTER_PARAMS,
+  STAGE_CACHE_DIR,
+  STAGE_CACHE_ENABLED
+)
+from src.utils.main_utils.stage_cache import StageCache, hash_files, hash_sources, hash_values
+from src.utils.main_utils.utils import write_yaml_file
+from src.pipeline.dag_executor import DagExecutor
 
 from src.components.data_ingestion import DataIngestion
 from src.components.data_validation import DataValidation
 from src.components.data_transformation import DataTransformation
 from src.components.model_trainer import ModelTrainer
+from src.components.online_model_trainer import OnlineModelTrainer
 
 from src.entity.config_entity import (
   DataIngestionConfig, DataValidationConfig,
   DataTransformationConfig, ModelTrainerConfig,
-  TrainingPipelineConfig
+  OnlineModelTrainerConfig, TrainingPipelineConfig
 )
 from src.entity.artifact_entity import (
   DataIngestionArtifact, DataValidationArtifact,
@@ -26,6 +36,8 @@ class TrainingPipeline:
   def __init__(self):
     try:
       self.training_pipeline_config = TrainingPipelineConfig()
+      # Shared by all runs, stages with unchanged inputs reuse an earlier artifact
+      self.stage_cache = StageCache(STAGE_CACHE_DIR) if STAGE_CACHE_ENABLED else None
     except Exception as e:
       raise NetworkSecurityException(e, sys)
   
@@ -37,8 +49,24 @@ class TrainingPipeline:
       
       # Initialize Data Ingestion component
       data_ingestion = DataIngestion(data_ingestion_config=self.data_ingestion_config)
+      
+      # The export is skipped while the collection is unchanged
+      if self.stage_cache is not None:
+        stage_key = hash_values(
+          data_ingestion.get_source_fingerprint(),
+          self.data_ingestion_config.database_name,
+          self.data_ingestion_config.collection_name,
+          self.data_ingestion_config.train_test_split_ratio
+        )
+        data_ingestion_artifact = self.stage_cache.lookup("data_ingestion", stage_key, DataIngestionArtifact)
+        if data_ingestion_artifact is not None:
+          return data_ingestion_artifact
+      
       data_ingestion_artifact = data_ingestion.initiate_data_ingestion()
+      self.add_stage_report("data_ingestion", data_ingestion.dag_report)
       logging.info(f"Data ingestion completed successfully! {data_ingestion_artifact}")
+      if self.stage_cache is not None:
+        self.stage_cache.store("data_ingestion", stage_key, data_ingestion_artifact)
       
       return data_ingestion_artifact
     except Exception as e:
@@ -52,12 +80,25 @@ class TrainingPipeline:
       )
       logging.info(f"Start data validation")
       
+      if self.stage_cache is not None:
+        stage_key = hash_values(hash_files(
+          data_ingestion_artifact.trained_file_path,
+          data_ingestion_artifact.test_file_path,
+          SCHEMA_FILE_PATH
+        ))
+        data_validation_artifact = self.stage_cache.lookup("data_validation", stage_key, DataValidationArtifact)
+        if data_validation_artifact is not None:
+          return data_validation_artifact
+      
       data_validation = DataValidation(
         data_ingestion_artifact=data_ingestion_artifact,
         data_validation_config=data_validation_config
       )
       data_validation_artifact = data_validation.initiate_data_validation()
+      self.add_stage_report("data_validation", data_validation.dag_report)
       logging.info(f"Data validation completed successfully!")
+      if self.stage_cache is not None:
+        self.stage_cache.store("data_validation", stage_key, data_validation_artifact)
       
       return data_validation_artifact
     except Exception as e:
@@ -70,12 +111,29 @@ class TrainingPipeline:
         training_pipeline_config=self.training_pipeline_config,
       )
       logging.info(f"Start data transformation")
+      
+      if self.stage_cache is not None:
+        # A change to the transformer's definition or code refits the preprocessor
+        transformer = DataTransformation.get_data_transformer_object()
+        stage_key = hash_values(
+          hash_files(data_validation_artifact.valid_train_file_path, data_validation_artifact.valid_test_file_path),
+          DATA_TRANSFORMATION_IMPUTER_PARAMS,
+          repr(transformer),
+          hash_sources(DataTransformation, *[type(step) for _, step in transformer.steps])
+        )
+        data_transformation_artifact = self.stage_cache.lookup("data_transformation", stage_key, DataTransformationArtifact)
+        if data_transformation_artifact is not None:
+          return data_transformation_artifact
+      
       data_transformation = DataTransformation(
         data_transformation_config=data_transformation_config,
         data_validation_artifact=data_validation_artifact
       )
       data_transformation_artifact = data_transformation.initiate_data_transformation()
+      self.add_stage_report("data_transformation", data_transformation.dag_report)
       logging.info(f"Data transformation completed successfully! {data_transformation_artifact}")
+      if self.stage_cache is not None:
+        self.stage_cache.store("data_transformation", stage_key, data_transformation_artifact)
       
       return data_transformation_artifact
     except Exception as e:
@@ -94,21 +152,39 @@ class TrainingPipeline:
       )
       model_trainer_artifact = model_trainer.initiate_model_trainer()
       logging.info(f"Model training completed successfully! {model_trainer_artifact}")
+      
+      # The retrained model and preprocessor are served now, drop the online state learned before them
+      OnlineModelTrainer.reset_online_state(OnlineModelTrainerConfig(training_pipeline_config=self.training_pipeline_config))
       return model_trainer_artifact
     except Exception as e:
       raise NetworkSecurityException(e, sys)
   
-  def run_pipeline(self):
+  def add_stage_report(self, stage: str, report: dict):
+    '''
+    Attaches the task timings of a stage to the pipeline graph, if the stage runs as part of one.
+    '''
+    dag = getattr(self, "dag", None)
+    if dag is not None:
+      dag.add_report(stage, report)
+  
+  def run_pipeline(self, cancel_event=None):
     try:
-      # Run the entire training pipeline
+      # Run the entire training pipeline as a dependency graph of its stages
       logging.info(f"Starting training pipeline")
-      
-      data_ingestion_artifact = self.start_data_ingestion()
-      data_validation_artifact = self.start_data_validation(data_ingestion_artifact=data_ingestion_artifact)
-      data_transformation_artifact = self.start_data_transformation(data_validation_artifact=data_validation_artifact)
-      model_trainer_artifact = self.start_model_trainer(data_transformation_artifact=data_transformation_artifact)
+      self.dag = DagExecutor("training_pipeline")
+      self.dag.add_task("data_ingestion", self.start_data_ingestion)
+      self.dag.add_task("data_validation", self.start_data_validation, ("data_ingestion",))
+      self.dag.add_task("data_transformation", self.start_data_transformation, ("data_validation",))
+      self.dag.add_task("model_trainer", self.start_model_trainer, ("data_transformation",))
+      try:
+        # No new stage starts once cancellation is requested
+        results = self.dag.run(cancel_event=cancel_event)
+      finally:
+        timings_report = self.dag.timings_report()
+        write_yaml_file(self.training_pipeline_config.timings_file_path, timings_report, replace=True)
+        logging.info(f"Pipeline critical path: {' -> '.join(timings_report['critical_path'])}")
       
       logging.info(f"Training pipeline completed successfully!")
-      return model_trainer_artifact
+      return results["model_trainer"]
     except Exception as e:
-      raise NetworkSecurityException(e, sys)
\ No newline at end of file
+      raise NetworkSecurityException(e, sys)
@@ -0,0 +1,101 @@
+'''
+Preallocated column arrays for decoding documents without building a
+DataFrame of Python objects. Columns start as int8 and a column is promoted
+to float32 once, the first time it holds a missing or non int8 value.
+'''
+import sys
+import threading
+import numpy as np
+import pandas as pd
+
+from src.exception.exception import NetworkSecurityException
+
+# Values decoded as NaN, besides missing fields
+COLUMNAR_BUFFER_MISSING_VALUES: tuple = (None, "na", "")
+
+class ColumnarBuffer:
+  def __init__(self, columns: list, capacity: int):
+    '''
+    :param columns: Column names, in the order of the decoded rows
+    :param capacity: Number of rows to preallocate, grown on demand
+    '''
+    try:
+      self.columns = list(columns)
+      self.capacity = max(int(capacity), 1)
+      self.arrays = {column: np.zeros(self.capacity, dtype=np.int8) for column in self.columns}
+      # Threads writing disjoint row ranges share the buffer, promotions must not lose their writes
+      self._lock = threading.Lock()
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+
+  def _grow(self, n_rows: int):
+    self.capacity = max(n_rows, 2 * self.capacity)
+    for column, array in self.arrays.items():
+      grown = np.zeros(self.capacity, dtype=array.dtype)
+      grown[:len(array)] = array
+      self.arrays[column] = grown
+
+  @staticmethod
+  def _decode_column(values) -> np.ndarray:
+    '''
+    Decodes the values of one column, missing values become NaN.
+    '''
+    return np.array([np.nan if value in COLUMNAR_BUFFER_MISSING_VALUES else value for value in values], dtype=np.float64)
+
+  @staticmethod
+  def _fits_int8(values: np.ndarray) -> bool:
+    '''
+    Checks whether every value is a whole number in the int8 range.
+    '''
+    if values.dtype.kind not in "iub" and not (np.isfinite(values).all() and np.array_equal(values, np.round(values))):
+      return False
+    return values.min() >= np.iinfo(np.int8).min and values.max() <= np.iinfo(np.int8).max
+
+  def write(self, start: int, rows: list) -> int:
+    '''
+    Decodes rows into the column arrays.
+    :param start: Index of the first row
+    :param rows: List of tuples of values, in column order
+    :return: Number of rows written
+    '''
+    try:
+      if not rows:
+        return 0
+      end = start + len(rows)
+      # Transposed in C, only columns holding missing or text values take the per-value path
+      decoded = []
+      for column_values in zip(*rows):
+        values = np.array(column_values)
+        decoded.append(values if values.dtype.kind in "iufb" else self._decode_column(column_values))
+      
+      with self._lock:
+        if end > self.capacity:
+          self._grow(end)
+        for column, values in zip(self.columns, decoded):
+          array = self.arrays[column]
+          if array.dtype == np.int8 and not self._fits_int8(values):
+            array = self.arrays[column] = array.astype(np.float32)
+          array[start:end] = values
+      return len(rows)
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+
+  def take(self, index: np.ndarray):
+    '''
+    Keeps only the given rows, used to close the gaps left by ranges that returned fewer rows than counted.
+    '''
+    try:
+      with self._lock:
+        self.arrays = {column: array[index] for column, array in self.arrays.items()}
+        self.capacity = len(index)
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+
+  def to_frame(self, n_rows: int) -> pd.DataFrame:
+    '''
+    Returns the first n_rows rows as a DataFrame, sharing the column arrays where pandas allows it.
+    '''
+    try:
+      return pd.DataFrame({column: array[:n_rows] for column, array in self.arrays.items()}, copy=False)
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
@@ -0,0 +1,128 @@
+'''
+Benchmark of the streaming columnar Mongo export against the DataFrame of dicts it replaced.
+Seeds a collection with synthetic ternary documents, a share of them holding
+"na", then times both exports and traces their peak Python allocations.
+Without --mongo-uri the collection lives in mongomock, which copies and
+projects every document in Python, so the cursor row shows the share of time
+and memory spent in the stand-in itself.
+
+Usage:
+  python -m src.utils.main_utils.export_benchmark --n-documents 1000000
+  python -m src.utils.main_utils.export_benchmark --n-documents 1000000 --mongo-uri mongodb://localhost:27017
+'''
+import sys
+import argparse
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+from src.exception.exception import NetworkSecurityException
+from src.constant.training_pipeline import DATA_INGESTION_EXPORT_BATCH_SIZE
+from src.components.data_ingestion import DataIngestion
+from src.entity.config_entity import DataIngestionConfig, TrainingPipelineConfig
+
+def seed_collection(collection, columns: list, n_documents: int, na_share: float = 0.001, chunk_size: int = 50000):
+  '''
+  Inserts synthetic documents with values in {-1, 0, 1}.
+  :param collection: Empty Mongo collection
+  :param columns: Field names of the documents
+  :param n_documents: Number of documents to insert
+  :param na_share: Share of documents holding "na" in their first field
+  :param chunk_size: Documents per insert_many call
+  '''
+  try:
+    random_state = np.random.RandomState(0)
+    for start in range(0, n_documents, chunk_size):
+      values = random_state.randint(-1, 2, size=(min(chunk_size, n_documents - start), len(columns))).tolist()
+      documents = [dict(zip(columns, row)) for row in values]
+      for i in np.flatnonzero(random_state.rand(len(documents)) < na_share):
+        documents[i][columns[0]] = "na"
+      collection.insert_many(documents, ordered=False)
+  except Exception as e:
+    raise NetworkSecurityException(e, sys)
+
+def export_as_dicts(collection) -> pd.DataFrame:
+  '''
+  The export before the columnar one, kept as the baseline.
+  '''
+  df = pd.DataFrame(list(collection.find()))
+  if "_id" in df.columns.to_list():
+    df = df.drop(columns=["_id"])
+  df.replace({"na": np.nan}, inplace=True)
+  return df
+
+def drain_cursor(collection, columns: list, batch_size: int) -> pd.DataFrame:
+  '''
+  Only iterates the projected cursor, the floor set by the server or the stand-in.
+  '''
+  cursor = collection.find({}, projection={column: 1 for column in columns}, batch_size=batch_size).sort("_id", 1)
+  n_rows = sum(1 for _ in cursor)
+  return pd.DataFrame(index=range(n_rows))
+
+def measure(export) -> dict:
+  '''
+  Runs an export and reports its wall-clock seconds and peak traced allocations.
+  '''
+  tracemalloc.start()
+  start_time = time.perf_counter()
+  df = export()
+  elapsed_seconds = time.perf_counter() - start_time
+  _, peak_bytes = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+  return {
+    "seconds": elapsed_seconds,
+    "peak_mb": peak_bytes / 1024 ** 2,
+    "frame_mb": df.memory_usage(index=False).sum() / 1024 ** 2,
+    "n_rows": len(df),
+  }
+
+def run_export_benchmark(n_documents: int, mongo_uri: str = None, batch_size: int = DATA_INGESTION_EXPORT_BATCH_SIZE,
+  skip_baseline: bool = False) -> dict:
+  '''
+  Seeds a scratch collection and measures both exports on it.
+  :param n_documents: Number of documents to seed
+  :param mongo_uri: Optional mongod URI, mongomock is used without it
+  :param batch_size: Cursor batch size of the columnar export
+  :param skip_baseline: Only measure the columnar export, the baseline needs several GB at 1M documents
+  :return: Dictionary of export name to its measurements
+  '''
+  try:
+    if mongo_uri:
+      import pymongo
+      client = pymongo.MongoClient(mongo_uri)
+    else:
+      import mongomock
+      client = mongomock.MongoClient()
+    collection = client["export_benchmark"]["documents"]
+    collection.drop()
+
+    config = DataIngestionConfig(TrainingPipelineConfig())
+    config.export_batch_size = batch_size
+    data_ingestion = DataIngestion(config, collection=collection)
+    columns = data_ingestion.get_schema_columns()
+    seed_collection(collection, columns, n_documents)
+
+    results = {
+      "cursor": measure(lambda: drain_cursor(collection, columns, batch_size)),
+      "columnar": measure(data_ingestion.export_collection_as_df),
+    }
+    if not skip_baseline:
+      results["dicts"] = measure(lambda: export_as_dicts(collection))
+    collection.drop()
+    return results
+  except Exception as e:
+    raise NetworkSecurityException(e, sys)
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Compare the columnar Mongo export with the DataFrame of dicts")
+  parser.add_argument("--n-documents", type=int, default=1000000, help="Number of documents to seed")
+  parser.add_argument("--mongo-uri", default=None, help="mongod URI of a scratch database, mongomock by default")
+  parser.add_argument("--batch-size", type=int, default=DATA_INGESTION_EXPORT_BATCH_SIZE, help="Cursor batch size")
+  parser.add_argument("--skip-baseline", action="store_true", help="Only measure the columnar export")
+  args = parser.parse_args()
+
+  results = run_export_benchmark(args.n_documents, args.mongo_uri, args.batch_size, args.skip_baseline)
+  print(f"{'export':<10}{'rows':>10}{'seconds':>10}{'peak MB':>10}{'frame MB':>10}")
+  for export_name, result in results.items():
+    print(f"{export_name:<10}{result['n_rows']:>10,}{result['seconds']:>10.1f}{result['peak_mb']:>10.1f}{result['frame_mb']:>10.1f}")
@@ -0,0 +1,112 @@
+'''
+Append-only partitioned feature store shared across training runs.
+Every ingestion appends the documents added since the last one as a new
+parquet partition and moves the watermark, the _id of the last document
+stored. A manifest lists the partitions and is replaced atomically after
+the partition is written, so a failed run leaves the store unchanged. It
+also records the _id of the first document stored, so the caller can tell
+when the source was reloaded and the store has to be rebuilt.
+'''
+import os, sys
+import datetime
+import pandas as pd
+
+from src.exception.exception import NetworkSecurityException
+from src.logging.logger import logging
+from src.utils.main_utils.utils import read_yaml_file, write_yaml_file
+
+class PartitionedFeatureStore:
+  def __init__(self, store_dir: str, manifest_file_name: str = "manifest.yaml"):
+    '''
+    :param store_dir: Directory of the partitions and the manifest
+    :param manifest_file_name: File name of the manifest inside store_dir
+    '''
+    try:
+      self.store_dir = store_dir
+      self.manifest_file_path = os.path.join(store_dir, manifest_file_name)
+      os.makedirs(store_dir, exist_ok=True)
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+
+  def read_manifest(self) -> dict:
+    '''
+    Returns the manifest, an empty store before the first ingestion.
+    '''
+    try:
+      if not os.path.exists(self.manifest_file_path):
+        return {"watermark": None, "first_object_id": None, "partitions": []}
+      return read_yaml_file(self.manifest_file_path)
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+
+  @property
+  def watermark(self) -> str:
+    '''
+    ObjectId hex string of the last document stored, None for an empty store.
+    '''
+    return self.read_manifest()["watermark"]
+
+  def _write_manifest(self, manifest: dict):
+    write_yaml_file(f"{self.manifest_file_path}.tmp", manifest, replace=True)
+    os.replace(f"{self.manifest_file_path}.tmp", self.manifest_file_path)
+
+  def reset(self):
+    '''
+    Empties the store, the next append starts it over.
+    '''
+    try:
+      partitions = self.read_manifest()["partitions"]
+      # The store is empty as soon as the manifest lists nothing, the files go after
+      self._write_manifest({"watermark": None, "first_object_id": None, "partitions": []})
+      for partition in partitions:
+        file_path = os.path.join(self.store_dir, partition["file"])
+        if os.path.exists(file_path):
+          os.remove(file_path)
+      logging.info(f"Emptied the feature store {self.store_dir}, dropped {len(partitions)} partitions")
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+
+  def append(self, df: pd.DataFrame, watermark: str, first_object_id: str = None) -> dict:
+    '''
+    Stores the rows as a new partition and moves the watermark.
+    :param df: Rows of the documents added after the current watermark
+    :param watermark: ObjectId hex string of the last of these documents
+    :param first_object_id: ObjectId hex string of the first document, recorded when the store is empty
+    :return: Manifest entry of the partition
+    '''
+    try:
+      manifest = self.read_manifest()
+      if not manifest["partitions"]:
+        manifest["first_object_id"] = first_object_id
+      file_name = f"part-{len(manifest['partitions']):06d}.parquet"
+      file_path = os.path.join(self.store_dir, file_name)
+      df.to_parquet(f"{file_path}.tmp", index=False)
+      os.replace(f"{file_path}.tmp", file_path)
+
+      partition = {
+        "file": file_name,
+        "n_rows": len(df),
+        "watermark": watermark,
+        "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+      }
+      manifest["partitions"].append(partition)
+      manifest["watermark"] = watermark
+      # The partition only becomes part of the store once the manifest lists it
+      self._write_manifest(manifest)
+      logging.info(f"Appended {len(df)} rows to the feature store as {file_name}, watermark {watermark}")
+      return partition
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+
+  def read(self) -> pd.DataFrame:
+    '''
+    Reads every partition listed in the manifest, in append order.
+    '''
+    try:
+      partitions = self.read_manifest()["partitions"]
+      if not partitions:
+        raise ValueError(f"The feature store {self.store_dir} is empty")
+      frames = [pd.read_parquet(os.path.join(self.store_dir, partition["file"])) for partition in partitions]
+      return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
@@ -0,0 +1,85 @@
+'''
+Import-time budget check for the serving entry point.
+Imports a module in a fresh interpreter with -X importtime and fails when
+the cumulative import time exceeds the budget, or when a training-only
+module is pulled in.
+
+Usage:
+  python -m src.utils.main_utils.import_budget --module app --budget-ms 2500
+'''
+import os, sys
+import argparse
+import subprocess
+
+from src.exception.exception import NetworkSecurityException
+
+# Modules the serving path must only load on first use
+SERVING_FORBIDDEN_MODULES: tuple = (
+  "mlflow",
+  "pymongo",
+  "src.components",
+  "src.pipeline.training_pipeline",
+  "sklearn.model_selection",
+)
+SERVING_IMPORT_BUDGET_MS: int = int(os.getenv("SERVING_IMPORT_BUDGET_MS", 2500))
+
+def measure_import_time(module: str) -> dict:
+  '''
+  Imports a module in a fresh interpreter and parses the -X importtime report.
+  :param module: Dotted name of the module to import
+  :return: Dictionary from imported module name to its cumulative import time in microseconds
+  '''
+  try:
+    result = subprocess.run(
+      [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+      capture_output=True, text=True, cwd=os.getcwd()
+    )
+    if result.returncode != 0:
+      raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    import_times = {}
+    for line in result.stderr.splitlines():
+      if not line.startswith("import time:") or "cumulative" in line:
+        continue
+      _, cumulative, name = line[len("import time:"):].split("|")
+      import_times[name.strip()] = int(cumulative)
+    return import_times
+  except Exception as e:
+    raise NetworkSecurityException(e, sys)
+
+def check_import_budget(module: str, budget_ms: int = SERVING_IMPORT_BUDGET_MS,
+  forbidden_modules: tuple = SERVING_FORBIDDEN_MODULES) -> list:
+  '''
+  Checks the import time and the imported modules against the budget.
+  :param module: Dotted name of the module to import
+  :param budget_ms: Maximum cumulative import time in milliseconds
+  :param forbidden_modules: Module prefixes that must not be imported
+  :return: List of violations, empty when the budget holds
+  '''
+  try:
+    import_times = measure_import_time(module)
+    violations = []
+
+    total_ms = import_times.get(module, 0) / 1000
+    if total_ms > budget_ms:
+      violations.append(f"import {module} took {total_ms:.0f}ms, budget is {budget_ms}ms")
+
+    for name in sorted(import_times):
+      if any(name == prefix or name.startswith(prefix + ".") for prefix in forbidden_modules):
+        violations.append(f"import {module} loaded {name}")
+    return violations
+  except Exception as e:
+    raise NetworkSecurityException(e, sys)
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Fail when importing a module exceeds its import-time budget")
+  parser.add_argument("--module", default="app", help="Module to import")
+  parser.add_argument("--budget-ms", type=int, default=SERVING_IMPORT_BUDGET_MS, help="Cumulative import time budget")
+  args = parser.parse_args()
+
+  violations = check_import_budget(args.module, args.budget_ms)
+  for violation in violations:
+    print(violation)
+  if violations:
+    sys.exit(1)
+  print(f"import {args.module} is within its budget of {args.budget_ms}ms")
@@ -0,0 +1,120 @@
+'''
+Request and response formats for the prediction API.
+Reads uploaded feature tables from CSV, Parquet or Arrow IPC and encodes
+the prediction vector as Arrow IPC, raw int8 bytes, msgpack, JSON or CSV.
+'''
+import io
+import sys
+import json
+import numpy as np
+import pandas as pd
+
+from src.exception.exception import NetworkSecurityException
+from src.constant.training_pipeline import MODEL_SERVING_PREDICTION_COLUMN
+
+HTML_MEDIA_TYPE: str = "text/html"
+CSV_MEDIA_TYPE: str = "text/csv"
+JSON_MEDIA_TYPE: str = "application/json"
+INT8_MEDIA_TYPE: str = "application/octet-stream"
+MSGPACK_MEDIA_TYPE: str = "application/msgpack"
+ARROW_STREAM_MEDIA_TYPE: str = "application/vnd.apache.arrow.stream"
+ARROW_FILE_MEDIA_TYPE: str = "application/vnd.apache.arrow.file"
+PARQUET_MEDIA_TYPE: str = "application/vnd.apache.parquet"
+
+# Response media types in order of preference, aliases map to the canonical type
+RESPONSE_MEDIA_TYPES: dict = {
+  HTML_MEDIA_TYPE: HTML_MEDIA_TYPE,
+  ARROW_STREAM_MEDIA_TYPE: ARROW_STREAM_MEDIA_TYPE,
+  INT8_MEDIA_TYPE: INT8_MEDIA_TYPE,
+  MSGPACK_MEDIA_TYPE: MSGPACK_MEDIA_TYPE,
+  "application/x-msgpack": MSGPACK_MEDIA_TYPE,
+  JSON_MEDIA_TYPE: JSON_MEDIA_TYPE,
+  CSV_MEDIA_TYPE: CSV_MEDIA_TYPE,
+}
+
+# negotiate_media_type function created to pick the response format from the Accept header
+def negotiate_media_type(accept: str, default: str = HTML_MEDIA_TYPE) -> str:
+  '''
+  Picks the response media type with the highest quality in the Accept header.
+  :param accept: Value of the Accept header
+  :param default: Media type returned when anything is accepted
+  :return: Canonical media type, the default when anything is accepted, None if nothing is supported
+  '''
+  try:
+    if not accept:
+      return default
+    best_media_type, best_quality = None, 0.0
+    for part in accept.split(","):
+      media_range, *parameters = [item.strip() for item in part.split(";")]
+      quality = 1.0
+      for parameter in parameters:
+        if parameter.startswith("q="):
+          # A malformed quality excludes the range instead of failing the request
+          try:
+            quality = min(max(float(parameter[2:]), 0.0), 1.0)
+          except ValueError:
+            quality = 0.0
+      if media_range in ("*/*", "text/*"):
+        media_type = default
+      else:
+        media_type = RESPONSE_MEDIA_TYPES.get(media_range.lower())
+      if media_type is not None and quality > best_quality:
+        best_media_type, best_quality = media_type, quality
+    return best_media_type
+  except Exception as e:
+    raise NetworkSecurityException(e, sys)
+
+# read_input_frame function created to read an uploaded feature table of any supported format
+def read_input_frame(file_obj, content_type: str = None, filename: str = None) -> pd.DataFrame:
+  '''
+  Reads an uploaded feature table, the format is taken from the content type or file extension.
+  :param file_obj: File-like object of the upload
+  :param content_type: Content type of the upload
+  :param filename: File name of the upload
+  :return: DataFrame of the uploaded features
+  '''
+  try:
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    filename = (filename or "").lower()
+    if content_type in (PARQUET_MEDIA_TYPE, "application/x-parquet") or filename.endswith(".parquet"):
+      return pd.read_parquet(file_obj)
+    if content_type in (ARROW_STREAM_MEDIA_TYPE, ARROW_FILE_MEDIA_TYPE) or filename.endswith((".arrow", ".arrows", ".feather")):
+      import pyarrow as pa
+      source = pa.py_buffer(file_obj.read())
+      try:
+        return pa.ipc.open_stream(source).read_pandas()
+      except pa.ArrowInvalid:
+        return pa.ipc.open_file(source).read_pandas()
+    return pd.read_csv(file_obj)
+  except Exception as e:
+    raise NetworkSecurityException(e, sys)
+
+# encode_predictions function created to serialize only the prediction vector
+def encode_predictions(y_pred: np.ndarray, media_type: str) -> bytes:
+  '''
+  Encodes the predictions in the requested binary, JSON or CSV format.
+  :param y_pred: Predicted class labels
+  :param media_type: Canonical response media type
+  :return: Encoded response body
+  '''
+  try:
+    labels = np.asarray(y_pred).astype("<i1")
+    if media_type == INT8_MEDIA_TYPE:
+      return labels.tobytes()
+    if media_type == ARROW_STREAM_MEDIA_TYPE:
+      import pyarrow as pa
+      table = pa.table({MODEL_SERVING_PREDICTION_COLUMN: pa.array(labels, type=pa.int8())})
+      sink = io.BytesIO()
+      with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+      return sink.getvalue()
+    if media_type == MSGPACK_MEDIA_TYPE:
+      import msgpack
+      return msgpack.packb({MODEL_SERVING_PREDICTION_COLUMN: labels.tolist()})
+    if media_type == JSON_MEDIA_TYPE:
+      return json.dumps({MODEL_SERVING_PREDICTION_COLUMN: labels.tolist()}, separators=(",", ":")).encode()
+    if media_type == CSV_MEDIA_TYPE:
+      return pd.DataFrame({MODEL_SERVING_PREDICTION_COLUMN: labels}).to_csv(index=False).encode()
+    raise ValueError(f"Unsupported response media type {media_type}")
+  except Exception as e:
+    raise NetworkSecurityException(e, sys)
@@ -0,0 +1,104 @@
+'''
+Content-addressed memoization of training pipeline stages.
+A stage's artifact is recorded under a hash of its inputs and config, so a
+later run with the same inputs reuses the earlier artifact instead of
+running the stage again. Stages are recorded as they complete, which also
+lets a failed run resume from the last completed stage.
+'''
+import os, sys
+import hashlib
+import dataclasses
+
+from src.exception.exception import NetworkSecurityException
+from src.logging.logger import logging
+from src.utils.main_utils.utils import read_yaml_file, write_yaml_file
+
+# Bytes read at a time when hashing files
+STAGE_CACHE_HASH_BLOCK_SIZE: int = 1024 * 1024
+
+def hash_files(*file_paths: str) -> str:
+  '''
+  Hashes the content of files.
+  :param file_paths: Paths of the files to hash, in a fixed order
+  :return: Hex digest of the files
+  '''
+  try:
+    digest = hashlib.sha256()
+    for file_path in file_paths:
+      with open(file_path, "rb") as file:
+        for block in iter(lambda: file.read(STAGE_CACHE_HASH_BLOCK_SIZE), b""):
+          digest.update(block)
+      digest.update(b"\0")
+    return digest.hexdigest()
+  except Exception as e:
+    raise NetworkSecurityException(e, sys)
+
+def hash_sources(*objects) -> str:
+  '''
+  Hashes the source files defining classes or functions, so a code change invalidates their stage.
+  :param objects: Classes, functions or modules
+  :return: Hex digest of their source files
+  '''
+  try:
+    import inspect
+    file_paths = sorted({inspect.getsourcefile(obj) for obj in objects})
+    return hash_files(*file_paths)
+  except Exception as e:
+    raise NetworkSecurityException(e, sys)
+
+def hash_values(*values) -> str:
+  '''
+  Hashes the repr of config values and input hashes.
+  '''
+  return hashlib.sha256(repr(values).encode()).hexdigest()
+
+class StageCache:
+  '''
+  Directory of YAML manifests, one per stage and input hash, holding the
+  stage's artifact fields and the files it produced.
+  '''
+  def __init__(self, cache_dir: str):
+    try:
+      self.cache_dir = cache_dir
+      os.makedirs(cache_dir, exist_ok=True)
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+
+  def _manifest_path(self, stage: str, key: str) -> str:
+    return os.path.join(self.cache_dir, stage, f"{key}.yaml")
+
+  def lookup(self, stage: str, key: str, artifact_class):
+    '''
+    Returns the recorded artifact of a stage if every file it produced still exists.
+    :param stage: Stage name
+    :param key: Hash of the stage's inputs and config
+    :param artifact_class: Dataclass of the stage's artifact
+    :return: The artifact, or None if the stage has to run
+    '''
+    try:
+      manifest_path = self._manifest_path(stage, key)
+      if not os.path.exists(manifest_path):
+        return None
+      manifest = read_yaml_file(manifest_path)
+      missing_files = [file_path for file_path in manifest["files"] if not os.path.exists(file_path)]
+      if missing_files:
+        logging.info(f"Stage {stage} cache entry {key[:12]} is stale, missing {missing_files}")
+        return None
+      logging.info(f"Reusing the {stage} artifact of an earlier run, inputs hash {key[:12]}")
+      return artifact_class(**manifest["artifact"])
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+
+  def store(self, stage: str, key: str, artifact):
+    '''
+    Records the artifact of a completed stage.
+    :param stage: Stage name
+    :param key: Hash of the stage's inputs and config
+    :param artifact: Artifact dataclass returned by the stage
+    '''
+    try:
+      fields = dataclasses.asdict(artifact)
+      files = [value for value in fields.values() if isinstance(value, str) and os.path.isfile(value)]
+      write_yaml_file(self._manifest_path(stage, key), {"artifact": fields, "files": files}, replace=True)
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
@@ -4,14 +4,15 @@ Utility functions for various tasks.
 
 import yaml
 import os,sys
+import time
+import shutil
+import tempfile
 import numpy as np
 import dill
 import pickle
 
 from src.exception.exception import NetworkSecurityException
 from src.logging.logger import logging
-from sklearn.model_selection import GridSearchCV
-from sklearn.metrics import r2_score
 
 # read_yaml_file function created to read a YAML file and return its content
 def read_yaml_file(file_path: str) -> dict:
@@ -72,8 +73,35 @@ def save_object(file_path: str, obj: object) -> None:
   try:
     logging.info(f"Saving object to {file_path}")
     os.makedirs(os.path.dirname(file_path), exist_ok=True)
-    with open(file_path, "wb") as file:
+    
+    # Write to a temporary file first so readers never see a partial pickle
+    tmp_file_path = f"{file_path}.tmp"
+    with open(tmp_file_path, "wb") as file:
       pickle.dump(obj, file)
+    os.replace(tmp_file_path, file_path)
+  except Exception as e:
+    raise NetworkSecurityException(e, sys)
+
+# save_objects_together function created to publish files that are only valid as a set
+def save_objects_together(file_objects: list) -> None:
+  '''
+  Writes every object to a temporary file before replacing any target, then
+  replaces the targets in list order. Readers that treat the last file as the
+  version never see it before the others are in place.
+  :param file_objects: List of (file_path, obj) tuples, the version file last
+  :raises NetworkSecurityException: If an object cannot be saved
+  '''
+  try:
+    tmp_file_paths = []
+    for file_path, obj in file_objects:
+      logging.info(f"Saving object to {file_path}")
+      os.makedirs(os.path.dirname(file_path), exist_ok=True)
+      tmp_file_path = f"{file_path}.tmp"
+      with open(tmp_file_path, "wb") as file:
+        pickle.dump(obj, file)
+      tmp_file_paths.append(tmp_file_path)
+    for (file_path, _), tmp_file_path in zip(file_objects, tmp_file_paths):
+      os.replace(tmp_file_path, file_path)
   except Exception as e:
     raise NetworkSecurityException(e, sys)
 
@@ -88,52 +116,420 @@ def load_object(file_path: str) -> object:
     if not os.path.exists(file_path):
       raise Exception(f"File {file_path} does not exist.")
     with open(file_path, "rb") as file:
-      print(file)
+      logging.info(f"Loading object from {file_path}")
       return pickle.load(file)
   except Exception as e:
     raise NetworkSecurityException(e, sys)
 
 # load numpy array data function created to load a numpy array from a file
-def load_numpy_array_data(file_path: str) -> np.array:
+def load_numpy_array_data(file_path: str, mmap_mode: str = None) -> np.array:
   '''
   Loads a numpy array from a file.
   :param file_path: Path to the file from which the numpy array will be loaded
+  :param mmap_mode: Optional np.load mmap_mode, "r" maps the file instead of reading it into memory
   :return: Loaded numpy array
   :raises NetworkSecurityException: If the file cannot be loaded
   '''
   try:
+    if mmap_mode is not None:
+      return np.load(file_path, mmap_mode=mmap_mode)
     with open(file_path, "rb") as file:
       return np.load(file)
   except Exception as e:
     raise NetworkSecurityException(e, sys)
 
+# load_features_and_target function created to load a transformed split without copying it
+def load_features_and_target(features_file_path: str, target_file_path: str = None, mmap_mode: str = "r") -> tuple:
+  '''
+  Loads the features and target of a transformed split.
+  :param features_file_path: Path to the features array
+  :param target_file_path: Path to the target array, None when the target is the last column of the features file
+  :param mmap_mode: np.load mmap_mode, the default maps the files read-only
+  :return: Tuple of the features array and the target array
+  '''
+  try:
+    features = load_numpy_array_data(features_file_path, mmap_mode=mmap_mode)
+    if target_file_path is None:
+      return features[:, :-1], features[:, -1]
+    return features, load_numpy_array_data(target_file_path, mmap_mode=mmap_mode)
+  except Exception as e:
+    raise NetworkSecurityException(e, sys)
+
+# compact_array function created to store transformed arrays in the smallest exact dtype
+def compact_array(array: np.array) -> np.array:
+  '''
+  Casts an array to int8 when every value is a whole number in the int8 range,
+  otherwise to float32, which also keeps NaN values.
+  :param array: Numeric array
+  :return: int8 or float32 array
+  '''
+  try:
+    array = np.asarray(array)
+    if np.issubdtype(array.dtype, np.integer) or (
+      np.isfinite(array).all() and np.array_equal(array, np.round(array))
+    ):
+      if array.size == 0 or (array.min() >= np.iinfo(np.int8).min and array.max() <= np.iinfo(np.int8).max):
+        return array.astype(np.int8, copy=False)
+    return array.astype(np.float32, copy=False)
+  except Exception as e:
+    raise NetworkSecurityException(e, sys)
+
+# _supports_ladder function created to find ensembles whose n_estimators grid can share one fit
+def _supports_ladder(model) -> bool:
+  '''
+  Checks whether the score of the first n estimators can be read off one fitted ensemble.
+  :param model: Unfitted estimator
+  :return: True for forests and for boosting models with staged predictions
+  '''
+  from sklearn.ensemble import RandomForestClassifier, ExtraTreesClassifier
+  if "n_estimators" not in model.get_params():
+    return False
+  return hasattr(model, "staged_predict") or isinstance(model, (RandomForestClassifier, ExtraTreesClassifier))
+
+# _staged_scores function created to score every step of an n_estimators ladder on one ensemble
+def _staged_scores(estimator, X, y, n_estimators_ladder: list) -> list:
+  '''
+  Scores the first n estimators of a fitted ensemble for every n of the ladder.
+  The seeds of the estimators are drawn in order, so the first n estimators are
+  the ones a fresh fit with n_estimators=n builds.
+  :param estimator: Ensemble fitted with the largest n of the ladder
+  :param X: Held-out features
+  :param y: Held-out labels
+  :param n_estimators_ladder: Ensemble sizes to score
+  :return: Accuracy for every ensemble size of the ladder
+  '''
+  steps = set(n_estimators_ladder)
+  stage_scores = {}
+  if hasattr(estimator, "staged_predict"):
+    for n_estimators, y_pred in enumerate(estimator.staged_predict(X), start=1):
+      if n_estimators in steps:
+        stage_scores[n_estimators] = float(np.mean(y_pred == y))
+  else:
+    # Same summation order as the forest's predict_proba
+    X = np.asarray(X, dtype=np.float32)
+    proba = np.zeros((len(X), len(estimator.classes_)))
+    for n_estimators, tree in enumerate(estimator.estimators_, start=1):
+      proba += tree.predict_proba(X)
+      if n_estimators in steps:
+        y_pred = estimator.classes_.take(np.argmax(proba / n_estimators, axis=1))
+        stage_scores[n_estimators] = float(np.mean(y_pred == y))
+  # Boosting stops early on a perfect fit, larger ensembles would stop at the same stage
+  last_score = stage_scores[max(stage_scores)] if stage_scores else float("nan")
+  return [stage_scores.get(n_estimators, last_score) for n_estimators in n_estimators_ladder]
+
+# _fit_and_score function created as the unit of work of the parallel model search
+def _fit_and_score(model, params: dict, X, y, train_index, test_index, n_estimators_ladder: list = None):
+  '''
+  Fits one parameter candidate on one CV fold and scores it on the held-out part.
+  With an n_estimators ladder, one ensemble of the largest size is fitted and
+  every size of the ladder is scored on it.
+  :param model: Unfitted estimator, cloned before fitting
+  :param params: Parameters of the candidate
+  :param X: Training features, usually a read-only memory map
+  :param y: Training labels
+  :param train_index: Row indices of the fold's training part
+  :param test_index: Row indices of the fold's held-out part
+  :param n_estimators_ladder: Optional ensemble sizes to score on a single fit
+  :return: Tuple of the held-out scores (one per ladder step) and the fit time in seconds
+  '''
+  from sklearn.base import clone
+  start_time = time.perf_counter()
+  estimator = clone(model).set_params(**params)
+  if n_estimators_ladder is not None:
+    estimator.set_params(n_estimators=max(n_estimators_ladder))
+  estimator.fit(X[train_index], y[train_index])
+  if n_estimators_ladder is not None:
+    scores = _staged_scores(estimator, X[test_index], y[test_index], n_estimators_ladder)
+  else:
+    scores = [estimator.score(X[test_index], y[test_index])]
+  return scores, time.perf_counter() - start_time
+
+# _refit function created to fit the winning candidate of a model on the full training data
+def _refit(model, params: dict, X, y):
+  '''
+  Fits a clone of the model with the given parameters on all training rows.
+  :return: Tuple of the fitted estimator and the fit time in seconds
+  '''
+  from sklearn.base import clone
+  start_time = time.perf_counter()
+  estimator = clone(model).set_params(**params)
+  estimator.fit(X, y)
+  return estimator, time.perf_counter() - start_time
+
+# _score_candidates function created to cross-validate candidates of several models in one batch
+def _score_candidates(parallel, models: dict, candidates: dict, folds: dict, fraction: float, X, y,
+  cv_cache=None, data_hash: str = None):
+  '''
+  Cross-validates the given candidates of every model on one shared worker pool.
+  :param parallel: Open joblib.Parallel instance
+  :param models: Dictionary of model name to unfitted estimator
+  :param candidates: Dictionary of model name to the parameter candidates to score
+  :param folds: Dictionary of model name to (shuffled train indices, test indices) per fold
+  :param fraction: Share of each training fold to fit on
+  :param X: Training features
+  :param y: Training labels
+  :param cv_cache: Optional CVResultCache holding fold scores of earlier runs
+  :param data_hash: Hash of X and y, required with cv_cache
+  :return: Tuple of the mean fold score per candidate, the summed fit seconds and the fit seconds
+    per candidate, keyed by model name
+  '''
+  from joblib import delayed
+  from src.utils.ml_utils.model.cv_cache import CVResultCache, hash_arrays, hash_estimator
+  
+  fold_scores = {model_name: [[] for _ in model_candidates] for model_name, model_candidates in candidates.items()}
+  fit_seconds = dict.fromkeys(candidates, 0.0)
+  candidate_seconds = {model_name: [0.0] * len(model_candidates) for model_name, model_candidates in candidates.items()}
+  tasks = []
+  for model_name, model_candidates in candidates.items():
+    # Candidates that only differ in n_estimators share one fit per fold
+    ladders = {}
+    supports_ladder = _supports_ladder(models[model_name])
+    for candidate_index, params in enumerate(model_candidates):
+      if supports_ladder and "n_estimators" in params:
+        base_params = {name: value for name, value in params.items() if name != "n_estimators"}
+        ladders.setdefault(repr(sorted(base_params.items())), (base_params, [], True))[1].append(candidate_index)
+      else:
+        ladders[candidate_index] = (params, [candidate_index], False)
+    
+    estimator_hashes = [
+      hash_estimator(models[model_name], params) if cv_cache is not None else None
+      for params in model_candidates
+    ]
+    for base_params, candidate_indices, is_ladder in ladders.values():
+      for train_index, test_index in folds[model_name]:
+        # Shuffled once, so smaller subsets are nested in the larger ones
+        n_train = max(1, int(round(len(train_index) * fraction)))
+        fold_train_index = np.sort(train_index[:n_train])
+        keys = [None] * len(candidate_indices)
+        if cv_cache is not None:
+          fold_hash = hash_arrays(fold_train_index, test_index)
+          keys = [CVResultCache.make_key("cv", data_hash, estimator_hashes[i], fold_hash) for i in candidate_indices]
+          pending = []
+          for candidate_index, key in zip(candidate_indices, keys):
+            cached = cv_cache.get(key)
+            if cached is not None:
+              fold_scores[model_name][candidate_index].append(cached["score"])
+              candidate_seconds[model_name][candidate_index] += cached["fit_seconds"]
+            else:
+              pending.append((candidate_index, key))
+          if not pending:
+            continue
+          candidate_indices, keys = [list(items) for items in zip(*pending)]
+        
+        ladder = [model_candidates[i]["n_estimators"] for i in candidate_indices] if is_ladder else None
+        tasks.append((model_name, candidate_indices, base_params, ladder, fold_train_index, test_index, keys))
+  # Dispatch the largest ensembles first so they do not straggle at the end
+  tasks.sort(key=lambda task: -max(task[3] or [task[2].get("n_estimators", 0)]))
+
+  results = parallel(
+    delayed(_fit_and_score)(models[model_name], params, X, y, train_index, test_index, ladder)
+    for model_name, _, params, ladder, train_index, test_index, _ in tasks
+  )
+  for (model_name, candidate_indices, _, _, _, _, keys), (scores, seconds) in zip(tasks, results):
+    fit_seconds[model_name] += seconds
+    for candidate_index, key, score in zip(candidate_indices, keys, scores):
+      fold_scores[model_name][candidate_index].append(score)
+      # A shared ladder fit is split evenly over its candidates
+      candidate_seconds[model_name][candidate_index] += seconds / len(candidate_indices)
+      if cv_cache is not None:
+        cv_cache.put(key, {"score": score, "fit_seconds": seconds / len(candidate_indices)})
+  mean_scores = {model_name: [float(np.mean(scores)) for scores in model_scores] for model_name, model_scores in fold_scores.items()}
+  return mean_scores, fit_seconds, candidate_seconds
+
 # evaluate models function created to evaluate multiple models and return the best one
 def evaluate_models(
   X_train, y_train, 
   X_test, y_test, 
-  models, param):
+  models, param,
+  cv: int = 3, n_jobs: int = -1,
+  search_strategy: str = "grid", halving_factor: int = 3,
+  min_samples: int = 500, time_budget_seconds: float = None,
+  cache_dir: str = None, cache_max_bytes: int = 2 * 1024 ** 3,
+  search_results: list = None):
   '''
   Evaluates multiple machine learning models and returns the best one based on accuracy.
+  Every (model, parameter candidate, CV fold) triple is one task, and all tasks of
+  all models are scheduled together on a process pool. The training arrays are
+  dumped once and memory-mapped by the workers instead of being pickled per task.
+  The models dictionary is updated in place with the refitted best estimators.
+
+  With the "halving" strategy the candidates are raced by successive halving:
+  every rung fits the survivors on a growing share of each training fold and
+  keeps the best 1/halving_factor of them, and the last rung uses the full folds.
+  Models with fewer candidates join at a later rung, so all models finish on full data.
+
+  With a cache_dir, fold scores and refitted estimators are kept on disk under a
+  hash of the training data, the estimator class and its full parameters, so
+  unchanged candidates are restored instead of refit on the next run.
   :param X_train: Training features
   :param y_train: Training labels
   :param X_test: Testing features
   :param y_test: Testing labels
   :param models: Dictionary of models to evaluate
   :param params: Dictionary of parameters for each model
-  :return: Tuple containing the best model, its name, and the accuracy score
+  :param cv: Number of cross-validation folds
+  :param n_jobs: Number of worker processes, -1 uses every core
+  :param search_strategy: "grid" for an exhaustive search or "halving" for successive halving
+  :param halving_factor: Share of candidates dropped per rung and growth of the fold size
+  :param min_samples: Smallest number of training rows per fold in the first rung
+  :param time_budget_seconds: Once exceeded, the halving search scores the families that have not
+    raced yet on the current rung, then stops and refits the leader of every family
+  :param cache_dir: Directory of the CV result cache, None disables caching
+  :param cache_max_bytes: Size above which the least recently used cache entries are evicted
+  :param search_results: Optional list, extended with the params, rung, mean CV score and fit
+    seconds of every candidate, for experiment tracking. Single candidates are not
+    cross-validated, their mean CV score is None and fit seconds is the refit time
+  :return: Dictionary of model name to test score of its best candidate
   '''
   try:
-    report = {}
-  
-    for i in range(len(list(models))):
-      model = list(models.values())[i]
-      params = param[list(models.keys())[i]]
+    # Training-only dependencies, kept out of the serving import path
+    import joblib
+    from sklearn.model_selection import ParameterGrid, check_cv
+    from sklearn.base import is_classifier
+    from sklearn.metrics import r2_score
+    
+    from src.utils.ml_utils.model.cv_cache import CVResultCache, hash_arrays, hash_estimator
+    
+    if search_strategy not in ("grid", "halving"):
+      raise ValueError(f"Unknown search strategy {search_strategy}, expected 'grid' or 'halving'")
+    
+    start_time = time.perf_counter()
+    cv_cache = CVResultCache(cache_dir, cache_max_bytes) if cache_dir else None
+    data_hash = hash_arrays(X_train, y_train) if cv_cache is not None else None
+    temp_dir = tempfile.mkdtemp(prefix="evaluate_models_")
+    try:
+      # Workers open the same pages instead of receiving a copy per task,
+      # arrays loaded with mmap_mode are already backed by a file
+      if isinstance(X_train, np.memmap) and isinstance(y_train, np.memmap):
+        X_shared, y_shared = X_train, y_train
+      else:
+        joblib.dump((np.ascontiguousarray(X_train), np.ascontiguousarray(y_train)), os.path.join(temp_dir, "train.joblib"))
+        X_shared, y_shared = joblib.load(os.path.join(temp_dir, "train.joblib"), mmap_mode="r")
       
-      gs = GridSearchCV(model, params, cv=3)
-      gs.fit(X_train, y_train)
+      random_state = np.random.RandomState(0)
+      candidates, folds = {}, {}
+      for model_name, model in models.items():
+        candidates[model_name] = list(ParameterGrid(param[model_name]))
+        folds[model_name] = [
+          (random_state.permutation(train_index), test_index)
+          for train_index, test_index in check_cv(cv, y_train, classifier=is_classifier(model)).split(X_train, y_train)
+        ]
       
-      model.set_params(**gs.best_params_)
-      model.fit(X_train, y_train)
+      # Rungs each model needs to get down to a single candidate, capped by how
+      # often the fold size can grow by halving_factor starting from min_samples
+      n_train_fold = min(len(train_index) for model_folds in folds.values() for train_index, _ in model_folds)
+      if search_strategy == "halving":
+        max_rungs = int(np.floor(np.log(max(n_train_fold / min_samples, 1)) / np.log(halving_factor))) + 1
+        model_rungs = {
+          model_name: min(max_rungs, int(np.ceil(np.log(len(model_candidates)) / np.log(halving_factor) - 1e-9)))
+          for model_name, model_candidates in candidates.items()
+        }
+      else:
+        model_rungs = {model_name: 1 for model_name in candidates}
+      n_rungs = max(model_rungs.values())
+      # Families with a single candidate skip the search and go straight to the refit
+      single_candidate_models = [model_name for model_name, model_candidates in candidates.items() if len(model_candidates) == 1]
+      logging.info(f"Evaluating {len(models)} models with a {search_strategy} search, {n_rungs} rungs, n_jobs={n_jobs}")
+      
+      # Worker seconds summed over every fit of a model, not wall-clock time, as the
+      # fits of all models run interleaved on the same pool
+      fit_seconds = dict.fromkeys(models, 0.0)
+      n_fits = 0
+      with joblib.Parallel(n_jobs=n_jobs, backend="loky", max_nbytes=None) as parallel:
+        for rung in range(n_rungs):
+          remaining_rungs = n_rungs - rung
+          rung_candidates = {
+            model_name: model_candidates for model_name, model_candidates in candidates.items()
+            if len(model_candidates) > 1 and model_rungs[model_name] >= remaining_rungs
+          }
+          if not rung_candidates:
+            continue
+          # The fold share grows by halving_factor per rung and reaches 1 at the last rung
+          fraction = float(halving_factor) ** -(remaining_rungs - 1)
+          mean_scores, rung_seconds, candidate_seconds = _score_candidates(
+            parallel, models, rung_candidates, folds, fraction, X_shared, y_shared,
+            cv_cache=cv_cache, data_hash=data_hash
+          )
+          
+          over_budget = time_budget_seconds is not None and time.perf_counter() - start_time > time_budget_seconds
+          if over_budget:
+            # Families that would join at a later rung are scored once on this rung's
+            # fold share, so the leader of every family has a CV score before the refit
+            unraced_candidates = {
+              model_name: model_candidates for model_name, model_candidates in candidates.items()
+              if len(model_candidates) > 1 and model_name not in rung_candidates
+            }
+            if unraced_candidates:
+              unraced_results = _score_candidates(
+                parallel, models, unraced_candidates, folds, fraction, X_shared, y_shared,
+                cv_cache=cv_cache, data_hash=data_hash
+              )
+              for rung_results, family_results in zip((mean_scores, rung_seconds, candidate_seconds), unraced_results):
+                rung_results.update(family_results)
+              rung_candidates.update(unraced_candidates)
+          for model_name, scores in mean_scores.items():
+            fit_seconds[model_name] += rung_seconds[model_name]
+            n_fits += len(scores) * len(folds[model_name])
+            # Stable ordering keeps ties on the earlier candidate, as in GridSearchCV
+            ranking = np.argsort(-np.asarray(scores), kind="stable")
+            # Drop more than 1 - 1/halving_factor per rung when the rungs were capped
+            n_keep = 1 if over_budget else int(np.ceil(len(scores) / max(halving_factor, len(scores) ** (1 / remaining_rungs))))
+            candidates[model_name] = [rung_candidates[model_name][i] for i in ranking[:n_keep]]
+            if search_results is not None:
+              search_results.extend(
+                {
+                  "model_name": model_name,
+                  "params": params,
+                  "rung": rung,
+                  "train_fraction": fraction,
+                  "mean_cv_score": score,
+                  "fit_seconds": seconds,
+                  "rank": int(rank),
+                }
+                for params, score, seconds, rank in zip(
+                  rung_candidates[model_name], scores, candidate_seconds[model_name], np.argsort(ranking) + 1
+                )
+              )
+            logging.info(
+              f"Rung {rung} ({fraction:.0%} of each fold): {model_name} kept {n_keep} of {len(scores)} candidates, "
+              f"best CV score {scores[ranking[0]]:.4f}"
+            )
+          if over_budget:
+            logging.info(f"Search time budget of {time_budget_seconds}s exceeded, refitting the current leaders")
+            break
+        
+        search_seconds = time.perf_counter() - start_time
+        best_params = {model_name: model_candidates[0] for model_name, model_candidates in candidates.items()}
+        refits, refit_keys = {}, {}
+        for model_name in models:
+          if cv_cache is not None:
+            refit_keys[model_name] = CVResultCache.make_key("refit", data_hash, hash_estimator(models[model_name], best_params[model_name]))
+            cached = cv_cache.get(refit_keys[model_name])
+            if cached is not None:
+              refits[model_name] = (cached, 0.0)
+        pending_refits = [model_name for model_name in models if model_name not in refits]
+        refit_start_time = time.perf_counter()
+        results = parallel(
+          joblib.delayed(_refit)(models[model_name], best_params[model_name], X_shared, y_shared)
+          for model_name in pending_refits
+        )
+        for model_name, (model, refit_seconds) in zip(pending_refits, results):
+          refits[model_name] = (model, refit_seconds)
+          if cv_cache is not None:
+            cv_cache.put(refit_keys[model_name], model)
+        refit_wall_seconds = time.perf_counter() - refit_start_time
+    finally:
+      shutil.rmtree(temp_dir, ignore_errors=True)
+    
+    if cv_cache is not None:
+      cv_cache.evict()
+      logging.info(f"CV cache {cv_cache.cache_dir}: {cv_cache.stats()}")
+    
+    report = {}
+    for model_name in models:
+      model, refit_seconds = refits[model_name]
+      models[model_name] = model
+      fit_seconds[model_name] += refit_seconds
       
       y_train_pred = model.predict(X_train)
       y_test_pred = model.predict(X_test)
@@ -141,7 +537,25 @@ def evaluate_models(
       train_model_score = r2_score(y_train, y_train_pred)
       test_model_score = r2_score(y_test, y_test_pred)
       
-      report[list(models.keys())[i]] = test_model_score
+      report[model_name] = test_model_score
+      if search_results is not None and model_name in single_candidate_models:
+        search_results.append({
+          "model_name": model_name,
+          "params": best_params[model_name],
+          "rung": 0,
+          "train_fraction": 1.0,
+          "mean_cv_score": None,
+          "fit_seconds": refit_seconds,
+          "rank": 1,
+        })
+      logging.info(
+        f"{model_name}: best params {best_params[model_name]}, "
+        f"test score {test_model_score:.4f}, summed fit time {fit_seconds[model_name]:.1f}s"
+      )
+    logging.info(
+      f"Evaluated {len(models)} models with {n_fits} CV fits in {time.perf_counter() - start_time:.1f}s wall-clock, "
+      f"{search_seconds:.1f}s searching and {refit_wall_seconds:.1f}s refitting"
+    )
     return report
   except Exception as e:
-    raise NetworkSecurityException(e, sys)
\ No newline at end of file
+    raise NetworkSecurityException(e, sys)
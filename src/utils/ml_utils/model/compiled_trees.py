@@ -0,0 +1,162 @@
+'''
+Array-compiled inference for fitted scikit-learn tree models.
+The trees of a Decision Tree, Random Forest or Gradient Boosting classifier
+are flattened into contiguous node arrays and traversed for all trees at
+once with NumPy, instead of looping over the estimators one by one.
+'''
+import sys
+import numpy as np
+
+from src.exception.exception import NetworkSecurityException
+
+# Number of rows traversed at once, bounds the (rows, trees) working arrays
+COMPILED_TREES_CHUNK_SIZE: int = 1024
+
+class CompiledTreeEnsemble:
+  '''
+  Flat node-array representation of a fitted tree classifier.
+  Leaves point to themselves, so every row can take the same number of
+  steps (the maximum tree depth) without per-tree bookkeeping.
+  '''
+  def __init__(self, model):
+    '''
+    Compiles the fitted model into node arrays.
+    :param model: Fitted DecisionTreeClassifier, RandomForestClassifier,
+      ExtraTreesClassifier or GradientBoostingClassifier
+    :raises NetworkSecurityException: If the model is not supported
+    '''
+    try:
+      if not CompiledTreeEnsemble.is_supported(model):
+        raise ValueError(f"Model {type(model).__name__} cannot be compiled")
+
+      from sklearn.ensemble import GradientBoostingClassifier
+      from sklearn.tree import DecisionTreeClassifier
+
+      self.classes_ = model.classes_
+      self.n_features_in_ = model.n_features_in_
+      if isinstance(model, GradientBoostingClassifier):
+        self.kind = "boosting"
+        trees = [estimator.tree_ for estimator in model.estimators_.ravel()]
+        self.n_outputs = model.estimators_.shape[1]
+        # Trees are stored stage by stage, one per class
+        self.tree_output = np.tile(np.arange(self.n_outputs), model.estimators_.shape[0])
+        init = np.zeros((1, self.n_features_in_), dtype=np.float32)
+        self.init_raw = model._raw_predict_init(init)[0]
+        leaf_values = [model.learning_rate * tree.value[:, 0, 0] for tree in trees]
+      else:
+        self.kind = "forest"
+        estimators = [model] if isinstance(model, DecisionTreeClassifier) else model.estimators_
+        trees = [estimator.tree_ for estimator in estimators]
+        self.n_outputs = len(self.classes_)
+        leaf_values = []
+        for tree in trees:
+          value = tree.value[:, 0, :]
+          normalizer = value.sum(axis=1, keepdims=True)
+          normalizer[normalizer == 0.0] = 1.0
+          leaf_values.append(value / normalizer)
+
+      self._flatten(trees, leaf_values)
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+
+  @staticmethod
+  def is_supported(model) -> bool:
+    '''
+    Checks whether the model can be compiled.
+    :param model: Fitted estimator
+    :return: True if the model is a supported single-output tree classifier
+    '''
+    # Imported on first use, the serving process only pays for sklearn when a model loads
+    from sklearn.dummy import DummyClassifier
+    from sklearn.ensemble import RandomForestClassifier, ExtraTreesClassifier, GradientBoostingClassifier
+    from sklearn.tree import DecisionTreeClassifier
+
+    if isinstance(model, (DecisionTreeClassifier, RandomForestClassifier, ExtraTreesClassifier)):
+      return hasattr(model, "classes_") and getattr(model, "n_outputs_", 1) == 1
+    if isinstance(model, GradientBoostingClassifier):
+      # Only constant initial predictions can be folded into the arrays
+      init = getattr(model, "init_", None)
+      return hasattr(model, "estimators_") and (init == "zero" or isinstance(init, DummyClassifier))
+    return False
+
+  def _flatten(self, trees: list, leaf_values: list):
+    '''
+    Concatenates the node arrays of all trees with global node indices.
+    :param trees: List of sklearn Tree objects
+    :param leaf_values: Per-tree node values to accumulate at the leaves
+    '''
+    offsets = np.cumsum([0] + [tree.node_count for tree in trees])
+    features, thresholds, lefts, rights, missing_left = [], [], [], [], []
+    for offset, tree in zip(offsets, trees):
+      node_ids = np.arange(tree.node_count) + offset
+      is_leaf = tree.children_left == -1
+      features.append(np.where(is_leaf, 0, tree.feature))
+      thresholds.append(tree.threshold)
+      lefts.append(np.where(is_leaf, node_ids, tree.children_left + offset))
+      rights.append(np.where(is_leaf, node_ids, tree.children_right + offset))
+      if hasattr(tree, "missing_go_to_left"):
+        missing_left.append(tree.missing_go_to_left.astype(bool))
+      else:
+        missing_left.append(np.zeros(tree.node_count, dtype=bool))
+
+    self.roots = np.ascontiguousarray(offsets[:-1], dtype=np.intp)
+    self.feature = np.ascontiguousarray(np.concatenate(features), dtype=np.intp)
+    self.threshold = np.ascontiguousarray(np.concatenate(thresholds), dtype=np.float64)
+    self.children_left = np.ascontiguousarray(np.concatenate(lefts), dtype=np.intp)
+    self.children_right = np.ascontiguousarray(np.concatenate(rights), dtype=np.intp)
+    self.missing_go_to_left = np.concatenate(missing_left)
+    self.value = np.ascontiguousarray(np.concatenate(leaf_values), dtype=np.float64)
+    self.max_depth = max(tree.max_depth for tree in trees)
+
+  def apply(self, X: np.ndarray) -> np.ndarray:
+    '''
+    Finds the leaf reached by every row in every tree.
+    :param X: Input features of shape (n_samples, n_features)
+    :return: Global leaf indices of shape (n_samples, n_trees)
+    '''
+    # sklearn compares float32 inputs against float64 thresholds
+    X = np.asarray(X, dtype=np.float32)
+    has_missing = np.isnan(X).any()
+    rows = np.arange(X.shape[0])[:, None]
+    nodes = np.broadcast_to(self.roots, (X.shape[0], len(self.roots))).copy()
+    for _ in range(self.max_depth):
+      x = X[rows, self.feature[nodes]]
+      go_left = x <= self.threshold[nodes]
+      if has_missing:
+        go_left |= np.isnan(x) & self.missing_go_to_left[nodes]
+      nodes = np.where(go_left, self.children_left[nodes], self.children_right[nodes])
+    return nodes
+
+  def _predict_chunk(self, X: np.ndarray) -> np.ndarray:
+    '''
+    Computes the class scores for a chunk of rows.
+    :param X: Input features
+    :return: Class probabilities for forests or raw scores for boosting
+    '''
+    leaves = self.apply(X)
+    if self.kind == "forest":
+      return self.value[leaves].sum(axis=1) / leaves.shape[1]
+    raw = np.tile(self.init_raw, (X.shape[0], 1))
+    for output in range(self.n_outputs):
+      raw[:, output] += self.value[leaves[:, self.tree_output == output]].sum(axis=1)
+    return raw
+
+  def predict(self, X) -> np.ndarray:
+    '''
+    Predicts the class labels, matching the compiled sklearn model.
+    :param X: Input features
+    :return: Predicted class labels
+    '''
+    try:
+      X = np.asarray(X)
+      encoded_classes = np.empty(X.shape[0], dtype=np.intp)
+      for start in range(0, X.shape[0], COMPILED_TREES_CHUNK_SIZE):
+        scores = self._predict_chunk(X[start:start + COMPILED_TREES_CHUNK_SIZE])
+        if self.kind == "boosting" and self.n_outputs == 1:
+          encoded = (scores[:, 0] >= 0).astype(np.intp)
+        else:
+          encoded = np.argmax(scores, axis=1)
+        encoded_classes[start:start + len(encoded)] = encoded
+      return self.classes_.take(encoded_classes, axis=0)
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
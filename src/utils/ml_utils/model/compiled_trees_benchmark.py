@@ -0,0 +1,86 @@
+'''
+Benchmark of the array-compiled tree inference against sklearn predict.
+Reports the median latency of single-row and small-batch predictions of
+every supported tree family, the shapes the serving endpoints score.
+
+Usage:
+  python -m src.utils.ml_utils.model.compiled_trees_benchmark
+  python -m src.utils.ml_utils.model.compiled_trees_benchmark --batch-sizes 1 8 64 --n-runs 500
+'''
+import sys
+import argparse
+import time
+import numpy as np
+
+from src.exception.exception import NetworkSecurityException
+from src.utils.ml_utils.model.compiled_trees import CompiledTreeEnsemble
+from src.utils.ml_utils.model.compiled_trees_check import make_ternary_data
+
+def get_benchmark_models(seed: int = 0) -> dict:
+  '''
+  :param seed: Random seed of the models
+  :return: Dictionary of model name to unfitted model, sized like the trainer's grids
+  '''
+  from sklearn.tree import DecisionTreeClassifier
+  from sklearn.ensemble import RandomForestClassifier, ExtraTreesClassifier, GradientBoostingClassifier
+
+  return {
+    "Decision Tree": DecisionTreeClassifier(random_state=seed),
+    "Random Forest": RandomForestClassifier(n_estimators=128, random_state=seed),
+    "Extra Trees": ExtraTreesClassifier(n_estimators=128, random_state=seed),
+    "Gradient Boosting": GradientBoostingClassifier(n_estimators=128, subsample=0.7, random_state=seed),
+  }
+
+def median_latency_ms(predict, rows: list) -> float:
+  '''
+  Times predict on every batch of rows and returns the median in milliseconds.
+  '''
+  predict(rows[0])
+  latencies = []
+  for batch in rows:
+    start_time = time.perf_counter()
+    predict(batch)
+    latencies.append(time.perf_counter() - start_time)
+  return float(np.median(latencies)) * 1000
+
+def run_compiled_trees_benchmark(batch_sizes: list = None, n_runs: int = 200, n_samples: int = 10000) -> dict:
+  '''
+  Measures compiled and sklearn predict latency of every model and batch size.
+  :param batch_sizes: Numbers of rows per predict call
+  :param n_runs: Number of predict calls timed per model and batch size
+  :param n_samples: Number of synthetic training rows
+  :return: Dictionary of (model name, batch size) to the sklearn and compiled latencies in milliseconds
+  '''
+  try:
+    X, y = make_ternary_data(2 * n_samples)
+    x_train, x_test, y_train = X[:n_samples], X[n_samples:], y[:n_samples]
+
+    results = {}
+    for model_name, model in get_benchmark_models().items():
+      model.fit(x_train, y_train)
+      compiled_model = CompiledTreeEnsemble(model)
+      for batch_size in batch_sizes or [1, 16]:
+        starts = np.arange(n_runs) * batch_size % (len(x_test) - batch_size)
+        rows = [x_test[start:start + batch_size] for start in starts]
+        sklearn_ms = median_latency_ms(model.predict, rows)
+        compiled_ms = median_latency_ms(compiled_model.predict, rows)
+        results[(model_name, batch_size)] = {
+          "sklearn_ms": sklearn_ms,
+          "compiled_ms": compiled_ms,
+          "speedup": sklearn_ms / compiled_ms if compiled_ms > 0 else float("inf"),
+        }
+    return results
+  except Exception as e:
+    raise NetworkSecurityException(e, sys)
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Compare compiled tree and sklearn predict latency")
+  parser.add_argument("--batch-sizes", type=int, nargs="*", default=[1, 16], help="Rows per predict call")
+  parser.add_argument("--n-runs", type=int, default=200, help="Predict calls timed per model and batch size")
+  parser.add_argument("--n-samples", type=int, default=10000, help="Number of synthetic training rows")
+  args = parser.parse_args()
+
+  results = run_compiled_trees_benchmark(args.batch_sizes, args.n_runs, args.n_samples)
+  print(f"{'model':<20}{'rows':>6}{'sklearn ms':>12}{'compiled ms':>13}{'speedup':>9}")
+  for (model_name, batch_size), result in results.items():
+    print(f"{model_name:<20}{batch_size:>6}{result['sklearn_ms']:>12.3f}{result['compiled_ms']:>13.3f}{result['speedup']:>8.1f}x")
@@ -0,0 +1,102 @@
+'''
+Equivalence check of the array-compiled tree inference against sklearn.
+Fits every supported tree family on synthetic ternary features, like the
+transformed network data, and compares CompiledTreeEnsemble.predict with the
+sklearn model's predict row by row. Exits non-zero on any mismatch.
+
+Usage:
+  python -m src.utils.ml_utils.model.compiled_trees_check
+  python -m src.utils.ml_utils.model.compiled_trees_check --n-samples 20000 --seeds 0 1 2
+'''
+import sys
+import argparse
+import numpy as np
+
+from src.exception.exception import NetworkSecurityException
+from src.utils.ml_utils.model.compiled_trees import CompiledTreeEnsemble
+
+# make_ternary_data function created to build features shaped like the transformed network data
+def make_ternary_data(n_samples: int, n_features: int = 30, n_classes: int = 2, nan_share: float = 0.0,
+  seed: int = 0) -> tuple:
+  '''
+  Draws features in {-1, 0, 1} and a label that depends on a few of them.
+  :param n_samples: Number of rows
+  :param n_features: Number of features
+  :param n_classes: Number of classes of the label
+  :param nan_share: Share of feature values replaced by NaN
+  :param seed: Random seed
+  :return: Tuple of features and labels
+  '''
+  try:
+    random_state = np.random.RandomState(seed)
+    X = random_state.randint(-1, 2, size=(n_samples, n_features)).astype(np.float64)
+    score = X[:, :5] @ random_state.randn(5) + 0.5 * random_state.randn(n_samples)
+    y = np.digitize(score, np.quantile(score, np.linspace(0, 1, n_classes + 1)[1:-1]))
+    if nan_share > 0:
+      X[random_state.rand(*X.shape) < nan_share] = np.nan
+    return X, y
+  except Exception as e:
+    raise NetworkSecurityException(e, sys)
+
+# get_check_cases function created to list the model families and settings the check covers
+def get_check_cases(seed: int) -> list:
+  '''
+  :param seed: Random seed of the models
+  :return: List of tuples of case name, unfitted model, number of classes and NaN share
+  '''
+  from sklearn.tree import DecisionTreeClassifier
+  from sklearn.ensemble import RandomForestClassifier, ExtraTreesClassifier, GradientBoostingClassifier
+
+  cases = []
+  for n_classes in (2, 3):
+    cases += [
+      ("decision_tree", DecisionTreeClassifier(random_state=seed), n_classes, 0.0),
+      ("decision_tree_nan", DecisionTreeClassifier(random_state=seed), n_classes, 0.05),
+      ("random_forest", RandomForestClassifier(n_estimators=32, random_state=seed), n_classes, 0.0),
+      ("random_forest_nan", RandomForestClassifier(n_estimators=32, random_state=seed), n_classes, 0.05),
+      ("extra_trees", ExtraTreesClassifier(n_estimators=32, random_state=seed), n_classes, 0.0),
+      ("extra_trees_nan", ExtraTreesClassifier(n_estimators=32, random_state=seed), n_classes, 0.05),
+      ("gradient_boosting", GradientBoostingClassifier(n_estimators=64, random_state=seed), n_classes, 0.0),
+      ("gradient_boosting_subsample",
+        GradientBoostingClassifier(n_estimators=64, subsample=0.7, max_features=0.5, random_state=seed), n_classes, 0.0),
+      ("gradient_boosting_zero_init",
+        GradientBoostingClassifier(n_estimators=32, init="zero", random_state=seed), n_classes, 0.0),
+    ]
+  return [(f"{name}_{n_classes}_classes", model, n_classes, nan_share) for name, model, n_classes, nan_share in cases]
+
+def run_compiled_trees_check(n_samples: int = 4000, seeds: list = None) -> list:
+  '''
+  Compares the compiled and the sklearn predictions of every case.
+  :param n_samples: Number of rows, half of them used to fit
+  :param seeds: Random seeds to run every case with
+  :return: List of tuples of case name, seed, number of test rows and number of mismatches
+  '''
+  try:
+    results = []
+    for seed in seeds or [0]:
+      for case_name, model, n_classes, nan_share in get_check_cases(seed):
+        X, y = make_ternary_data(n_samples, n_classes=n_classes, nan_share=nan_share, seed=seed)
+        x_train, x_test, y_train = X[:n_samples // 2], X[n_samples // 2:], y[:n_samples // 2]
+        model.fit(x_train, y_train)
+        # Whole-number features land exactly on no threshold, the shifted rows probe values between them
+        x_test = np.vstack([x_test, x_test + 0.5, x_train[:256]])
+        compiled_predictions = CompiledTreeEnsemble(model).predict(x_test)
+        n_mismatches = int(np.sum(compiled_predictions != model.predict(x_test)))
+        results.append((case_name, seed, len(x_test), n_mismatches))
+    return results
+  except Exception as e:
+    raise NetworkSecurityException(e, sys)
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Fail when compiled tree predictions differ from sklearn")
+  parser.add_argument("--n-samples", type=int, default=4000, help="Number of synthetic rows per case")
+  parser.add_argument("--seeds", type=int, nargs="*", default=[0], help="Random seeds")
+  args = parser.parse_args()
+
+  results = run_compiled_trees_check(args.n_samples, args.seeds)
+  print(f"{'case':<44}{'seed':>6}{'rows':>8}{'mismatches':>12}")
+  for case_name, seed, n_rows, n_mismatches in results:
+    print(f"{case_name:<44}{seed:>6}{n_rows:>8,}{n_mismatches:>12,}")
+  if any(n_mismatches for *_, n_mismatches in results):
+    sys.exit(1)
+  print(f"Compiled predictions match sklearn on all {len(results)} cases")
@@ -0,0 +1,146 @@
+'''
+Content-addressed on-disk cache of model search results.
+Fold scores and refitted estimators are stored under a hash of the data
+they were fitted on, the estimator class and its full parameter set, so
+an unchanged candidate is restored across pipeline runs instead of refit.
+'''
+import os, sys
+import hashlib
+import threading
+import joblib
+import numpy as np
+
+from src.exception.exception import NetworkSecurityException
+from src.logging.logger import logging
+
+def hash_arrays(*arrays) -> str:
+  '''
+  Hashes the shape, dtype and content of arrays.
+  :param arrays: NumPy arrays to hash together
+  :return: Hex digest of the arrays
+  '''
+  try:
+    digest = hashlib.sha256()
+    for array in arrays:
+      array = np.ascontiguousarray(array)
+      digest.update(f"{array.dtype.str}{array.shape}".encode())
+      digest.update(memoryview(array).cast("B"))
+    return digest.hexdigest()
+  except Exception as e:
+    raise NetworkSecurityException(e, sys)
+
+def hash_estimator(model, params: dict) -> str:
+  '''
+  Hashes the estimator class and its full parameter set after applying params.
+  :param model: Unfitted estimator
+  :param params: Parameters applied on top of the estimator's own
+  :return: Hex digest of the configured estimator
+  '''
+  try:
+    from sklearn.base import clone
+    estimator = clone(model).set_params(**params)
+    estimator_class = f"{type(estimator).__module__}.{type(estimator).__qualname__}"
+    full_params = sorted((name, repr(value)) for name, value in estimator.get_params(deep=True).items())
+    return hashlib.sha256(repr((estimator_class, full_params)).encode()).hexdigest()
+  except Exception as e:
+    raise NetworkSecurityException(e, sys)
+
+class CVResultCache:
+  '''
+  Directory of joblib files named by their key. evict() deletes the least
+  recently used entries once the directory grows past max_bytes, it walks
+  the whole directory so callers run it once per search, not per put.
+  '''
+  def __init__(self, cache_dir: str, max_bytes: int):
+    try:
+      self.cache_dir = cache_dir
+      self.max_bytes = max_bytes
+      self.hits = 0
+      self.misses = 0
+      self._lock = threading.Lock()
+      os.makedirs(cache_dir, exist_ok=True)
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+
+  @staticmethod
+  def make_key(*parts: str) -> str:
+    '''
+    Combines hashes and labels into a single cache key.
+    The sklearn and numpy versions are part of every key, so an upgrade does not
+    restore scores or estimators fitted by another version.
+    '''
+    import sklearn
+    return hashlib.sha256("|".join((sklearn.__version__, np.__version__) + parts).encode()).hexdigest()
+
+  def _path(self, key: str) -> str:
+    return os.path.join(self.cache_dir, key[:2], f"{key}.joblib")
+
+  def get(self, key: str):
+    '''
+    Loads a cached value.
+    :param key: Cache key
+    :return: The cached value, or None on a miss
+    '''
+    path = self._path(key)
+    try:
+      value = joblib.load(path)
+      # The modification time doubles as the last access time for eviction
+      os.utime(path)
+      with self._lock:
+        self.hits += 1
+      return value
+    except (FileNotFoundError, EOFError):
+      with self._lock:
+        self.misses += 1
+      return None
+    except Exception as e:
+      logging.info(f"Ignoring unreadable cache entry {path}: {e}")
+      with self._lock:
+        self.misses += 1
+      return None
+
+  def put(self, key: str, value):
+    '''
+    Stores a value, the cache may exceed max_bytes until the next evict().
+    :param key: Cache key
+    :param value: Picklable value
+    '''
+    try:
+      path = self._path(key)
+      os.makedirs(os.path.dirname(path), exist_ok=True)
+      temp_path = f"{path}.{os.getpid()}.tmp"
+      joblib.dump(value, temp_path)
+      os.replace(temp_path, path)
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+
+  def evict(self):
+    '''
+    Deletes the least recently used entries until the cache fits in max_bytes.
+    '''
+    try:
+      entries = []
+      for directory, _, file_names in os.walk(self.cache_dir):
+        for file_name in file_names:
+          if file_name.endswith(".joblib"):
+            stat = os.stat(os.path.join(directory, file_name))
+            entries.append((stat.st_mtime, stat.st_size, os.path.join(directory, file_name)))
+      total_bytes = sum(size for _, size, _ in entries)
+      n_evicted = 0
+      for _, size, path in sorted(entries):
+        if total_bytes <= self.max_bytes:
+          break
+        os.remove(path)
+        total_bytes -= size
+        n_evicted += 1
+      if n_evicted:
+        logging.info(f"Evicted {n_evicted} entries from the CV cache, {total_bytes} bytes left")
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+
+  def stats(self) -> dict:
+    '''
+    Returns the hit and miss counters.
+    '''
+    with self._lock:
+      return {"hits": self.hits, "misses": self.misses}
@@ -2,6 +2,8 @@
 Estimator class for machine learning models.
 '''
 import os, sys
+import numpy as np
+import pandas as pd
 
 from src.exception.exception import NetworkSecurityException
 from src.logging.logger import logging
@@ -9,19 +11,122 @@ from src.constant.training_pipeline import (
   SAVED_MODEL_DIR,
   MODEL_FILE_NAME
 )
+from src.utils.ml_utils.model.compiled_trees import CompiledTreeEnsemble
+from src.utils.ml_utils.model.prediction_cache import PredictionCache, pack_ternary_rows
 
 class NetworkModel:
-  def __init__(self, preprocessor, model):
+  def __init__(self, preprocessor, model, compile_trees: bool = False, cache_size: int = 0):
     '''
     Initialize the NetworkModel with a machine learning model.
+    :param preprocessor: The fitted preprocessing pipeline
     :param model: The machine learning model to be used
+    :param compile_trees: If True, tree models are compiled into node arrays for faster inference
+    :param cache_size: Maximum number of memoized predictions, 0 disables the cache
     '''
     try:
       self.preprocessor = preprocessor
       self.model = model
+      self.compiled_model = None
+      self.prediction_cache = PredictionCache(cache_size) if cache_size > 0 else None
+      if compile_trees:
+        self.compile()
     except Exception as e:
       raise NetworkSecurityException(e, sys)
   
+  def compile(self) -> bool:
+    '''
+    Compile the tree model into flat node arrays used by predict.
+    :return: True if the model was compiled, False if it is not a supported tree model
+    '''
+    try:
+      if not CompiledTreeEnsemble.is_supported(self.model):
+        logging.info(f"Model {type(self.model).__name__} is not a supported tree model, using sklearn predict")
+        return False
+      self.compiled_model = CompiledTreeEnsemble(self.model)
+      return True
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+  
+  def clear_cache(self):
+    '''
+    Drop the memoized predictions.
+    '''
+    prediction_cache = getattr(self, "prediction_cache", None)
+    if prediction_cache is not None:
+      prediction_cache.clear()
+  
+  def cache_stats(self) -> dict:
+    '''
+    Return the prediction cache counters.
+    :return: Dictionary of cache counters, or None if the cache is disabled
+    '''
+    prediction_cache = getattr(self, "prediction_cache", None)
+    return prediction_cache.stats() if prediction_cache is not None else None
+  
+  def _align_columns(self, x):
+    '''
+    Reorder DataFrame columns to the order seen by the preprocessor,
+    so the same feature vector always packs into the same cache key.
+    :param x: Input data for prediction
+    :return: Input data with columns in training order
+    '''
+    feature_names = getattr(self.preprocessor, "feature_names_in_", None)
+    if isinstance(x, pd.DataFrame) and feature_names is not None:
+      feature_names = list(feature_names)
+      if list(x.columns) != feature_names and set(x.columns) == set(feature_names):
+        x = x[feature_names]
+    return x
+  
+  def _predict_cached(self, x):
+    '''
+    Predict through the memo cache. Rows are packed into keys, duplicate
+    rows in the batch are predicted once and only cache misses reach the
+    preprocessor and the model.
+    :param x: Input data for prediction
+    :return: Predicted output
+    '''
+    x = self._align_columns(x)
+    keys, packable = pack_ternary_rows(x)
+    packable_rows = np.flatnonzero(packable)
+    unique_keys, first_rows, inverse = np.unique(
+      keys[packable_rows], return_index=True, return_inverse=True
+    )
+    cached_values, hit_mask = self.prediction_cache.lookup(unique_keys)
+    
+    # Predict one representative row per missed key plus every unpackable row
+    missed = np.flatnonzero(~hit_mask)
+    unpackable_rows = np.flatnonzero(~packable)
+    rows_to_predict = np.concatenate([packable_rows[first_rows[missed]], unpackable_rows])
+    
+    y_unique = np.empty(len(unique_keys), dtype=object)
+    y_unique[hit_mask] = [value for value in cached_values if value is not None]
+    y_hat = np.empty(len(keys), dtype=object)
+    if len(rows_to_predict):
+      x_missed = x.iloc[rows_to_predict] if isinstance(x, pd.DataFrame) else np.asarray(x)[rows_to_predict]
+      y_missed = self._predict_uncached(x_missed)
+      y_unique[missed] = list(y_missed[:len(missed)])
+      y_hat[unpackable_rows] = list(y_missed[len(missed):])
+      self.prediction_cache.store(unique_keys[missed], y_missed[:len(missed)])
+    y_hat[packable_rows] = y_unique[inverse]
+    
+    n_hit_rows = int(hit_mask[inverse].sum())
+    self.prediction_cache.record(hits=n_hit_rows, misses=len(packable_rows) - n_hit_rows)
+    return np.array(y_hat.tolist())
+  
+  def _predict_uncached(self, x):
+    '''
+    Predict with the preprocessor and the model.
+    :param x: Input data for prediction
+    :return: Predicted output
+    '''
+    x_transform = self.preprocessor.transform(x)
+    
+    # NetworkModels pickled before tree compilation have no compiled_model
+    compiled_model = getattr(self, "compiled_model", None)
+    if compiled_model is not None:
+      return compiled_model.predict(x_transform)
+    return self.model.predict(x_transform)
+  
   def predict(self, x):
     '''
     Predict the output using the model.
@@ -29,8 +134,8 @@ class NetworkModel:
     :return: Predicted output
     '''
     try:
-      x_transform = self.preprocessor.transform(x)
-      y_hat = self.model.predict(x_transform)
-      return y_hat
+      if getattr(self, "prediction_cache", None) is not None:
+        return self._predict_cached(x)
+      return self._predict_uncached(x)
     except Exception as e:
       raise NetworkSecurityException(e, sys)
\ No newline at end of file
@@ -0,0 +1,177 @@
+'''
+Background MLflow tracking sink.
+Metrics, params, candidate runs and the model are queued by the trainer and
+written by one worker thread, which batches them into log_batch calls, so
+tracking never blocks training on the store or on the model upload.
+'''
+import os, sys
+import time
+import queue
+import shutil
+import tempfile
+import threading
+
+from src.exception.exception import NetworkSecurityException
+from src.logging.logger import logging
+
+# log_batch limits of the MLflow tracking API
+MLFLOW_MAX_METRICS_PER_BATCH: int = 1000
+MLFLOW_MAX_PARAMS_PER_BATCH: int = 100
+
+class MLflowTrackingSink:
+  '''
+  Owns one parent run. Candidate runs are created as its nested runs, and
+  the model is logged to the parent run once. All MLflow calls go through
+  an MlflowClient on the worker thread, which also works with a local
+  file or sqlite tracking store.
+  '''
+  def __init__(self, experiment_name: str, tracking_uri: str = None, run_name: str = None,
+    flush_interval_seconds: float = 1.0):
+    '''
+    :param experiment_name: Experiment of the parent run, created if missing
+    :param tracking_uri: Tracking store URI, None uses MLFLOW_TRACKING_URI or MLflow's default
+    :param run_name: Optional name of the parent run
+    :param flush_interval_seconds: Longest time a queued metric or param waits before it is written
+    '''
+    try:
+      self.experiment_name = experiment_name
+      self.tracking_uri = tracking_uri
+      self.run_name = run_name
+      self.flush_interval_seconds = flush_interval_seconds
+      self.run_id = None
+      self.error = None
+      self._queue = queue.Queue()
+      self._model_logged = False
+      # Not a daemon, a process that finished training still waits for the upload
+      self._thread = threading.Thread(target=self._worker, name="mlflow-sink")
+      self._thread.start()
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    self.close(wait=exc_type is None)
+
+  def log_params(self, params: dict):
+    '''
+    Queues params of the parent run.
+    '''
+    self._queue.put(("params", {name: str(value) for name, value in params.items()}))
+
+  def log_metrics(self, metrics: dict, step: int = 0):
+    '''
+    Queues metrics of the parent run.
+    '''
+    self._queue.put(("metrics", {name: float(value) for name, value in metrics.items()}, step))
+
+  def log_candidate(self, run_name: str, params: dict, metrics: dict, tags: dict = None):
+    '''
+    Queues a nested run holding the params and metrics of one search candidate.
+    '''
+    self._queue.put(("candidate", run_name, {name: str(value) for name, value in params.items()},
+      {name: float(value) for name, value in metrics.items()}, tags or {}))
+
+  def log_model(self, model, artifact_path: str = "model"):
+    '''
+    Queues the model for upload to the parent run, later calls are ignored.
+    '''
+    if self._model_logged:
+      logging.info(f"A model was already logged to MLflow run {self.run_id}, skipping {artifact_path}")
+      return
+    self._model_logged = True
+    self._queue.put(("model", model, artifact_path))
+
+  def close(self, wait: bool = True, timeout: float = None):
+    '''
+    Ends the parent run once everything queued so far is written.
+    :param wait: Block until the worker is done, otherwise it finishes in the background
+    :param timeout: Longest time to wait for the worker
+    :raises NetworkSecurityException: If waiting and the worker failed
+    '''
+    try:
+      self._queue.put(None)
+      if wait:
+        self._thread.join(timeout)
+        if self.error is not None:
+          raise self.error
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+
+  def _worker(self):
+    try:
+      from mlflow.tracking import MlflowClient
+
+      client = MlflowClient(tracking_uri=self.tracking_uri)
+      experiment = client.get_experiment_by_name(self.experiment_name)
+      experiment_id = experiment.experiment_id if experiment else client.create_experiment(self.experiment_name)
+      tags = {"mlflow.runName": self.run_name} if self.run_name else {}
+      self.run_id = client.create_run(experiment_id, tags=tags).info.run_id
+      logging.info(f"Tracking to MLflow run {self.run_id} of experiment {self.experiment_name}")
+
+      metrics, params = [], []
+      closed = False
+      while not closed:
+        try:
+          item = self._queue.get(timeout=self.flush_interval_seconds)
+        except queue.Empty:
+          item = ()
+        if item is None:
+          closed = True
+        elif item and item[0] == "params":
+          params.extend(self._params(item[1]))
+        elif item and item[0] == "metrics":
+          metrics.extend(self._metrics(item[1], item[2]))
+        elif item and item[0] == "candidate":
+          _, run_name, candidate_params, candidate_metrics, candidate_tags = item
+          run_tags = {"mlflow.parentRunId": self.run_id, "mlflow.runName": run_name, **candidate_tags}
+          child_run_id = client.create_run(experiment_id, tags=run_tags).info.run_id
+          self._log_batch(client, child_run_id, self._metrics(candidate_metrics, 0), self._params(candidate_params))
+          client.set_terminated(child_run_id)
+        elif item and item[0] == "model":
+          self._upload_model(client, item[1], item[2])
+
+        # Write on idle, on close and whenever a full batch is queued
+        if not item or closed or len(metrics) >= MLFLOW_MAX_METRICS_PER_BATCH or len(params) >= MLFLOW_MAX_PARAMS_PER_BATCH:
+          self._log_batch(client, self.run_id, metrics, params)
+          metrics, params = [], []
+      client.set_terminated(self.run_id)
+      logging.info(f"MLflow run {self.run_id} finished")
+    except Exception as e:
+      self.error = e
+      logging.error(f"MLflow tracking failed, dropping the remaining records: {e}")
+      # Keep draining so the trainer never blocks on a dead sink
+      while self._queue.get() is not None:
+        pass
+
+  @staticmethod
+  def _metrics(metrics: dict, step: int) -> list:
+    from mlflow.entities import Metric
+    timestamp = int(time.time() * 1000)
+    return [Metric(name, value, timestamp, step) for name, value in metrics.items()]
+
+  @staticmethod
+  def _params(params: dict) -> list:
+    from mlflow.entities import Param
+    return [Param(name, value) for name, value in params.items()]
+
+  @staticmethod
+  def _log_batch(client, run_id: str, metrics: list, params: list):
+    while metrics or params:
+      client.log_batch(run_id, metrics=metrics[:MLFLOW_MAX_METRICS_PER_BATCH], params=params[:MLFLOW_MAX_PARAMS_PER_BATCH])
+      metrics, params = metrics[MLFLOW_MAX_METRICS_PER_BATCH:], params[MLFLOW_MAX_PARAMS_PER_BATCH:]
+
+  def _upload_model(self, client, model, artifact_path: str):
+    import mlflow.sklearn
+
+    start_time = time.perf_counter()
+    temp_dir = tempfile.mkdtemp(prefix="mlflow_model_")
+    try:
+      model_dir = os.path.join(temp_dir, artifact_path)
+      # Pickled like the rest of the project's models, skops refuses the tree internals
+      mlflow.sklearn.save_model(model, model_dir, serialization_format=mlflow.sklearn.SERIALIZATION_FORMAT_CLOUDPICKLE)
+      client.log_artifacts(self.run_id, model_dir, artifact_path)
+    finally:
+      shutil.rmtree(temp_dir, ignore_errors=True)
+    logging.info(f"Logged the model to MLflow run {self.run_id} in {time.perf_counter() - start_time:.1f}s")
@@ -0,0 +1,105 @@
+'''
+Benchmark of the winning model of every candidate family.
+Searches each family with evaluate_models, then reports the fit time,
+single-row and batch predict latency, pickled size and test F1 score of
+every winner.
+
+Usage:
+  python -m src.utils.ml_utils.model.model_benchmark \
+    --train Artifacts/<timestamp>/data_transformation/transformed/train.npy \
+    --test Artifacts/<timestamp>/data_transformation/transformed/test.npy \
+    --train-target Artifacts/<timestamp>/data_transformation/transformed/train_target.npy \
+    --test-target Artifacts/<timestamp>/data_transformation/transformed/test_target.npy
+'''
+import sys
+import argparse
+import pickle
+import time
+import numpy as np
+
+from src.exception.exception import NetworkSecurityException
+from src.constant.training_pipeline import (
+  MODEL_TRAINER_CV_FOLDS,
+  MODEL_TRAINER_N_JOBS,
+  MODEL_TRAINER_CV_CACHE_DIR,
+  MODEL_TRAINER_CV_CACHE_MAX_BYTES
+)
+from src.utils.main_utils.utils import load_features_and_target, evaluate_models
+from src.utils.ml_utils.metric.classification_metric import get_classification_score
+
+def run_model_benchmark(train_file_path: str, test_file_path: str, train_target_file_path: str = None,
+  test_target_file_path: str = None, model_names: list = None,
+  n_jobs: int = MODEL_TRAINER_N_JOBS, n_latency_runs: int = 200) -> dict:
+  '''
+  Measures the cost of the winning model of every candidate family.
+  :param train_file_path: Transformed training features
+  :param test_file_path: Transformed test features
+  :param train_target_file_path: Transformed training target, None when it is the last column of the features
+  :param test_target_file_path: Transformed test target, None when it is the last column of the features
+  :param model_names: Optional subset of the trainer's candidate models
+  :param n_jobs: Number of worker processes of the search
+  :param n_latency_runs: Number of single-row predictions timed per model
+  :return: Dictionary of model name to its measurements
+  '''
+  try:
+    from sklearn.base import clone
+    from src.components.model_trainer import ModelTrainer
+
+    x_train, y_train = load_features_and_target(train_file_path, train_target_file_path)
+    x_test, y_test = load_features_and_target(test_file_path, test_target_file_path)
+
+    models, params = ModelTrainer.get_candidate_models(n_features=x_train.shape[1])
+    if model_names:
+      models = {model_name: models[model_name] for model_name in model_names}
+    evaluate_models(
+      X_train=x_train, y_train=y_train,
+      X_test=x_test, y_test=y_test,
+      models=models, param=params,
+      cv=MODEL_TRAINER_CV_FOLDS, n_jobs=n_jobs,
+      cache_dir=MODEL_TRAINER_CV_CACHE_DIR,
+      cache_max_bytes=MODEL_TRAINER_CV_CACHE_MAX_BYTES
+    )
+
+    results = {}
+    for model_name, winner in models.items():
+      start_time = time.perf_counter()
+      model = clone(winner).fit(x_train, y_train)
+      fit_seconds = time.perf_counter() - start_time
+
+      single_row_seconds = []
+      for i in range(n_latency_runs):
+        row = x_test[i % len(x_test)][None, :]
+        start_time = time.perf_counter()
+        model.predict(row)
+        single_row_seconds.append(time.perf_counter() - start_time)
+
+      start_time = time.perf_counter()
+      y_pred = model.predict(x_test)
+      batch_seconds = time.perf_counter() - start_time
+
+      results[model_name] = {
+        "fit_seconds": fit_seconds,
+        "predict_row_ms": float(np.median(single_row_seconds)) * 1000,
+        "predict_rows_per_second": len(x_test) / batch_seconds,
+        "model_bytes": len(pickle.dumps(model)),
+        "test_f1_score": get_classification_score(y_true=y_test, y_pred=y_pred).f1_score,
+      }
+    return results
+  except Exception as e:
+    raise NetworkSecurityException(e, sys)
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Compare fit time, predict latency and size of the winning models")
+  parser.add_argument("--train", required=True, help="Transformed train.npy")
+  parser.add_argument("--test", required=True, help="Transformed test.npy")
+  parser.add_argument("--train-target", default=None, help="Transformed train_target.npy, omit for arrays holding the label as the last column")
+  parser.add_argument("--test-target", default=None, help="Transformed test_target.npy, omit for arrays holding the label as the last column")
+  parser.add_argument("--models", nargs="*", default=None, help="Subset of candidate model names")
+  parser.add_argument("--n-jobs", type=int, default=MODEL_TRAINER_N_JOBS, help="Number of worker processes")
+  args = parser.parse_args()
+
+  results = run_model_benchmark(args.train, args.test, args.train_target, args.test_target, args.models, args.n_jobs)
+  print(f"{'model':<32}{'fit s':>8}{'row ms':>9}{'rows/s':>12}{'size KB':>10}{'test F1':>9}")
+  for model_name, result in results.items():
+    print(f"{model_name:<32}{result['fit_seconds']:>8.2f}{result['predict_row_ms']:>9.3f}"
+      f"{result['predict_rows_per_second']:>12,.0f}{result['model_bytes'] / 1024:>10,.0f}{result['test_f1_score']:>9.4f}")
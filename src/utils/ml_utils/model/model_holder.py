@@ -0,0 +1,197 @@
+'''
+Process-wide holder for the serving model.
+Loads the final model artifacts once and hot reloads them when a newly
+trained model is written, without restarting the application.
+'''
+import os, sys
+import threading
+import time
+
+from src.exception.exception import NetworkSecurityException
+from src.logging.logger import logging
+from src.constant.training_pipeline import (
+  MODEL_SERVING_PREPROCESSOR_FILE_PATH,
+  MODEL_SERVING_MODEL_FILE_PATH,
+  MODEL_SERVING_RELOAD_INTERVAL_SECONDS,
+  MODEL_SERVING_COMPILE_TREES,
+  MODEL_SERVING_PREDICTION_CACHE_SIZE
+)
+from src.utils.main_utils.utils import load_object
+from src.utils.ml_utils.model.estimator import NetworkModel
+
+class ModelHolder:
+  '''
+  Keeps a single NetworkModel in memory for the whole process.
+  The trainer publishes the preprocessor and then the model, so the model
+  file's mtime and size act as the model version, and a preprocessor newer
+  than the model means a publish is half done. A background thread polls
+  the version and swaps in a freshly loaded NetworkModel; requests in
+  flight keep using the instance they already fetched.
+  '''
+  def __init__(self,
+    preprocessor_file_path: str = MODEL_SERVING_PREPROCESSOR_FILE_PATH,
+    model_file_path: str = MODEL_SERVING_MODEL_FILE_PATH,
+    reload_interval: float = MODEL_SERVING_RELOAD_INTERVAL_SECONDS,
+    compile_trees: bool = MODEL_SERVING_COMPILE_TREES,
+    cache_size: int = MODEL_SERVING_PREDICTION_CACHE_SIZE):
+    try:
+      self.preprocessor_file_path = preprocessor_file_path
+      self.model_file_path = model_file_path
+      self.reload_interval = reload_interval
+      self.compile_trees = compile_trees
+      self.cache_size = cache_size
+
+      self._network_model: NetworkModel = None
+      self._version = None
+      self._loaded_at: float = None
+      self._reload_lock = threading.Lock()
+      self._stop_event = threading.Event()
+      self._watcher: threading.Thread = None
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+
+  def _get_file_version(self):
+    '''
+    Returns the version of the model artifacts on disk.
+    :return: Tuple of model file mtime and size, or None if it does not exist
+    '''
+    try:
+      stat = os.stat(self.model_file_path)
+      return (stat.st_mtime_ns, stat.st_size)
+    except FileNotFoundError:
+      return None
+
+  def _is_published(self) -> bool:
+    '''
+    Checks that the preprocessor on disk belongs to the model on disk.
+    A preprocessor written after the model is the first half of a publish.
+    '''
+    try:
+      return os.stat(self.preprocessor_file_path).st_mtime_ns <= os.stat(self.model_file_path).st_mtime_ns
+    except FileNotFoundError:
+      return False
+
+  def load(self) -> NetworkModel:
+    '''
+    Loads the preprocessor and model from disk and swaps them in.
+    :return: The newly loaded NetworkModel
+    :raises NetworkSecurityException: If the artifacts cannot be loaded
+    '''
+    try:
+      with self._reload_lock:
+        # Retry while a publish is in progress or lands during the load,
+        # files copied in by hand may never look published
+        deadline = time.monotonic() + self.reload_interval
+        while True:
+          version = self._get_file_version()
+          published = self._is_published()
+          if published:
+            preprocessor = load_object(self.preprocessor_file_path)
+            model = load_object(self.model_file_path)
+            if self._get_file_version() == version and self._is_published():
+              break
+          if time.monotonic() >= deadline:
+            logging.warning(f"{self.preprocessor_file_path} and {self.model_file_path} kept changing or look unpaired, loading them anyway")
+            preprocessor = load_object(self.preprocessor_file_path)
+            model = load_object(self.model_file_path)
+            break
+          time.sleep(0.05)
+        network_model = NetworkModel(
+          preprocessor=preprocessor,
+          model=model,
+          compile_trees=self.compile_trees,
+          cache_size=self.cache_size
+        )
+
+        # Single reference assignment, readers see either the old or the new model
+        previous_model = self._network_model
+        self._network_model = network_model
+        if previous_model is not None:
+          previous_model.clear_cache()
+        self._version = version
+        self._loaded_at = time.time()
+        logging.info(f"Loaded serving model from {self.model_file_path} version {version}")
+        return network_model
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+
+  def reload_if_changed(self) -> bool:
+    '''
+    Reloads the model if the artifacts on disk have a new version.
+    :return: True if a new model was swapped in, False otherwise
+    '''
+    try:
+      version = self._get_file_version()
+      if version is None or version == self._version:
+        return False
+      if not self._is_published():
+        # The model is replaced right after the preprocessor, retry on the next tick
+        return False
+      self.load()
+      return True
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+
+  def get_model(self) -> NetworkModel:
+    '''
+    Returns the current serving model, loading it on first use.
+    :return: The current NetworkModel
+    '''
+    try:
+      network_model = self._network_model
+      if network_model is None:
+        network_model = self.load()
+      return network_model
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+
+  def status(self) -> dict:
+    '''
+    Returns information about the currently loaded model.
+    :return: Dictionary with the model file path, version, load time and cache counters
+    '''
+    network_model = self._network_model
+    return {
+      "model_file_path": self.model_file_path,
+      "loaded": network_model is not None,
+      "version": self._version,
+      "loaded_at": self._loaded_at,
+      "prediction_cache": network_model.cache_stats() if network_model is not None else None,
+    }
+
+  def _watch(self):
+    '''
+    Background loop checking the artifacts for a new version.
+    A failed reload keeps the previous model and is retried on the next tick.
+    '''
+    while not self._stop_event.wait(self.reload_interval):
+      try:
+        self.reload_if_changed()
+      except Exception as e:
+        logging.error(f"Model reload failed, keeping the previous model: {e}")
+
+  def start(self):
+    '''
+    Loads the model if it is available and starts the reload watcher.
+    '''
+    try:
+      if self._get_file_version() is not None:
+        self.load()
+      else:
+        logging.info(f"No model found at {self.model_file_path}, waiting for a trained model")
+
+      if self._watcher is None or not self._watcher.is_alive():
+        self._stop_event.clear()
+        self._watcher = threading.Thread(target=self._watch, name="model-reload-watcher", daemon=True)
+        self._watcher.start()
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+
+  def stop(self):
+    '''
+    Stops the reload watcher.
+    '''
+    self._stop_event.set()
+    if self._watcher is not None:
+      self._watcher.join(timeout=self.reload_interval)
+      self._watcher = None
@@ -0,0 +1,121 @@
+'''
+Prediction memo cache for the ternary phishing feature space.
+Every feature takes a value in {-1, 0, 1}, so a row packs into a 2-bit
+code per feature (NaN gets its own code) and 30 features fit in a single
+64-bit integer key.
+'''
+import sys
+import threading
+import numpy as np
+
+from collections import OrderedDict
+from src.exception.exception import NetworkSecurityException
+
+# Code used for missing values, the ternary values map to 0, 1 and 2
+PACKED_MISSING_CODE: int = 3
+PACKED_BITS_PER_FEATURE: int = 2
+
+def pack_ternary_rows(x: np.ndarray):
+  '''
+  Packs each row of ternary features into a uint64 key.
+  :param x: 2D array of feature values
+  :return: Tuple of the uint64 keys and a boolean mask of rows that could be packed
+  '''
+  try:
+    x = np.asarray(x, dtype=np.float64)
+    n_rows, n_features = x.shape
+    if n_features * PACKED_BITS_PER_FEATURE > 64:
+      return np.zeros(n_rows, dtype=np.uint64), np.zeros(n_rows, dtype=bool)
+
+    missing = np.isnan(x)
+    packable = ((x == -1) | (x == 0) | (x == 1) | missing).all(axis=1)
+    codes = np.where(missing, PACKED_MISSING_CODE, np.nan_to_num(x) + 1).astype(np.uint64)
+    shifts = np.arange(n_features, dtype=np.uint64) * np.uint64(PACKED_BITS_PER_FEATURE)
+    keys = np.bitwise_or.reduce(codes << shifts, axis=1) if n_features else np.zeros(n_rows, dtype=np.uint64)
+    return keys, packable
+  except Exception as e:
+    raise NetworkSecurityException(e, sys)
+
+class PredictionCache:
+  '''
+  Bounded LRU cache from packed feature keys to predictions.
+  Hit and miss counters are per row.
+  '''
+  def __init__(self, max_size: int):
+    try:
+      self.max_size = max_size
+      self._entries = OrderedDict()
+      self._lock = threading.Lock()
+      self.hits = 0
+      self.misses = 0
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+
+  def __getstate__(self):
+    # Locks cannot be pickled, cached entries are not worth persisting
+    return {"max_size": self.max_size}
+
+  def __setstate__(self, state):
+    self.__init__(state["max_size"])
+
+  def lookup(self, keys: np.ndarray):
+    '''
+    Looks up a batch of keys.
+    :param keys: Unique uint64 keys
+    :return: Tuple of a list with the cached values (None on a miss) and a boolean hit mask
+    '''
+    values = [None] * len(keys)
+    hit_mask = np.zeros(len(keys), dtype=bool)
+    with self._lock:
+      for i, key in enumerate(keys.tolist()):
+        value = self._entries.get(key)
+        if value is not None:
+          self._entries.move_to_end(key)
+          values[i] = value
+          hit_mask[i] = True
+    return values, hit_mask
+
+  def store(self, keys: np.ndarray, values):
+    '''
+    Stores predictions, evicting the least recently used entries.
+    :param keys: uint64 keys
+    :param values: Predictions for the keys
+    '''
+    with self._lock:
+      for key, value in zip(keys.tolist(), values):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+      while len(self._entries) > self.max_size:
+        self._entries.popitem(last=False)
+
+  def record(self, hits: int, misses: int):
+    '''
+    Updates the hit and miss counters.
+    :param hits: Number of rows answered from the cache
+    :param misses: Number of rows that had to be predicted
+    '''
+    with self._lock:
+      self.hits += hits
+      self.misses += misses
+
+  def clear(self):
+    '''
+    Drops every cached prediction, used when the model changes.
+    '''
+    with self._lock:
+      self._entries.clear()
+
+  def stats(self) -> dict:
+    '''
+    Returns the cache counters.
+    :return: Dictionary with size, hits, misses and hit rate
+    '''
+    with self._lock:
+      lookups = self.hits + self.misses
+      return {
+        "size": len(self._entries),
+        "max_size": self.max_size,
+        "hits": self.hits,
+        "misses": self.misses,
+        "hit_rate": self.hits / lookups if lookups else 0.0,
+      }
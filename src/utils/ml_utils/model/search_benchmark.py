@@ -0,0 +1,90 @@
+'''
+Benchmark of the exhaustive grid search against successive halving.
+Runs evaluate_models with both strategies on the transformed arrays of a
+pipeline run and reports the wall-clock time and test score of each.
+
+Usage:
+  python -m src.utils.ml_utils.model.search_benchmark \
+    --train Artifacts/<timestamp>/data_transformation/transformed/train.npy \
+    --test Artifacts/<timestamp>/data_transformation/transformed/test.npy \
+    --train-target Artifacts/<timestamp>/data_transformation/transformed/train_target.npy \
+    --test-target Artifacts/<timestamp>/data_transformation/transformed/test_target.npy
+'''
+import sys
+import argparse
+import time
+
+from src.exception.exception import NetworkSecurityException
+from src.constant.training_pipeline import (
+  MODEL_TRAINER_CV_FOLDS,
+  MODEL_TRAINER_N_JOBS,
+  MODEL_TRAINER_HALVING_FACTOR,
+  MODEL_TRAINER_HALVING_MIN_SAMPLES
+)
+from src.utils.main_utils.utils import load_features_and_target, evaluate_models
+from src.utils.ml_utils.metric.classification_metric import get_classification_score
+
+def run_search_benchmark(train_file_path: str, test_file_path: str, train_target_file_path: str = None,
+  test_target_file_path: str = None, model_names: list = None,
+  n_jobs: int = MODEL_TRAINER_N_JOBS) -> dict:
+  '''
+  Runs the grid and the halving search on the same data.
+  :param train_file_path: Transformed training features
+  :param test_file_path: Transformed test features
+  :param train_target_file_path: Transformed training target, None when it is the last column of the features
+  :param test_target_file_path: Transformed test target, None when it is the last column of the features
+  :param model_names: Optional subset of the trainer's candidate models
+  :param n_jobs: Number of worker processes
+  :return: Dictionary of strategy to its best model, test F1 score and wall-clock seconds
+  '''
+  try:
+    from src.components.model_trainer import ModelTrainer
+
+    x_train, y_train = load_features_and_target(train_file_path, train_target_file_path)
+    x_test, y_test = load_features_and_target(test_file_path, test_target_file_path)
+
+    results = {}
+    for search_strategy in ("grid", "halving"):
+      models, params = ModelTrainer.get_candidate_models(n_features=x_train.shape[1])
+      if model_names:
+        models = {model_name: models[model_name] for model_name in model_names}
+      start_time = time.perf_counter()
+      model_report = evaluate_models(
+        X_train=x_train, y_train=y_train,
+        X_test=x_test, y_test=y_test,
+        models=models, param=params,
+        cv=MODEL_TRAINER_CV_FOLDS, n_jobs=n_jobs,
+        search_strategy=search_strategy,
+        halving_factor=MODEL_TRAINER_HALVING_FACTOR,
+        min_samples=MODEL_TRAINER_HALVING_MIN_SAMPLES
+      )
+      elapsed_seconds = time.perf_counter() - start_time
+      best_model_name = max(model_report, key=model_report.get)
+      test_metric = get_classification_score(y_true=y_test, y_pred=models[best_model_name].predict(x_test))
+      results[search_strategy] = {
+        "best_model": best_model_name,
+        "best_params": {name: value for name, value in models[best_model_name].get_params().items() if name in params[best_model_name]},
+        "test_f1_score": test_metric.f1_score,
+        "elapsed_seconds": elapsed_seconds,
+      }
+    return results
+  except Exception as e:
+    raise NetworkSecurityException(e, sys)
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Compare the grid and the successive halving model search")
+  parser.add_argument("--train", required=True, help="Transformed train.npy")
+  parser.add_argument("--test", required=True, help="Transformed test.npy")
+  parser.add_argument("--train-target", default=None, help="Transformed train_target.npy, omit for arrays holding the label as the last column")
+  parser.add_argument("--test-target", default=None, help="Transformed test_target.npy, omit for arrays holding the label as the last column")
+  parser.add_argument("--models", nargs="*", default=None, help="Subset of candidate model names")
+  parser.add_argument("--n-jobs", type=int, default=MODEL_TRAINER_N_JOBS, help="Number of worker processes")
+  args = parser.parse_args()
+
+  results = run_search_benchmark(args.train, args.test, args.train_target, args.test_target, args.models, args.n_jobs)
+  for search_strategy, result in results.items():
+    print(f"{search_strategy:>8}: {result['elapsed_seconds']:8.1f}s  test F1 {result['test_f1_score']:.4f}  "
+      f"{result['best_model']} {result['best_params']}")
+  grid, halving = results["grid"], results["halving"]
+  print(f"halving is {grid['elapsed_seconds'] / halving['elapsed_seconds']:.1f}x faster, "
+    f"test F1 difference {halving['test_f1_score'] - grid['test_f1_score']:+.4f}")
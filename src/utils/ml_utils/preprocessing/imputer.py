@@ -0,0 +1,190 @@
+'''
+Missing-value-aware KNN imputer.
+Complete rows pass straight through; only rows holding NaNs are imputed,
+against a neighbor index of the training rows that is built at fit time
+and pickled with the preprocessor.
+'''
+import sys
+import numpy as np
+import pandas as pd
+
+from sklearn.base import BaseEstimator, TransformerMixin
+from src.exception.exception import NetworkSecurityException
+
+# Number of rows with missing values scored against the index at once
+IMPUTER_QUERY_CHUNK_SIZE: int = 256
+
+class MissingAwareKNNImputer(TransformerMixin, BaseEstimator):
+  '''
+  Drop-in replacement for KNNImputer on the inference path.
+  Like KNNImputer, the donors of a feature are the training rows where that
+  feature is present, ranked by the nan-euclidean distance over the
+  features present in both rows; only the order of donors at equal
+  distance may differ. The index holds the distinct training rows with
+  their multiplicity, so duplicated rows (common in the ternary feature
+  space) are compared once but still count as separate neighbors.
+  The search is brute force, two matrix products per chunk of rows: the
+  distance ignores a different set of features for every query, which a
+  KD or Ball tree cannot index, and the distinct rows of the phishing data
+  number a few thousand.
+  '''
+  def __init__(self, missing_values=np.nan, n_neighbors: int = 5, weights: str = "uniform"):
+    self.missing_values = missing_values
+    self.n_neighbors = n_neighbors
+    self.weights = weights
+
+  def _to_array(self, X) -> np.ndarray:
+    '''
+    Converts the input to a float64 array with NaN marking missing values.
+    DataFrame columns are reordered to the order seen at fit time.
+    '''
+    feature_names = getattr(self, "feature_names_in_", None)
+    if isinstance(X, pd.DataFrame) and feature_names is not None and list(X.columns) != list(feature_names):
+      missing_columns = set(feature_names) - set(X.columns)
+      if missing_columns:
+        raise ValueError(f"Input is missing the columns {sorted(missing_columns)}")
+      X = X[list(feature_names)]
+    X = np.array(X, dtype=np.float64)
+    if not (isinstance(self.missing_values, float) and np.isnan(self.missing_values)):
+      X[X == self.missing_values] = np.nan
+    return X
+
+  def fit(self, X, y=None):
+    '''
+    Builds the neighbor index over the distinct training rows.
+    :param X: Training features
+    :return: The fitted imputer
+    '''
+    try:
+      if isinstance(X, pd.DataFrame):
+        self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+      X = self._to_array(X)
+      self.n_features_in_ = X.shape[1]
+
+      # Missing values are stored as 0 with a presence mask, so the rows can be deduplicated and multiplied
+      present = ~np.isnan(X)
+      rows = np.hstack([np.where(present, X, 0.0), present])
+      if len(rows):
+        index_rows, index_counts = np.unique(rows, axis=0, return_counts=True)
+      else:
+        index_rows, index_counts = np.empty((0, 2 * X.shape[1])), np.empty(0, dtype=np.int64)
+      self.index_X_ = np.ascontiguousarray(index_rows[:, :X.shape[1]])
+      self.index_present_ = np.ascontiguousarray(index_rows[:, X.shape[1]:])
+      self.index_X_squared_ = np.ascontiguousarray(self.index_X_ ** 2)
+      self.index_counts_ = index_counts
+
+      # Column means are the fallback when no donor shares a present feature with the row
+      with np.errstate(invalid="ignore"):
+        fill_values = np.nanmean(X, axis=0) if len(X) else np.zeros(X.shape[1])
+      self.fill_values_ = np.nan_to_num(fill_values)
+      return self
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+
+  def _distances(self, X: np.ndarray, present: np.ndarray) -> np.ndarray:
+    '''
+    Computes the nan-euclidean distances from the rows to every index row.
+    :param X: Rows with missing values set to 0
+    :param present: Presence mask of the rows as float64
+    :return: Distances of shape (n_rows, n_index_rows), inf when no feature is present in both
+    '''
+    # Squared differences summed over the features present in both rows
+    squared = (
+      (X ** 2) @ self.index_present_.T
+      + present @ self.index_X_squared_.T
+      - 2.0 * X @ self.index_X_.T
+    )
+    np.maximum(squared, 0.0, out=squared)
+    n_common = present @ self.index_present_.T
+    with np.errstate(divide="ignore", invalid="ignore"):
+      distances = np.sqrt(squared * self.n_features_in_ / n_common)
+    distances[n_common == 0] = np.inf
+    return distances
+
+  def _impute_column(self, distances: np.ndarray, column: int) -> np.ndarray:
+    '''
+    Imputes one feature from its k nearest donors.
+    :param distances: Distances from the receivers to the donors of the feature
+    :param column: Index of the feature
+    :return: Imputed values, NaN for receivers without any donor at a finite distance
+    '''
+    donors = np.flatnonzero(self.index_present_[:, column])
+    distances = distances[:, donors]
+
+    # k nearest distinct rows hold the k nearest rows counted with multiplicity
+    n_candidates = min(self.n_neighbors, len(donors))
+    candidates = np.argpartition(distances, n_candidates - 1, axis=1)[:, :n_candidates]
+    candidate_distances = np.take_along_axis(distances, candidates, axis=1)
+    order = np.argsort(candidate_distances, axis=1, kind="stable")
+    candidates = np.take_along_axis(candidates, order, axis=1)
+    candidate_distances = np.take_along_axis(candidate_distances, order, axis=1)
+
+    counts = self.index_counts_[donors][candidates]
+    taken_before = np.cumsum(counts, axis=1) - counts
+    weights = np.clip(self.n_neighbors - taken_before, 0, counts).astype(np.float64)
+    # Donors sharing no present feature are never averaged in
+    weights[np.isinf(candidate_distances)] = 0.0
+
+    if self.weights == "distance":
+      # Exact matches take all the weight
+      exact = (candidate_distances == 0) & (weights > 0)
+      rows_with_exact = exact.any(axis=1)
+      with np.errstate(divide="ignore", invalid="ignore"):
+        weights = np.where(rows_with_exact[:, None], weights * exact, weights / candidate_distances)
+    elif self.weights != "uniform":
+      raise ValueError(f"Unsupported weights {self.weights}")
+
+    donor_values = self.index_X_[donors[candidates], column]
+    with np.errstate(invalid="ignore"):
+      return (donor_values * weights).sum(axis=1) / weights.sum(axis=1)
+
+  def _impute_chunk(self, X: np.ndarray, missing: np.ndarray) -> np.ndarray:
+    '''
+    Imputes a chunk of rows that all hold at least one missing value.
+    :param X: Rows to impute
+    :param missing: Missing-value mask of the rows
+    :return: Imputed rows
+    '''
+    distances = self._distances(np.where(missing, 0.0, X), (~missing).astype(np.float64))
+    imputed = X.copy()
+    for column in np.flatnonzero(missing.any(axis=0)):
+      receivers = np.flatnonzero(missing[:, column])
+      if not self.index_present_[:, column].any():
+        imputed[receivers, column] = self.fill_values_[column]
+        continue
+      values = self._impute_column(distances[receivers], column)
+      imputed[receivers, column] = np.where(np.isnan(values), self.fill_values_[column], values)
+    return imputed
+
+  def transform(self, X) -> np.ndarray:
+    '''
+    Imputes the rows holding missing values, complete rows are returned as is.
+    :param X: Features to impute
+    :return: Imputed features as a float64 array
+    '''
+    try:
+      X = self._to_array(X)
+      missing = np.isnan(X)
+      rows = np.flatnonzero(missing.any(axis=1))
+      if len(rows) == 0:
+        return X
+
+      if not hasattr(self, "index_present_"):
+        # Imputers pickled before per-feature donors indexed complete rows only
+        self.index_present_ = np.ones_like(self.index_X_)
+      if len(self.index_X_) == 0:
+        X[missing] = np.broadcast_to(self.fill_values_, X.shape)[missing]
+        return X
+
+      for start in range(0, len(rows), IMPUTER_QUERY_CHUNK_SIZE):
+        chunk_rows = rows[start:start + IMPUTER_QUERY_CHUNK_SIZE]
+        X[chunk_rows] = self._impute_chunk(X[chunk_rows], missing[chunk_rows])
+      return X
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+
+  def get_feature_names_out(self, input_features=None):
+    feature_names = getattr(self, "feature_names_in_", None)
+    if feature_names is not None:
+      return feature_names
+    return np.asarray([f"x{i}" for i in range(self.n_features_in_)], dtype=object)
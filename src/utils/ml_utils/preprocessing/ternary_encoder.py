@@ -0,0 +1,54 @@
+'''
+Ternary feature encoder.
+Maps the {-1, 0, 1} phishing features to int8 category codes {0, 1, 2} so
+they can be used as categorical features by histogram-based learners.
+'''
+import sys
+import numpy as np
+import pandas as pd
+
+from sklearn.base import BaseEstimator, TransformerMixin
+from src.exception.exception import NetworkSecurityException
+
+# Code of missing values, negative categories count as missing in HistGradientBoosting
+TERNARY_MISSING_CODE: int = -1
+
+class TernaryEncoder(TransformerMixin, BaseEstimator):
+  '''
+  Rounds every feature to the nearest of {-1, 0, 1} and shifts it to {0, 1, 2}.
+  Imputed values that fall between the ternary levels are rounded as well.
+  '''
+  def fit(self, X, y=None):
+    '''
+    Records the number of input features.
+    :param X: Training features
+    :return: The fitted encoder
+    '''
+    try:
+      if isinstance(X, pd.DataFrame):
+        self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+      self.n_features_in_ = np.shape(X)[1]
+      return self
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+
+  def transform(self, X) -> np.ndarray:
+    '''
+    Encodes the features as int8 category codes.
+    :param X: Features in [-1, 1], NaN marks missing values
+    :return: int8 array of codes in {0, 1, 2}, TERNARY_MISSING_CODE for missing values
+    '''
+    try:
+      X = np.asarray(X, dtype=np.float64)
+      missing = np.isnan(X)
+      codes = (np.rint(np.clip(np.nan_to_num(X), -1, 1)) + 1).astype(np.int8)
+      codes[missing] = TERNARY_MISSING_CODE
+      return codes
+    except Exception as e:
+      raise NetworkSecurityException(e, sys)
+
+  def get_feature_names_out(self, input_features=None):
+    feature_names = getattr(self, "feature_names_in_", None)
+    if feature_names is not None:
+      return feature_names
+    return np.asarray([f"x{i}" for i in range(self.n_features_in_)], dtype=object)